@@ -0,0 +1,242 @@
+"""Columnar payroll analytics.
+
+Year-to-date reports cover tens of thousands of employee-weeks, far too many
+for the per-dict loops the weekly endpoints use. Here attendance and advances
+are streamed from Mongo in batches straight into column arrays, and every
+metric is a pandas groupby over those columns.
+
+The loaders take the Motor collections to read from, so this module does not
+depend on ``server``; the computations are plain functions of DataFrames and
+can run in a worker thread.
+"""
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+
+ATTENDANCE_COLUMNS = {"employee_id": object, "week_key": np.int64, "status": object, "late_hours": np.float64}
+ADVANCE_COLUMNS = {"employee_id": object, "week_key": np.int64, "amount": np.float64}
+EMPLOYEE_COLUMNS = {"employee_id": object, "name": object, "daily_salary": np.float64,
+                    "project_id": object, "trade": object}
+
+WORKED_STATUSES = ("present", "late")
+
+
+def empty_frame(columns: Dict[str, type]) -> pd.DataFrame:
+    return pd.DataFrame({name: pd.Series(dtype=dtype) for name, dtype in columns.items()})
+
+
+async def stream_frame(cursor, columns: Dict[str, type], batch_size: int = 5000) -> pd.DataFrame:
+    """Read ``cursor`` into a DataFrame, converting to arrays every ``batch_size`` documents.
+
+    Only one batch of documents is held as dicts at a time.
+    """
+    chunks = []
+    batch = {name: [] for name in columns}
+    count = 0
+
+    def flush():
+        chunks.append(pd.DataFrame({
+            name: np.asarray(values, dtype=columns[name]) for name, values in batch.items()
+        }))
+        for values in batch.values():
+            values.clear()
+
+    async for doc in cursor:
+        for name, values in batch.items():
+            values.append(doc.get(name))
+        count += 1
+        if count % batch_size == 0:
+            flush()
+    if count % batch_size:
+        flush()
+    return pd.concat(chunks, ignore_index=True) if chunks else empty_frame(columns)
+
+
+async def load_attendance(collection, bucketed: bool, first_key: int, last_key: int,
+                          batch_size: int = 5000) -> pd.DataFrame:
+    match = {"week_key": {"$gte": first_key, "$lte": last_key}}
+    if bucketed:
+        cursor = collection.aggregate([
+            {"$match": match},
+            {"$unwind": "$days"},
+            {"$project": {
+                "_id": 0, "employee_id": 1, "week_key": 1,
+                "status": "$days.status", "late_hours": {"$ifNull": ["$days.late_hours", 0]},
+            }},
+        ], batchSize=batch_size)
+    else:
+        cursor = collection.find(
+            match, {"_id": 0, "employee_id": 1, "week_key": 1, "status": 1, "late_hours": 1}
+        ).batch_size(batch_size)
+    frame = await stream_frame(cursor, ATTENDANCE_COLUMNS, batch_size)
+    frame["late_hours"] = frame["late_hours"].fillna(0.0)
+    return frame
+
+
+async def load_advances(collection, first_key: int, last_key: int, batch_size: int = 5000) -> pd.DataFrame:
+    cursor = collection.find(
+        {"week_key": {"$gte": first_key, "$lte": last_key}},
+        {"_id": 0, "employee_id": 1, "week_key": 1, "amount": 1}
+    ).batch_size(batch_size)
+    return await stream_frame(cursor, ADVANCE_COLUMNS, batch_size)
+
+
+def employees_frame(employees: List[dict]) -> pd.DataFrame:
+    if not employees:
+        return empty_frame(EMPLOYEE_COLUMNS)
+    return pd.DataFrame({
+        "employee_id": [e["id"] for e in employees],
+        "name": [e.get("name") for e in employees],
+        "daily_salary": np.asarray([e.get("daily_salary", 0) for e in employees], dtype=np.float64),
+        "project_id": [e.get("project_id") or "unassigned" for e in employees],
+        "trade": [e.get("trade") or "Sin rubro" for e in employees],
+    })
+
+
+def employee_weeks(attendance: pd.DataFrame, advances: pd.DataFrame, employees: pd.DataFrame) -> pd.DataFrame:
+    """One row per employee-week with the same figures /payments/calculate produces."""
+    status = attendance["status"]
+    days = pd.DataFrame({
+        "employee_id": attendance["employee_id"],
+        "week_key": attendance["week_key"],
+        "days_worked": status.isin(WORKED_STATUSES).astype(np.int64),
+        "absences": (status == "absent").astype(np.int64),
+        "lates": (status == "late").astype(np.int64),
+        "late_hours": np.where(status == "late", attendance["late_hours"], 0.0),
+        "recorded_days": np.ones(len(attendance), dtype=np.int64),
+    })
+    weeks = days.groupby(["employee_id", "week_key"], sort=False).sum()
+    weekly_advances = advances.groupby(["employee_id", "week_key"], sort=False)["amount"].sum().rename("advances")
+    weeks = weeks.join(weekly_advances, how="outer").fillna(0).reset_index()
+
+    weeks = weeks.merge(employees, on="employee_id", how="left")
+    weeks["daily_salary"] = weeks["daily_salary"].fillna(0.0)
+    weeks["project_id"] = weeks["project_id"].fillna("unassigned")
+    weeks["trade"] = weeks["trade"].fillna("Sin rubro")
+    weeks["gross_salary"] = weeks["days_worked"] * weeks["daily_salary"]
+    weeks["late_discount"] = weeks["late_hours"] * weeks["daily_salary"] / 8
+    weeks["total_salary"] = weeks["gross_salary"] - weeks["late_discount"]
+    weeks["net_payment"] = weeks["total_salary"] - weeks["advances"]
+    return weeks
+
+
+PAYROLL_TOTALS = ["days_worked", "gross_salary", "late_discount", "total_salary", "advances", "net_payment"]
+
+
+def payroll_metrics(weeks: pd.DataFrame) -> dict:
+    totals = weeks[PAYROLL_TOTALS].sum()
+    employee_count = weeks["employee_id"].nunique()
+    week_count = weeks["week_key"].nunique()
+    per_week = weeks.groupby("week_key")["total_salary"].sum()
+    return {
+        **{name: float(totals[name]) for name in PAYROLL_TOTALS},
+        "employees": int(employee_count),
+        "employee_weeks": int(len(weeks)),
+        "weeks": int(week_count),
+        "average_weekly_cost": float(per_week.mean()) if week_count else 0.0,
+        "peak_weekly_cost": float(per_week.max()) if week_count else 0.0,
+        "average_daily_salary_paid": float(totals["gross_salary"] / totals["days_worked"]) if totals["days_worked"] else 0.0,
+    }
+
+
+def project_cost_curves(weeks: pd.DataFrame, project_names: Dict[str, str]) -> List[dict]:
+    """Weekly and cumulative labor cost per project, ordered by week."""
+    costs = weeks.groupby(["project_id", "week_key"])[["total_salary", "days_worked"]].sum().reset_index()
+    costs = costs.sort_values(["project_id", "week_key"])
+    costs["cumulative_cost"] = costs.groupby("project_id")["total_salary"].cumsum()
+
+    curves = []
+    for project_id, curve in costs.groupby("project_id", sort=False):
+        curves.append({
+            "project_id": project_id,
+            "project_name": project_names.get(project_id, "Sin asignar"),
+            "total": float(curve["total_salary"].sum()),
+            "weeks": curve["week_key"].tolist(),
+            "cost": curve["total_salary"].tolist(),
+            "cumulative_cost": curve["cumulative_cost"].tolist(),
+            "days_worked": curve["days_worked"].astype(int).tolist(),
+        })
+    curves.sort(key=lambda c: c["total"], reverse=True)
+    return curves
+
+
+ABSENTEEISM_GROUPS = {"project": "project_id", "trade": "trade", "employee": "employee_id"}
+
+
+def absenteeism(weeks: pd.DataFrame, group_by: str, labels: Dict[str, str]) -> List[dict]:
+    """Absence and lateness rates over recorded attendance days."""
+    column = ABSENTEEISM_GROUPS[group_by]
+    rates = weeks.groupby(column)[["recorded_days", "absences", "lates", "late_hours"]].sum()
+    rates = rates[rates["recorded_days"] > 0]
+    recorded = rates["recorded_days"]
+    rates["absence_rate"] = rates["absences"] / recorded
+    rates["lateness_rate"] = rates["lates"] / recorded
+    rates["late_hours_per_late"] = np.where(rates["lates"] > 0, rates["late_hours"] / rates["lates"].clip(lower=1), 0.0)
+    rates = rates.sort_values("absence_rate", ascending=False).reset_index()
+    return [
+        {
+            "key": row[column],
+            "label": labels.get(row[column], row[column]),
+            "recorded_days": int(row["recorded_days"]),
+            "absences": int(row["absences"]),
+            "lates": int(row["lates"]),
+            "late_hours": float(row["late_hours"]),
+            "absence_rate": float(row["absence_rate"]),
+            "lateness_rate": float(row["lateness_rate"]),
+            "late_hours_per_late": float(row["late_hours_per_late"]),
+        }
+        for row in rates.to_dict("records")
+    ]
+
+
+SCENARIO_TOTALS = ["gross_salary", "late_discount", "total_salary", "advances", "net_payment",
+                   "contractor_payments", "total_cost"]
+
+
+def simulate_payroll(weeks: pd.DataFrame, weekly_payments: Dict[str, float], week_count: int,
+                     scenarios: List[dict]) -> List[dict]:
+    """Totals of the period's payroll recomputed under each scenario.
+
+    A scenario scales daily salaries by ``salary_multiplier`` times the
+    multiplier of the employee's trade (``trade_multipliers``) and project
+    (``project_multipliers``), charges late hours at ``late_hour_rate`` times
+    the hourly rate, and replaces some of the contractors' ``weekly_payments``
+    with its ``contractor_payments``. Every scenario is evaluated at once on a
+    scenarios x employee-weeks matrix.
+    """
+    trade_codes, trades = pd.factorize(weeks["trade"])
+    project_codes, projects = pd.factorize(weeks["project_id"])
+    trade_factors = np.array([[s["trade_multipliers"].get(t, 1.0) for t in trades] for s in scenarios]).reshape(
+        len(scenarios), len(trades))
+    project_factors = np.array([[s["project_multipliers"].get(p, 1.0) for p in projects] for s in scenarios]).reshape(
+        len(scenarios), len(projects))
+    salary_factors = np.array([s["salary_multiplier"] for s in scenarios])[:, None]
+    late_rates = np.array([s["late_hour_rate"] for s in scenarios])[:, None]
+
+    daily_salary = weeks["daily_salary"].to_numpy() * salary_factors \
+        * trade_factors[:, trade_codes] * project_factors[:, project_codes]
+    gross_salary = (weeks["days_worked"].to_numpy() * daily_salary).sum(axis=1)
+    late_discount = (weeks["late_hours"].to_numpy() * daily_salary / 8 * late_rates).sum(axis=1)
+    advances = float(weeks["advances"].sum())
+
+    payments = np.array([
+        [s["contractor_payments"].get(c, payment) for c, payment in weekly_payments.items()] for s in scenarios
+    ]).reshape(len(scenarios), len(weekly_payments))
+    contractor_payments = payments.sum(axis=1) * week_count
+
+    total_salary = gross_salary - late_discount
+    return [
+        {
+            "name": scenario["name"],
+            "gross_salary": float(gross_salary[i]),
+            "late_discount": float(late_discount[i]),
+            "total_salary": float(total_salary[i]),
+            "advances": advances,
+            "net_payment": float(total_salary[i] - advances),
+            "contractor_payments": float(contractor_payments[i]),
+            "total_cost": float(total_salary[i] + contractor_payments[i]),
+        }
+        for i, scenario in enumerate(scenarios)
+    ]
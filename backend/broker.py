@@ -0,0 +1,62 @@
+"""In-process fan-out of attendance changes to the week streams.
+
+``GET /api/attendance/week/{week_start}/stream`` subscribes a queue per
+client; every attendance write is published to the subscribers of its week
+as a small delta. A subscriber that falls behind gets a single ``None``
+instead of an ever growing backlog, telling the stream to send a resync.
+"""
+import asyncio
+from typing import Dict
+
+
+class AttendanceBroker:
+    """In-process fan-out of attendance changes to SSE subscribers, keyed by week.
+
+    Handlers publish their own writes unless a Mongo change stream is feeding
+    the broker, in which case every worker receives every write from the
+    stream and local publishing is switched off to avoid duplicates.
+    """
+
+    def __init__(self, queue_size: int = 256):
+        self.queue_size = queue_size
+        self.local_publish = True
+        self._subscribers: Dict[str, set] = {}
+
+    def subscribe(self, week_start: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(week_start, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, week_start: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(week_start)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[week_start]
+
+    def publish(self, record: dict):
+        delta = {
+            "id": record.get("id"),
+            "employee_id": record.get("employee_id"),
+            "date": record.get("date"),
+            "status": record.get("status"),
+            "late_hours": record.get("late_hours", 0.0),
+        }
+        for queue in self._subscribers.get(record.get("week_start_date"), ()):
+            try:
+                queue.put_nowait(delta)
+            except asyncio.QueueFull:
+                # Slow consumer: drop its backlog and ask it to refetch the week
+                self._resync_queue(queue)
+
+    def resync(self, week_start: str):
+        """Ask every subscriber of a week to refetch it, e.g. after a bulk write."""
+        for queue in self._subscribers.get(week_start, ()):
+            self._resync_queue(queue)
+
+    @staticmethod
+    def _resync_queue(queue: asyncio.Queue):
+        # None tells the stream to send a resync event instead of a delta
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
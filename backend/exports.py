@@ -0,0 +1,275 @@
+"""Columnar exports of collections to Parquet or Arrow IPC files.
+
+Documents are read from Motor in batches and each batch becomes one Arrow
+record batch (one Parquet row group), so memory is bounded by the batch size
+whatever the size of the export. Columns are typed: dates as date32, money as
+float64 and low-cardinality strings such as attendance ``status`` as
+dictionary-encoded columns in Parquet. Arrow IPC files hold them as plain
+strings: each batch builds its own dictionary, and the IPC file format can't
+replace a dictionary between batches.
+
+Week-keyed collections can also be exported as a partitioned dataset, one
+``week=<week_key>/part.<ext>`` file per week. Each file records the week's
+highest ``sync_seq`` and row count in its schema metadata, so a repeated
+export rewrites only the weeks that are new or changed since the last run.
+"""
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+
+logger = logging.getLogger(__name__)
+
+CATEGORY = pa.dictionary(pa.int32(), pa.string())
+
+EXPORT_SCHEMAS = {
+    "attendance": pa.schema([
+        ("id", pa.string()), ("employee_id", pa.string()), ("date", pa.date32()), ("status", CATEGORY),
+        ("late_hours", pa.float64()), ("week_start_date", pa.date32()), ("week_key", pa.int32()),
+        ("updated_at", pa.string()),
+    ]),
+    "advances": pa.schema([
+        ("id", pa.string()), ("employee_id", pa.string()), ("amount", pa.float64()), ("date", pa.date32()),
+        ("description", pa.string()), ("week_start_date", pa.date32()), ("week_key", pa.int32()),
+        ("updated_at", pa.string()),
+    ]),
+    "certifications": pa.schema([
+        ("id", pa.string()), ("contractor_id", pa.string()), ("amount", pa.float64()),
+        ("description", pa.string()), ("week_start_date", pa.date32()), ("week_key", pa.int32()),
+        ("created_at", pa.string()), ("updated_at", pa.string()),
+    ]),
+    "payment_history": pa.schema([
+        ("id", pa.string()), ("employee_id", pa.string()), ("week_start_date", pa.date32()),
+        ("week_key", pa.int32()), ("days_worked", pa.int32()), ("total_salary", pa.float64()),
+        ("total_advances", pa.float64()), ("net_payment", pa.float64()), ("paid_at", pa.string()),
+        ("updated_at", pa.string()),
+    ]),
+    "employees": pa.schema([
+        ("id", pa.string()), ("name", pa.string()), ("daily_salary", pa.float64()), ("project_id", pa.string()),
+        ("trade", CATEGORY), ("is_active", pa.bool_()), ("created_at", pa.string()), ("updated_at", pa.string()),
+    ]),
+    "projects": pa.schema([
+        ("id", pa.string()), ("name", pa.string()), ("description", pa.string()), ("start_date", pa.string()),
+        ("is_active", pa.bool_()), ("created_at", pa.string()), ("updated_at", pa.string()),
+    ]),
+    "contractors": pa.schema([
+        ("id", pa.string()), ("name", pa.string()), ("weekly_payment", pa.float64()), ("project_name", CATEGORY),
+        ("budget", pa.float64()), ("total_paid", pa.float64()), ("is_active", pa.bool_()),
+        ("created_at", pa.string()), ("updated_at", pa.string()),
+    ]),
+}
+WEEKLY_COLLECTIONS = ("attendance", "advances", "certifications", "payment_history")
+
+# format -> (file extension, media type)
+EXPORT_FORMATS = {
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+    "arrow": ("arrow", "application/vnd.apache.arrow.file"),
+}
+
+
+def source_cursor(db, collection: str, query: dict, bucketed: bool, batch_size: int):
+    """Cursor over the documents to export; bucketed attendance is flattened to days."""
+    if collection == "attendance" and bucketed:
+        return db.attendance_weeks.aggregate([
+            {"$match": query},
+            {"$unwind": "$days"},
+            {"$project": {
+                "_id": 0, "employee_id": 1, "week_start_date": 1, "week_key": 1, "updated_at": 1,
+                "id": "$days.id", "date": "$days.date", "status": "$days.status",
+                "late_hours": {"$ifNull": ["$days.late_hours", 0]},
+            }},
+        ], batchSize=batch_size)
+    projection = {"_id": 0, **{name: 1 for name in EXPORT_SCHEMAS[collection].names}}
+    return db[collection].find(query, projection).batch_size(batch_size)
+
+
+def parse_dates(values: list) -> Tuple[pa.Array, int]:
+    """Stored ``YYYY-MM-DD`` strings as a date32 array, and how many values weren't valid dates.
+
+    Invalid values become null instead of failing the export halfway through.
+    """
+    strings = pa.array([value if isinstance(value, str) else None for value in values], pa.string())
+    parsed = pc.strptime(strings, format="%Y-%m-%d", unit="s", error_is_null=True)
+    # strptime rolls impossible days over (2025-02-30 -> 2025-03-02); those don't format back the same
+    parsed = pc.if_else(pc.equal(pc.strftime(parsed, format="%Y-%m-%d"), strings), parsed, None)
+    return parsed.cast(pa.date32()), parsed.null_count - values.count(None)
+
+
+def to_record_batch(columns: Dict[str, list], schema: pa.Schema) -> pa.RecordBatch:
+    arrays = []
+    for field in schema:
+        values = columns[field.name]
+        if pa.types.is_date(field.type):
+            array, invalid = parse_dates(values)
+            if invalid:
+                logger.warning("Exported %d invalid %s values as null", invalid, field.name)
+            arrays.append(array)
+        elif pa.types.is_dictionary(field.type):
+            # Built from the plain strings, then dictionary-encoded
+            arrays.append(pa.array(values, pa.string()).cast(field.type))
+        else:
+            arrays.append(pa.array(values, field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+async def record_batches(cursor, schema: pa.Schema, batch_size: int) -> AsyncIterator[pa.RecordBatch]:
+    columns = {name: [] for name in schema.names}
+    rows = 0
+    async for doc in cursor:
+        for name, values in columns.items():
+            values.append(doc.get(name))
+        rows += 1
+        if rows == batch_size:
+            yield to_record_batch(columns, schema)
+            columns = {name: [] for name in schema.names}
+            rows = 0
+    if rows:
+        yield to_record_batch(columns, schema)
+
+
+class ChunkSink:
+    """Write-only file object that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def writer_schema(schema: pa.Schema, fmt: str) -> pa.Schema:
+    """``schema`` as written in ``fmt``: dictionary columns become plain strings in Arrow IPC."""
+    if fmt == "parquet":
+        return schema
+    fields = [
+        field.with_type(pa.string()) if pa.types.is_dictionary(field.type) else field
+        for field in schema
+    ]
+    return pa.schema(fields, metadata=schema.metadata)
+
+
+def open_writer(fmt: str, sink, schema: pa.Schema):
+    if fmt == "parquet":
+        return pq.ParquetWriter(sink, schema, compression="zstd")
+    return ipc.new_file(sink, schema)
+
+
+async def stream_export(cursor, schema: pa.Schema, fmt: str, batch_size: int) -> AsyncIterator[bytes]:
+    """Yield the export file in pieces as each batch is encoded."""
+    schema = writer_schema(schema, fmt)
+    sink = ChunkSink()
+    writer = open_writer(fmt, pa.PythonFile(sink, mode="w"), schema)
+    try:
+        async for batch in record_batches(cursor, schema, batch_size):
+            await asyncio.to_thread(writer.write_batch, batch)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+async def export_file(cursor, schema: pa.Schema, fmt: str, path: Path, batch_size: int) -> int:
+    """Write an export to ``path`` atomically; returns the number of rows."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + ".partial")
+    schema = writer_schema(schema, fmt)
+    rows = 0
+    writer = open_writer(fmt, str(partial), schema)
+    try:
+        async for batch in record_batches(cursor, schema, batch_size):
+            await asyncio.to_thread(writer.write_batch, batch)
+            rows += batch.num_rows
+    except BaseException:
+        writer.close()
+        partial.unlink(missing_ok=True)
+        raise
+    writer.close()
+    os.replace(partial, path)
+    return rows
+
+
+def stored_metadata(path: Path, fmt: str) -> Dict[bytes, bytes]:
+    if not path.is_file():
+        return {}
+    try:
+        if fmt == "parquet":
+            schema = pq.read_schema(path)
+        else:
+            with pa.memory_map(str(path)) as source:
+                schema = ipc.open_file(source).schema
+    except (OSError, pa.ArrowInvalid):
+        return {}
+    return schema.metadata or {}
+
+
+async def export_weeks(db, collection: str, fmt: str, out_dir: Path, bucketed: bool = False,
+                       first_key: Optional[int] = None, last_key: Optional[int] = None,
+                       batch_size: int = 10000) -> Tuple[int, int, int]:
+    """Export ``collection`` as one file per week under ``out_dir/<collection>/``.
+
+    Returns (weeks written, weeks unchanged, stale partitions removed).
+    """
+    source = "attendance_weeks" if collection == "attendance" and bucketed else collection
+    week_range = {}
+    if first_key is not None:
+        week_range["$gte"] = first_key
+    if last_key is not None:
+        week_range["$lte"] = last_key
+    match = {"week_key": week_range} if week_range else {"week_key": {"$exists": True}}
+    weeks = await db[source].aggregate([
+        {"$match": match},
+        {"$group": {"_id": "$week_key", "sync_seq": {"$max": "$sync_seq"}, "documents": {"$sum": 1}}},
+    ]).to_list(None)
+
+    extension = EXPORT_FORMATS[fmt][0]
+    base = out_dir / collection
+    written = unchanged = 0
+    for week in sorted(weeks, key=lambda w: w["_id"]):
+        path = base / f"week={week['_id']}" / f"part.{extension}"
+        version = {b"sync_seq": str(week["sync_seq"] or 0).encode(), b"documents": str(week["documents"]).encode()}
+        stored = stored_metadata(path, fmt)
+        if all(stored.get(key) == value for key, value in version.items()):
+            unchanged += 1
+            continue
+        schema = EXPORT_SCHEMAS[collection].with_metadata(version)
+        cursor = source_cursor(db, collection, {"week_key": week["_id"]}, bucketed, batch_size)
+        await export_file(cursor, schema, fmt, path, batch_size)
+        written += 1
+
+    # Weeks whose documents were all deleted since the last export
+    removed = 0
+    current = {week["_id"] for week in weeks}
+    for path in base.glob(f"week=*/part.{extension}") if base.is_dir() else []:
+        key = int(path.parent.name.split("=", 1)[1])
+        in_range = (first_key is None or key >= first_key) and (last_key is None or key <= last_key)
+        if in_range and key not in current:
+            path.unlink()
+            removed += 1
+    return written, unchanged, removed
@@ -0,0 +1,302 @@
+"""
+Maintenance commands for the PayrollPro backend.
+
+Usage: python manage.py --help
+"""
+import asyncio
+import os
+from datetime import datetime, timezone
+from functools import wraps
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import List, Optional
+
+import typer
+from pymongo import UpdateOne
+
+import exports
+import server
+
+cli = typer.Typer(help="PayrollPro maintenance commands")
+
+
+@cli.callback()
+def main():
+    """PayrollPro maintenance commands."""
+
+
+def with_db(func):
+    """Run an async command with server.client/db connected, like the app lifespan does."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        async def run():
+            server.client = server.create_mongo_client()
+            server.db = server.client[os.environ['DB_NAME']]
+            try:
+                async with server.sync_lease_scope():
+                    return await func(*args, **kwargs)
+            finally:
+                server.client.close()
+        return asyncio.run(run())
+    return wrapper
+
+
+async def collection_stats(name: str) -> str:
+    try:
+        stats = await server.db.command("collStats", name)
+    except Exception:
+        return f"{name}: {await server.db[name].count_documents({})} documents"
+    return f"{name}: {stats.get('count', 0)} documents, {stats.get('totalIndexSize', 0)} bytes of indexes"
+
+
+async def write_buckets(groups):
+    if not groups:
+        return
+    last_seq = await server.next_sync_seq(len(groups))
+    updated_at = datetime.now(timezone.utc).isoformat()
+    operations = []
+    for i, ((employee_id, week_start), records) in enumerate(groups):
+        # Later records for the same date win, as they would have in the daily layout
+        days = {}
+        for record in records:
+            days[record['date']] = {
+                "id": record['id'],
+                "date": record['date'],
+                "status": record['status'],
+                "late_hours": record.get('late_hours', 0.0),
+            }
+        operations.append(UpdateOne(
+            {"employee_id": employee_id, "week_start_date": week_start},
+            {
+                "$set": {
+                    "days": [days[date] for date in sorted(days)],
+                    "updated_at": updated_at,
+                    "sync_seq": last_seq - len(groups) + 1 + i,
+                    "week_key": server.week_key(week_start),
+                },
+                "$setOnInsert": {"id": f"{employee_id}:{week_start}"},
+            },
+            upsert=True
+        ))
+    await server.db.attendance_weeks.bulk_write(operations, ordered=False)
+
+
+async def write_daily(records):
+    if not records:
+        return
+    last_seq = await server.next_sync_seq(len(records))
+    operations = [
+        UpdateOne(
+            {"employee_id": record['employee_id'], "date": record['date']},
+            {"$set": {
+                **record,
+                "sync_seq": last_seq - len(records) + 1 + i,
+                "week_key": server.week_key(record['week_start_date']),
+            }},
+            upsert=True
+        )
+        for i, record in enumerate(records)
+    ]
+    await server.db.attendance.bulk_write(operations, ordered=False)
+
+
+@cli.command("migrate-attendance")
+@with_db
+async def migrate_attendance(
+    to: str = typer.Option(..., help="Target layout: bucketed or daily"),
+    batch_size: int = typer.Option(1000, help="Documents written per bulk_write"),
+    drop_source: bool = typer.Option(False, help="Drop the source collection once copied"),
+):
+    """Copy attendance between the daily and bucketed (employee-week) layouts.
+
+    Run it before switching ATTENDANCE_LAYOUT. Buckets or days already present
+    in the target are overwritten by the source copy.
+    """
+    if to not in ("bucketed", "daily"):
+        raise typer.BadParameter("--to must be 'bucketed' or 'daily'")
+    source = "attendance" if to == "bucketed" else "attendance_weeks"
+    target = "attendance_weeks" if to == "bucketed" else "attendance"
+    await server.ensure_indexes()
+    typer.echo(f"before: {await collection_stats(source)}; {await collection_stats(target)}")
+
+    written = 0
+    if to == "bucketed":
+        cursor = server.db.attendance.find({}, {"_id": 0}, allow_disk_use=True).sort(
+            [("employee_id", 1), ("week_start_date", 1), ("date", 1)]
+        ).batch_size(batch_size)
+        batch = []
+        async for record in cursor:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                # The last group may continue in the next batch, so carry it over
+                grouped = [(k, list(g)) for k, g in groupby(batch, key=itemgetter('employee_id', 'week_start_date'))]
+                await write_buckets(grouped[:-1])
+                written += len(grouped) - 1
+                batch = grouped[-1][1]
+        grouped = [(k, list(g)) for k, g in groupby(batch, key=itemgetter('employee_id', 'week_start_date'))]
+        await write_buckets(grouped)
+        written += len(grouped)
+    else:
+        cursor = server.db.attendance_weeks.find({}, {"_id": 0}).batch_size(batch_size)
+        batch = []
+        async for bucket in cursor:
+            batch.extend(server.BucketedAttendanceStore().flatten([bucket]))
+            if len(batch) >= batch_size:
+                await write_daily(batch)
+                written += len(batch)
+                batch = []
+        await write_daily(batch)
+        written += len(batch)
+
+    typer.echo(f"wrote {written} {'buckets' if to == 'bucketed' else 'records'}")
+    if drop_source:
+        await server.db.drop_collection(source)
+        typer.echo(f"dropped {source}")
+    typer.echo(f"after: {await collection_stats(target)}")
+
+
+WEEK_KEYED_COLLECTIONS = ["attendance", "advances", "certifications", "payment_history"]
+
+
+async def backfill_collection(name: str, batch_size: int) -> tuple:
+    """Stamp week_key on one collection, moving week_start_date to its Monday.
+
+    Documents whose week_start_date changes get a new sync_seq so clients pick
+    the correction up on their next /api/sync.
+    """
+    cursor = server.db[name].find(
+        {"week_key": {"$exists": False}}, {"_id": 1, "week_start_date": 1}
+    ).batch_size(batch_size)
+    updated = moved = 0
+    batch = []
+
+    async def flush():
+        nonlocal moved
+        if not batch:
+            return
+        moving = sum(1 for doc in batch if doc['canonical'] != doc['week_start_date'])
+        seq = await server.next_sync_seq(moving) - moving if moving else 0
+        updated_at = datetime.now(timezone.utc).isoformat()
+        operations = []
+        for doc in batch:
+            fields = {"week_key": server.week_key(doc['canonical'])}
+            if doc['canonical'] != doc['week_start_date']:
+                seq += 1
+                fields.update({"week_start_date": doc['canonical'], "updated_at": updated_at, "sync_seq": seq})
+            operations.append(UpdateOne({"_id": doc['_id']}, {"$set": fields}))
+        await server.db[name].bulk_write(operations, ordered=False)
+        moved += moving
+        batch.clear()
+
+    async for doc in cursor:
+        try:
+            doc['canonical'] = server.canonical_week_start(doc.get('week_start_date'))
+        except ValueError:
+            typer.echo(f"{name}: skipping {doc['_id']}, bad week_start_date {doc.get('week_start_date')!r}")
+            continue
+        batch.append(doc)
+        updated += 1
+        if len(batch) >= batch_size:
+            await flush()
+    await flush()
+    return updated, moved
+
+
+async def backfill_buckets(batch_size: int) -> tuple:
+    """Stamp week_key on attendance buckets.
+
+    A bucket's week is part of its id, so buckets that don't start on a Monday
+    are only reported; fix them by migrating to daily and back.
+    """
+    cursor = server.db.attendance_weeks.find(
+        {"week_key": {"$exists": False}}, {"_id": 1, "id": 1, "week_start_date": 1}
+    ).batch_size(batch_size)
+    updated = misaligned = 0
+    operations = []
+    async for bucket in cursor:
+        try:
+            canonical = server.canonical_week_start(bucket.get('week_start_date'))
+        except ValueError:
+            canonical = None
+        if canonical != bucket.get('week_start_date'):
+            typer.echo(f"attendance_weeks: bucket {bucket.get('id')} does not start on a Monday")
+            misaligned += 1
+            continue
+        operations.append(UpdateOne({"_id": bucket['_id']}, {"$set": {"week_key": server.week_key(canonical)}}))
+        updated += 1
+        if len(operations) >= batch_size:
+            await server.db.attendance_weeks.bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        await server.db.attendance_weeks.bulk_write(operations, ordered=False)
+    return updated, misaligned
+
+
+@cli.command("backfill-week-keys")
+@with_db
+async def backfill_week_keys(
+    batch_size: int = typer.Option(1000, help="Documents written per bulk_write"),
+):
+    """Add week_key to documents written before it existed.
+
+    Safe to run repeatedly: only documents without a week_key are touched.
+    """
+    await server.ensure_indexes()
+    for name in WEEK_KEYED_COLLECTIONS:
+        updated, moved = await backfill_collection(name, batch_size)
+        typer.echo(f"{name}: {updated} keyed, {moved} moved to their Monday")
+    updated, misaligned = await backfill_buckets(batch_size)
+    typer.echo(f"attendance_weeks: {updated} keyed, {misaligned} misaligned")
+
+
+@cli.command("export")
+@with_db
+async def export(
+    out: Path = typer.Option(..., help="Output directory"),
+    collection: List[str] = typer.Option(
+        list(exports.WEEKLY_COLLECTIONS), help="Collection to export; repeat for several"
+    ),
+    format: str = typer.Option("parquet", help="parquet or arrow"),
+    partition_by_week: bool = typer.Option(
+        False, help="One file per week; unchanged weeks from a previous export are kept"
+    ),
+    from_week: Optional[str] = typer.Option(None, "--from", help="First week (YYYY-MM-DD)"),
+    to_week: Optional[str] = typer.Option(None, "--to", help="Last week (YYYY-MM-DD)"),
+    batch_size: int = typer.Option(10000, help="Documents per record batch"),
+):
+    """Export collections to Parquet or Arrow IPC files with typed columns."""
+    if format not in exports.EXPORT_FORMATS:
+        raise typer.BadParameter("--format must be 'parquet' or 'arrow'")
+    unknown = [name for name in collection if name not in exports.EXPORT_SCHEMAS]
+    if unknown:
+        raise typer.BadParameter(f"unknown collection(s): {', '.join(unknown)}")
+    try:
+        first_key = server.week_key(server.canonical_week_start(from_week)) if from_week else None
+        last_key = server.week_key(server.canonical_week_start(to_week)) if to_week else None
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc))
+    bucketed = isinstance(server.attendance_store, server.BucketedAttendanceStore)
+    extension = exports.EXPORT_FORMATS[format][0]
+
+    for name in collection:
+        weekly = name in exports.WEEKLY_COLLECTIONS
+        if (partition_by_week or first_key or last_key) and not weekly:
+            typer.echo(f"{name}: not week-keyed, exporting all of it")
+        if partition_by_week and weekly:
+            written, unchanged, removed = await exports.export_weeks(
+                server.db, name, format, out, bucketed, first_key, last_key, batch_size
+            )
+            typer.echo(f"{name}: {written} weeks written, {unchanged} unchanged, {removed} removed")
+            continue
+        query = {}
+        if weekly and (first_key or last_key):
+            query["week_key"] = {k: v for k, v in (("$gte", first_key), ("$lte", last_key)) if v}
+        cursor = exports.source_cursor(server.db, name, query, bucketed, batch_size)
+        path = out / f"{name}.{extension}"
+        rows = await exports.export_file(cursor, exports.EXPORT_SCHEMAS[name], format, path, batch_size)
+        typer.echo(f"{name}: {rows} rows to {path}")
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,138 @@
+"""On-demand, per-request profiling.
+
+Profiling is only wired in when ``PROFILE_TOKEN`` is set. A request opts in by
+sending ``X-Profile: <token>`` (or ``?_profile=<token>``); every other request
+goes straight to the app. The profile is written to ``PROFILE_DIR`` and its id
+is returned in the ``X-Profile-Id`` response header.
+
+Two modes are available through ``X-Profile-Mode``:
+
+- ``sample`` (default): a background thread samples the event loop thread's
+  stack every millisecond and writes collapsed stacks (``.folded``), the input
+  format of flamegraph.pl, speedscope and inferno. Time spent awaiting Motor
+  shows up as the loop sitting in ``select``.
+- ``cprofile``: deterministic profiling with cProfile, written as a pstats
+  dump (``.prof``) for snakeviz, flameprof or ``python -m pstats``.
+
+Both modes observe the whole event loop thread, so requests running
+concurrently on the same worker show up in the profile as well.
+"""
+import cProfile
+import hmac
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import parse_qs
+from uuid import uuid4
+
+
+PROFILE_ID_RE = re.compile(r'^[A-Za-z0-9_.-]+$')
+PROFILE_EXTENSIONS = {'sample': 'folded', 'cprofile': 'prof'}
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.samples = Counter()
+        self._target = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def dump(self, path: Path):
+        lines = [f"{stack} {count}" for stack, count in self.samples.most_common()]
+        path.write_text("\n".join(lines) + "\n")
+
+
+class DeterministicProfiler:
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def start(self):
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+
+    def dump(self, path: Path):
+        self._profile.dump_stats(str(path))
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles requests carrying the profiling token."""
+
+    def __init__(self, app, token: str, output_dir: Path):
+        self.app = app
+        self.token = token
+        self.output_dir = Path(output_dir)
+
+    def _requested_mode(self, scope):
+        headers = dict(scope.get('headers') or [])
+        supplied = headers.get(b'x-profile', b'').decode('latin-1')
+        if not supplied and b'_profile=' in scope.get('query_string', b''):
+            query = parse_qs(scope['query_string'].decode('latin-1'))
+            supplied = query.get('_profile', [''])[0]
+        if not token_matches(supplied, self.token):
+            return None
+        mode = headers.get(b'x-profile-mode', b'sample').decode('latin-1').lower()
+        return mode if mode in PROFILE_EXTENSIONS else 'sample'
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        mode = self._requested_mode(scope)
+        if mode is None:
+            return await self.app(scope, receive, send)
+
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', scope['path']).strip('-') or 'root'
+        profile_id = f"{int(time.time())}-{slug}-{uuid4().hex[:8]}.{PROFILE_EXTENSIONS[mode]}"
+        profiler = SamplingProfiler() if mode == 'sample' else DeterministicProfiler()
+
+        async def send_with_profile_id(message):
+            if message['type'] == 'http.response.start':
+                message.setdefault('headers', [])
+                message['headers'] = list(message['headers']) + [(b'x-profile-id', profile_id.encode())]
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.stop()
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            profiler.dump(self.output_dir / profile_id)
+
+
+def token_matches(supplied: str, token: str) -> bool:
+    """Constant-time token check; any string, ASCII or not, may be supplied."""
+    return bool(supplied) and hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8'))
+
+
+def resolve_profile(output_dir: Path, profile_id: str):
+    """Return the path of a stored profile, or None if the id is unknown."""
+    if not PROFILE_ID_RE.match(profile_id) or profile_id.startswith('.'):
+        return None
+    path = Path(output_dir) / profile_id
+    return path if path.is_file() else None
@@ -0,0 +1,177 @@
+"""Printable weekly pay receipts rendered as one HTML document.
+
+The layout, the wording and the amount-in-words conversion are the ones the
+frontend's ``PrintableReceipts`` component prints, so a server-rendered batch
+looks the same as the browser's. Receipts are rendered in chunks by plain
+functions of dicts, so chunks can be handed to worker processes and the
+document streamed back as they finish: ``document_head()``, then each
+``render_chunk()`` in order, then ``DOCUMENT_TAIL``.
+"""
+import math
+from datetime import date, timedelta
+from functools import lru_cache
+from html import escape
+from typing import List
+
+
+COMPANY_NAME = "PMD ARQUITECTURA"
+
+UNITS = ["", "uno", "dos", "tres", "cuatro", "cinco", "seis", "siete", "ocho", "nueve"]
+TEENS = ["diez", "once", "doce", "trece", "catorce", "quince", "dieciséis", "diecisiete", "dieciocho", "diecinueve"]
+TENS = ["", "", "veinte", "treinta", "cuarenta", "cincuenta", "sesenta", "setenta", "ochenta", "noventa"]
+HUNDREDS = ["", "ciento", "doscientos", "trescientos", "cuatrocientos", "quinientos", "seiscientos",
+            "setecientos", "ochocientos", "novecientos"]
+
+
+@lru_cache(maxsize=4096)
+def amount_in_words(amount: float) -> str:
+    """Spanish words for ``amount``, cents as ``con NN/100``.
+
+    Payroll amounts repeat a lot (the same salary times the same days), so
+    results are memoized.
+    """
+    if amount == 0:
+        return "cero"
+    if amount == 100:
+        return "cien"
+
+    words = ""
+    integer_part = math.floor(amount)
+    # Math.round in the frontend rounds halves up
+    cents = math.floor((amount - integer_part) * 100 + 0.5)
+
+    if integer_part >= 1000:
+        thousands = integer_part // 1000
+        words += "mil " if thousands == 1 else amount_in_words(thousands) + " mil "
+
+    remainder = integer_part % 1000
+    if remainder >= 100:
+        words += HUNDREDS[remainder // 100] + " "
+
+    last_two = remainder % 100
+    if last_two >= 20:
+        words += TENS[last_two // 10]
+        if last_two % 10:
+            words += " y " + UNITS[last_two % 10]
+    elif last_two >= 10:
+        words += TEENS[last_two - 10]
+    elif last_two > 0:
+        words += UNITS[last_two]
+
+    if cents > 0:
+        words += f" con {cents}/100"
+    return words.strip()
+
+
+def format_currency(amount: float) -> str:
+    """es-AR pesos, e.g. ``$ 1.234,50``."""
+    text = f"{abs(amount):,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
+    return f"{'-' if amount < 0 else ''}$ {text}"
+
+
+def format_date(value: str, with_year: bool = True) -> str:
+    """``YYYY-MM-DD`` as ``DD/MM/YYYY`` (or ``DD/MM``)."""
+    year, month, day = value[:10].split("-")
+    return f"{day}/{month}/{year}" if with_year else f"{day}/{month}"
+
+
+def week_end(week_start: str) -> str:
+    return (date.fromisoformat(week_start) + timedelta(days=6)).isoformat()
+
+
+def render_receipt(receipt: dict, week_start: str, issued_on: str) -> str:
+    """One receipt: ``number``, ``name``, ``gross``, ``net`` and, for employees,
+    ``late_discount`` and ``advances``; contractors have ``project``."""
+    is_contractor = receipt.get("is_contractor", False)
+    period = f"Semana del {format_date(week_start)} al {format_date(week_end(week_start))}"
+    if is_contractor:
+        concept = f"Certificación semanal - Obra: {receipt.get('project') or 'Sin asignar'} - {period}"
+    else:
+        concept = f"Pago de salarios - {period}"
+    net = format_currency(receipt["net"])
+
+    breakdown = [
+        f'<div class="breakdown-title">{"Detalle de certificación:" if is_contractor else "Liquidación del período:"}</div>',
+        f'<div class="breakdown-item"><span>{"Monto certificado:" if is_contractor else "Salario bruto:"}</span>'
+        f'<span>{format_currency(receipt["gross"])}</span></div>',
+    ]
+    if not is_contractor and receipt.get("late_discount", 0) > 0:
+        breakdown.append(
+            '<div class="breakdown-item deduction"><span>Descuento por tardanzas:</span>'
+            f'<span>- {format_currency(receipt["late_discount"])}</span></div>'
+        )
+    advances = [] if is_contractor else receipt.get("advances") or []
+    if advances:
+        breakdown.append('<div class="breakdown-subtitle">Adelantos descontados:</div>')
+        for advance in advances:
+            description = f" ({escape(advance['description'])})" if advance.get("description") else ""
+            breakdown.append(
+                f'<div class="breakdown-item deduction"><span>• {format_date(advance["date"], with_year=False)}'
+                f'{description}</span><span>- {format_currency(advance["amount"])}</span></div>'
+            )
+    breakdown.append(f'<div class="breakdown-total"><span>Total a cobrar:</span><span>{net}</span></div>')
+
+    return f"""<div class="receipt-container"><div class="receipt-border">
+<div class="receipt-header"><div class="company-name">{COMPANY_NAME}</div><div class="receipt-number">Recibo N° {escape(receipt["number"])}</div></div>
+<div class="receipt-date">Fecha: {format_date(issued_on)}</div>
+<div class="receipt-body">
+<div class="receipt-line"><span class="label">Recibí de:</span><span class="value underline">{COMPANY_NAME}</span></div>
+<div class="receipt-line"><span class="label">La suma de:</span><span class="value underline">{net}</span></div>
+<div class="receipt-line"><span class="label">En letras:</span><span class="value underline uppercase">{amount_in_words(receipt["net"])} PESOS</span></div>
+<div class="receipt-line"><span class="label">En concepto de:</span><span class="value underline">{escape(concept)}</span></div>
+<div class="receipt-breakdown">{"".join(breakdown)}</div>
+<div class="receipt-line full-line"><span class="label">En carácter de:</span><span class="value underline">Pago total y definitivo</span></div>
+</div>
+<div class="receipt-footer">
+<div class="signature-section"><div class="signature-line">_____________________________</div><div class="signature-label">Firma del {"contratista" if is_contractor else "empleado"}</div></div>
+<div class="signature-section"><div class="employee-name">{escape(receipt["name"])}</div><div class="signature-label">Aclaración</div></div>
+<div class="signature-section"><div class="signature-line">_____________________________</div><div class="signature-label">DNI</div></div>
+</div>
+<div class="receipt-note">Sin otro particular, saluda atentamente.</div>
+</div></div>
+"""
+
+
+def render_chunk(receipts: List[dict], week_start: str, issued_on: str) -> str:
+    """Render consecutive receipts; the unit of work given to a worker process."""
+    return "".join(render_receipt(receipt, week_start, issued_on) for receipt in receipts)
+
+
+STYLE = """
+@page { size: A4; margin: 10mm; }
+body { margin: 0; }
+.receipt-container { width: 100%; height: 19%; margin-bottom: 1%; page-break-inside: avoid; display: flex; align-items: center; justify-content: center; }
+.receipt-border { width: 100%; padding: 10px; border: 2px solid #1e40af; border-radius: 4px; background: white; font-family: 'Arial', sans-serif; }
+.receipt-header { display: flex; justify-content: space-between; align-items: center; margin-bottom: 6px; padding-bottom: 6px; border-bottom: 2px solid #1e40af; }
+.company-name { font-size: 14px; font-weight: bold; color: #1e40af; letter-spacing: 1px; }
+.receipt-number { font-size: 11px; font-weight: bold; color: #475569; }
+.receipt-date { text-align: right; font-size: 10px; margin-bottom: 6px; color: #475569; }
+.receipt-body { margin: 10px 0; }
+.receipt-line { display: flex; margin-bottom: 4px; font-size: 10px; align-items: baseline; }
+.receipt-line.full-line { flex-direction: column; }
+.receipt-line .label { font-weight: 600; color: #334155; min-width: 90px; margin-right: 6px; font-size: 9px; }
+.receipt-line .value { flex: 1; color: #1e293b; font-size: 9px; }
+.receipt-line .underline { border-bottom: 1px solid #cbd5e1; padding-bottom: 2px; display: inline-block; min-height: 14px; }
+.receipt-line .uppercase { text-transform: uppercase; }
+.receipt-breakdown { margin: 10px 0; padding: 6px; background: #f8fafc; border: 1px solid #cbd5e1; border-radius: 4px; }
+.breakdown-title { font-weight: bold; font-size: 9px; color: #1e40af; margin-bottom: 4px; text-transform: uppercase; }
+.breakdown-subtitle { font-weight: 600; font-size: 8px; color: #475569; margin-top: 4px; margin-bottom: 2px; }
+.breakdown-item { display: flex; justify-content: space-between; font-size: 8px; margin-bottom: 2px; color: #1e293b; }
+.breakdown-item.deduction { color: #dc2626; }
+.breakdown-total { display: flex; justify-content: space-between; font-size: 9px; font-weight: bold; margin-top: 4px; padding-top: 4px; border-top: 2px solid #1e40af; color: #1e40af; }
+.receipt-footer { display: flex; justify-content: space-between; margin-top: 10px; margin-bottom: 6px; }
+.signature-section { flex: 1; text-align: center; }
+.signature-line { margin-bottom: 2px; font-size: 9px; color: #1e293b; }
+.employee-name { font-weight: bold; margin-bottom: 2px; font-size: 10px; color: #1e293b; }
+.signature-label { font-size: 8px; color: #64748b; font-style: italic; }
+.receipt-note { text-align: center; font-size: 8px; color: #64748b; font-style: italic; margin-top: 6px; }
+"""
+
+
+def document_head(week_start: str) -> str:
+    return (f'<!DOCTYPE html>\n<html lang="es"><head><meta charset="utf-8">'
+            f'<title>Recibos - Semana del {format_date(week_start)}</title>'
+            f'<style>{STYLE}</style></head><body>\n')
+
+
+DOCUMENT_TAIL = "</body></html>\n"
@@ -1,26 +1,611 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, File, HTTPException, Header, Query, Request, Response, UploadFile
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne, monitoring
+from pymongo.errors import DuplicateKeyError
 import os
+import asyncio
+import hashlib
 import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from contextvars import ContextVar
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional
-from datetime import datetime, timezone, timedelta
+from pydantic import AfterValidator, BaseModel, Field, ConfigDict, TypeAdapter, ValidationError, create_model
+from typing import Annotated, Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, get_args
+from urllib.parse import unquote, urlencode, urlsplit
+from datetime import date, datetime, timezone, timedelta
+import json
+import multiprocessing
+import re
+import unicodedata
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+import analytics
+import exports
+import imports
+import receipts
+from broker import AttendanceBroker
+from profiling import ProfilingMiddleware, resolve_profile, token_matches
 
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks Motor connection pool usage from pymongo's CMAP events."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.checked_out = 0
+        self.waiting = 0
+        self.checkout_failures = 0
+        self.pool_clears = 0
+
+    def _add(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._add(pool_clears=1)
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._add(open=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add(open=-1)
+
+    def connection_check_out_started(self, event):
+        self._add(waiting=1)
+
+    def connection_check_out_failed(self, event):
+        self._add(waiting=-1, checkout_failures=1)
+
+    def connection_checked_out(self, event):
+        self._add(waiting=-1, checked_out=1)
+
+    def connection_checked_in(self, event):
+        self._add(checked_out=-1)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "open_connections": self.open,
+                "checked_out": self.checked_out,
+                "available": max(0, self.open - self.checked_out),
+                "wait_queue": self.waiting,
+                "checkout_failures": self.checkout_failures,
+                "pool_clears": self.pool_clears,
+            }
+
+
+class LoopLagMonitor:
+    """Background ticker measuring how late the event loop wakes it up."""
+
+    def __init__(self, interval: float = 0.5, window: int = 120):
+        self.interval = interval
+        self.samples = deque(maxlen=window)
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - expected))
+
+    def stats(self):
+        if not self.samples:
+            return {"lag_ms": 0.0, "mean_lag_ms": 0.0, "max_lag_ms": 0.0, "samples": 0}
+        return {
+            "lag_ms": round(self.samples[-1] * 1000, 2),
+            "mean_lag_ms": round(sum(self.samples) / len(self.samples) * 1000, 2),
+            "max_lag_ms": round(max(self.samples) * 1000, 2),
+            "samples": len(self.samples),
+        }
+
+
+class CollectionVersions:
+    """Per-collection write counters shared by all workers through Mongo.
+
+    Write endpoints bump the counter of the collection they changed. Each
+    worker keeps a local copy refreshed by a background poll, so ETags can be
+    computed and checked without a database round trip. Writes made by another
+    worker become visible here within one poll interval.
+    """
+
+    def __init__(self, poll_interval: float = 2.0):
+        self.poll_interval = poll_interval
+        self.versions = {}
+        self._task = None
+
+    def get(self, name: str) -> int:
+        return self.versions.get(name, 0)
+
+    async def load(self):
+        docs = await db.collection_versions.find({}).to_list(100)
+        for doc in docs:
+            self.versions[doc['_id']] = max(self.get(doc['_id']), doc.get('version', 0))
+
+    async def bump(self, name: str) -> int:
+        doc = await db.collection_versions.find_one_and_update(
+            {"_id": name},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self.versions[name] = max(self.get(name), doc['version'])
+        return doc['version']
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.load()
+                for cache in entity_caches.values():
+                    if cache.is_stale():
+                        await cache.load()
+            except Exception as exc:
+                logger.warning("Could not refresh collection versions: %s", exc)
+
+
+class EntityCache:
+    """Process-wide, write-through copy of a small and hot collection.
+
+    Loaded during warmup and kept current in place by the write endpoints
+    through ``entity_written``. Writes made by other workers show up as a
+    collection version this copy was not built from, and the version poll then
+    reloads the collection. Readers get shallow copies, so they may mutate them.
+    """
+
+    def __init__(self, collection: str):
+        self.collection = collection
+        self.docs: Dict[str, dict] = {}
+        self.version = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.version is not None
+
+    def is_stale(self) -> bool:
+        return self.loaded and self.version != collection_versions.get(self.collection)
+
+    async def load(self):
+        async with self._lock:
+            await self._load()
+
+    async def _load(self):
+        version = collection_versions.get(self.collection)
+        docs = await db[self.collection].find({}, {"_id": 0}).to_list(None)
+        self.docs = {doc["id"]: doc for doc in docs}
+        self.version = version
+
+    def all(self) -> List[dict]:
+        return [dict(doc) for doc in self.docs.values()]
+
+    def get(self, doc_id: str) -> Optional[dict]:
+        doc = self.docs.get(doc_id)
+        return dict(doc) if doc is not None else None
+
+    async def written(self, version: int, doc_id: Optional[str], doc: Optional[dict], deleted: bool):
+        # Under the lock, so a concurrent reload or write can't interleave with this one
+        async with self._lock:
+            if not self.loaded:
+                return
+            if self.version != version - 1 or (doc_id is None and doc is None):
+                # Another worker wrote in between, or the write touched many documents
+                await self._load()
+                return
+            if deleted:
+                self.docs.pop(doc_id, None)
+            else:
+                if doc is None:
+                    doc = await db[self.collection].find_one({"id": doc_id}, {"_id": 0})
+                if doc is not None:
+                    doc = {k: v for k, v in doc.items() if k != "_id"}
+                    self.docs[doc["id"]] = doc
+            self.version = version
+
+
+class RequestContext:
+    """Per-request state shared by helpers running inside one handler."""
+
+    def __init__(self):
+        self.timings = []
+        self.loaders = {}
+        self.sync_leases = []
+
+
+request_context: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+
+class RequestContextMiddleware:
+    """Installs a RequestContext and reports recorded query timings as Server-Timing."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        # Sub-requests dispatched by /api/batch share the outer request's context
+        context = request_context.get() or RequestContext()
+        token = request_context.set(context)
+
+        async def send_with_timings(message):
+            if message['type'] == 'http.response.start' and context.timings:
+                value = ", ".join(f"{name};dur={elapsed * 1000:.1f}" for name, elapsed in context.timings)
+                message['headers'] = list(message.get('headers', [])) + [(b'server-timing', value.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timings)
+        finally:
+            request_context.reset(token)
+            if context.sync_leases and request_context.get() is None:
+                await release_sync_leases(context.sync_leases)
+
+
+class EntityLoader:
+    """Batches lookups by ``id`` on one collection, DataLoader style.
+
+    Loads started in the same event loop tick are resolved together with a
+    single ``find({"id": {"$in": [...]}})`` and repeated ids share one result.
+    Results stay cached for the rest of the request, so handlers must re-read
+    with ``find_one`` (or call ``clear``) after writing a document.
+    """
+
+    def __init__(self, collection: str):
+        self.collection = collection
+        self._cache: Dict[str, asyncio.Future] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    async def load(self, doc_id: str) -> Optional[dict]:
+        entity_cache = entity_caches.get(self.collection)
+        if entity_cache is not None and doc_id in entity_cache.docs:
+            return entity_cache.get(doc_id)
+        future = self._cache.get(doc_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._cache[doc_id] = future
+            if not self._pending:
+                asyncio.get_running_loop().call_soon(self._schedule_dispatch)
+            self._pending[doc_id] = future
+        doc = await future
+        return dict(doc) if doc is not None else None
+
+    async def load_many(self, doc_ids: List[str]) -> List[Optional[dict]]:
+        return await asyncio.gather(*(self.load(doc_id) for doc_id in doc_ids))
+
+    def clear(self, doc_id: str):
+        self._cache.pop(doc_id, None)
+
+    def _schedule_dispatch(self):
+        asyncio.ensure_future(self._dispatch())
+
+    async def _dispatch(self):
+        batch, self._pending = self._pending, {}
+        try:
+            docs = await db[self.collection].find({"id": {"$in": list(batch)}}, {"_id": 0}).to_list(None)
+        except Exception as exc:
+            for doc_id, future in batch.items():
+                self._cache.pop(doc_id, None)
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        found = {doc["id"]: doc for doc in docs}
+        for doc_id, future in batch.items():
+            if not future.done():
+                future.set_result(found.get(doc_id))
+
+
+def loader(collection: str) -> EntityLoader:
+    """The current request's loader for ``collection`` (a fresh one outside requests)."""
+    context = request_context.get()
+    if context is None:
+        return EntityLoader(collection)
+    if collection not in context.loaders:
+        context.loaders[collection] = EntityLoader(collection)
+    return context.loaders[collection]
+
+
+# Upper bound on reads a single handler runs at once through gather_queries
+QUERY_CONCURRENCY = int(os.environ.get('QUERY_CONCURRENCY', '4'))
+
+
+async def gather_queries(queries: Dict[str, Awaitable], limit: int = QUERY_CONCURRENCY) -> Dict[str, Any]:
+    """Await independent reads concurrently and return their results by name.
+
+    Latency becomes that of the slowest read instead of the sum. At most
+    ``limit`` reads run at once; if one fails the others are cancelled and the
+    error propagates. Each read's duration is recorded for Server-Timing.
+    """
+    semaphore = asyncio.Semaphore(limit)
+    context = request_context.get()
+
+    async def timed(name, awaitable):
+        started = None
+        try:
+            async with semaphore:
+                started = time.perf_counter()
+                return await awaitable
+        finally:
+            if started is None and asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            elif started is not None and context is not None:
+                context.timings.append((name, time.perf_counter() - started))
+
+    tasks = {name: asyncio.ensure_future(timed(name, awaitable)) for name, awaitable in queries.items()}
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+    return {name: task.result() for name, task in tasks.items()}
+
+
+pool_monitor = PoolMonitor()
+loop_lag_monitor = LoopLagMonitor()
+attendance_broker = AttendanceBroker()
+collection_versions = CollectionVersions(float(os.environ.get('VERSION_POLL_SECONDS', '2')))
+entity_caches = {name: EntityCache(name) for name in ("employees", "projects", "contractors")}
+
+
+async def entity_written(collection: str, doc_id: Optional[str] = None, doc: Optional[dict] = None,
+                         deleted: bool = False):
+    """Record a write: bump the collection version and update its entity cache.
+
+    Pass the written document (or its id) for single-document writes; with
+    neither, a cached collection is reloaded.
+    """
+    version = await collection_versions.bump(collection)
+    cache = entity_caches.get(collection)
+    if cache is not None:
+        await cache.written(version, doc_id if doc is None else doc["id"], doc, deleted)
+
+
+async def load_entities(collection: str, active_only: bool = False, projection: Optional[dict] = None) -> List[dict]:
+    """All employees, projects or contractors, from the entity cache when loaded."""
+    cache = entity_caches.get(collection)
+    if cache is not None and cache.loaded:
+        docs = cache.all()
+        return [doc for doc in docs if doc.get("is_active") is True] if active_only else docs
+    query = {"is_active": True} if active_only else {}
+    return await db[collection].find(query, projection or {"_id": 0}).to_list(None)
+
+
+async def load_entities_by_id(collection: str, ids: List[str], projection: Optional[dict] = None) -> List[dict]:
+    """Employees, projects or contractors with the given ids, in the order asked.
+
+    Unknown ids are skipped. Served from the entity cache when loaded,
+    otherwise with a single ``$in`` query.
+    """
+    ids = list(dict.fromkeys(ids))
+    cache = entity_caches.get(collection)
+    if cache is not None and cache.loaded:
+        docs = [cache.get(doc_id) for doc_id in ids]
+    else:
+        found = await db[collection].find({"id": {"$in": ids}}, projection or {"_id": 0}).to_list(None)
+        by_id = {doc["id"]: doc for doc in found}
+        docs = [by_id.get(doc_id) for doc_id in ids]
+    return [doc for doc in docs if doc is not None]
+
+# Readiness thresholds; /api/ready fails above them so the load balancer backs off
+READY_MAX_LOOP_LAG_MS = float(os.environ.get('READY_MAX_LOOP_LAG_MS', '250'))
+READY_MAX_WAIT_QUEUE = int(os.environ.get('READY_MAX_WAIT_QUEUE', '50'))
+
+# Startup tasks (index bootstrap, cache warmup) still running; not ready until empty
+pending_startup = set()
+
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
 
-app = FastAPI()
+
+def mongo_client_options():
+    """Motor client settings, tunable per environment through MONGO_* variables."""
+    options = {
+        "maxPoolSize": int(os.environ.get('MONGO_MAX_POOL_SIZE', '100')),
+        "minPoolSize": int(os.environ.get('MONGO_MIN_POOL_SIZE', '0')),
+    }
+    timeouts = {
+        "connectTimeoutMS": 'MONGO_CONNECT_TIMEOUT_MS',
+        "serverSelectionTimeoutMS": 'MONGO_SERVER_SELECTION_TIMEOUT_MS',
+        "socketTimeoutMS": 'MONGO_SOCKET_TIMEOUT_MS',
+        "waitQueueTimeoutMS": 'MONGO_WAIT_QUEUE_TIMEOUT_MS',
+        "maxIdleTimeMS": 'MONGO_MAX_IDLE_TIME_MS',
+    }
+    for option, env_name in timeouts.items():
+        if os.environ.get(env_name):
+            options[option] = int(os.environ[env_name])
+    # zstd needs the zstandard package and snappy python-snappy; pymongo skips missing ones
+    compressors = os.environ.get('MONGO_COMPRESSORS')
+    if compressors:
+        options["compressors"] = compressors
+    write_concern = os.environ.get('MONGO_WRITE_CONCERN')
+    if write_concern:
+        options["w"] = int(write_concern) if write_concern.isdigit() else write_concern
+    if os.environ.get('MONGO_JOURNAL'):
+        options["journal"] = os.environ['MONGO_JOURNAL'].lower() in ('1', 'true', 'yes')
+    return options
+
+
+MONGO_CLIENT_OPTIONS = mongo_client_options()
+# Connections opened ahead of the first request; defaults to minPoolSize (at least one)
+MONGO_WARM_CONNECTIONS = int(os.environ.get(
+    'MONGO_WARM_CONNECTIONS', max(1, MONGO_CLIENT_OPTIONS["minPoolSize"])
+))
+WARMUP_TIMEOUT_SECONDS = float(os.environ.get('WARMUP_TIMEOUT_SECONDS', '10'))
+
+
+def create_mongo_client():
+    return AsyncIOMotorClient(mongo_url, event_listeners=[pool_monitor], **MONGO_CLIENT_OPTIONS)
+
+
+# Created by the lifespan handler so the client binds to the serving event loop
+client = None
+db = None
+
+# On-demand profiling is only wired in when a token is configured
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN')
+PROFILE_DIR = Path(os.environ.get('PROFILE_DIR', ROOT_DIR / 'profiles'))
+
+# Coroutines run during warmup to preload in-process caches
+warmup_hooks = []
+
+
+def on_warmup(func):
+    warmup_hooks.append(func)
+    return func
+
+
+@on_warmup
+async def load_collection_versions():
+    await collection_versions.load()
+
+
+@on_warmup
+async def backfill_name_words():
+    """Give employees saved before name search existed their ``name_words``."""
+    missing = await db.employees.find({"name_words": {"$exists": False}}, {"_id": 0, "id": 1, "name": 1}).to_list(None)
+    if missing:
+        await db.employees.bulk_write([
+            UpdateOne({"id": employee["id"]}, {"$set": {"name_words": search_words(employee.get("name") or "")}})
+            for employee in missing
+        ], ordered=False)
+
+
+@on_warmup
+async def load_entity_caches():
+    await asyncio.gather(*(cache.load() for cache in entity_caches.values()))
+
+
+async def warm_up():
+    await mongo_ping_ms()
+    # Concurrent pings check out distinct connections, opening them ahead of traffic
+    await asyncio.gather(*(db.command("ping") for _ in range(MONGO_WARM_CONNECTIONS)))
+    for hook in warmup_hooks:
+        await hook()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global client, db, receipt_pool
+    client = create_mongo_client()
+    db = client[os.environ['DB_NAME']]
+    loop_lag_monitor.start()
+    collection_versions.start()
+
+    pending_startup.update({"indexes", "warmup"})
+    background = [
+        asyncio.create_task(run_startup_task("indexes", ensure_indexes())),
+        asyncio.create_task(watch_attendance_changes()),
+        asyncio.create_task(watch_jobs()),
+    ]
+    warmup = asyncio.create_task(run_startup_task("warmup", warm_up()))
+    background.append(warmup)
+    try:
+        await asyncio.wait_for(asyncio.shield(warmup), timeout=WARMUP_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        logger.warning("Warmup still running after %ss, continuing in background", WARMUP_TIMEOUT_SECONDS)
+
+    yield
+
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    await stop_jobs()
+    await collection_versions.stop()
+    await loop_lag_monitor.stop()
+    if receipt_pool is not None:
+        receipt_pool.shutdown(cancel_futures=True)
+        receipt_pool = None
+    client.close()
+
+
+app = FastAPI(lifespan=lifespan)
 api_router = APIRouter(prefix="/api")
 
 
+def canonical_week_start(value: str) -> str:
+    """The Monday (YYYY-MM-DD) of the week containing ``value``."""
+    try:
+        day = date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError("must be a date in YYYY-MM-DD format")
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+
+def week_key(week_start: str) -> int:
+    """Integer key for a week, ISO year * 100 + ISO week (2025-01-06 -> 202502)."""
+    year, week, _ = date.fromisoformat(week_start).isocalendar()
+    return year * 100 + week
+
+
+# Week start dates are normalized to the Monday of their week on the way in
+WeekStart = Annotated[str, AfterValidator(canonical_week_start)]
+
+
+def search_words(name: str) -> List[str]:
+    """Lowercase, accent-free words of a name ("José Pérez" -> ["jose", "perez"])."""
+    folded = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode().lower()
+    return re.findall(r"[a-z0-9]+", folded)
+
+
+# Spanish, ignoring case and accents: how the employees screen sorts names
+NAME_COLLATION = {"locale": "es", "strength": 1}
+EMPLOYEE_SORTS = ("name", "daily_salary", "created_at")
+
+
 class Employee(BaseModel):
     model_config = ConfigDict(extra="ignore")
     
@@ -30,6 +615,7 @@ class Employee(BaseModel):
     project_id: Optional[str] = None
     trade: Optional[str] = None
     created_at: str
+    updated_at: Optional[str] = None
     is_active: bool = True
 
 
@@ -48,6 +634,26 @@ class EmployeeUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 
+class EmployeeFilter(BaseModel):
+    ids: Optional[List[str]] = None
+    trade: Optional[str] = None
+    project_id: Optional[str] = None
+    is_active: Optional[bool] = None
+
+    def query(self) -> dict:
+        query = {name: value for name, value in self.model_dump(exclude={"ids"}).items() if value is not None}
+        if self.ids is not None:
+            query["id"] = {"$in": self.ids}
+        return query
+
+
+class EmployeeBulkUpdate(BaseModel):
+    filter: EmployeeFilter
+    patch: EmployeeUpdate = Field(default_factory=EmployeeUpdate)
+    # Multiplies daily_salary, e.g. 1.1 for a 10% raise
+    salary_factor: Optional[float] = Field(None, gt=0)
+
+
 class Project(BaseModel):
     model_config = ConfigDict(extra="ignore")
     
@@ -57,6 +663,7 @@ class Project(BaseModel):
     start_date: str
     is_active: bool = True
     created_at: str
+    updated_at: Optional[str] = None
 
 
 class ProjectCreate(BaseModel):
@@ -83,6 +690,7 @@ class Contractor(BaseModel):
     total_paid: float = 0.0
     remaining_balance: float = 0.0
     created_at: str
+    updated_at: Optional[str] = None
     is_active: bool = True
 
 
@@ -110,6 +718,7 @@ class Attendance(BaseModel):
     status: str
     late_hours: float = 0.0
     week_start_date: str
+    updated_at: Optional[str] = None
 
 
 class AttendanceCreate(BaseModel):
@@ -117,7 +726,7 @@ class AttendanceCreate(BaseModel):
     date: str
     status: str
     late_hours: float = 0.0
-    week_start_date: str
+    week_start_date: WeekStart
 
 
 class Advance(BaseModel):
@@ -129,6 +738,7 @@ class Advance(BaseModel):
     date: str
     description: Optional[str] = ""
     week_start_date: str
+    updated_at: Optional[str] = None
 
 
 class AdvanceCreate(BaseModel):
@@ -136,7 +746,11 @@ class AdvanceCreate(BaseModel):
     amount: float
     date: str
     description: Optional[str] = ""
-    week_start_date: str
+    week_start_date: WeekStart
+
+
+class AdvanceBulkCreate(BaseModel):
+    advances: List[AdvanceCreate] = Field(min_length=1, max_length=1000)
 
 
 class ContractorCertification(BaseModel):
@@ -148,11 +762,12 @@ class ContractorCertification(BaseModel):
     amount: float
     description: Optional[str] = ""
     created_at: str
+    updated_at: Optional[str] = None
 
 
 class ContractorCertificationCreate(BaseModel):
     contractor_id: str
-    week_start_date: str
+    week_start_date: WeekStart
     amount: float
     description: Optional[str] = ""
 
@@ -168,10 +783,811 @@ class PaymentHistory(BaseModel):
     total_advances: float
     net_payment: float
     paid_at: str
+    updated_at: Optional[str] = None
+
+
+# Collections whose writes are stamped with updated_at/sync_seq and served by /api/sync
+SYNC_COLLECTIONS = [
+    "employees", "projects", "contractors", "attendance",
+    "advances", "certifications", "payment_history",
+]
+
+INDEXES = [
+    ("employees", [("id", ASCENDING)], {"unique": True}),
+    ("employees", [("is_active", ASCENDING)], {}),
+    # Name search matches word prefixes; filtered and sorted listings use the Spanish collation
+    ("employees", [("name_words", ASCENDING)], {}),
+    ("employees", [("name", ASCENDING)], {"collation": NAME_COLLATION}),
+    ("employees", [("daily_salary", ASCENDING)], {"collation": NAME_COLLATION}),
+    ("employees", [("created_at", ASCENDING)], {"collation": NAME_COLLATION}),
+    ("employees", [("project_id", ASCENDING), ("name", ASCENDING)], {"collation": NAME_COLLATION}),
+    ("employees", [("trade", ASCENDING), ("name", ASCENDING)], {"collation": NAME_COLLATION}),
+    ("projects", [("id", ASCENDING)], {"unique": True}),
+    ("contractors", [("id", ASCENDING)], {"unique": True}),
+    ("attendance", [("id", ASCENDING)], {}),
+    ("attendance", [("employee_id", ASCENDING), ("date", ASCENDING)], {}),
+    ("attendance", [("week_start_date", ASCENDING)], {}),
+    ("attendance_weeks", [("employee_id", ASCENDING), ("week_start_date", ASCENDING)], {"unique": True}),
+    ("attendance_weeks", [("week_start_date", ASCENDING)], {}),
+    ("attendance_weeks", [("sync_seq", ASCENDING)], {}),
+    ("advances", [("id", ASCENDING)], {}),
+    ("advances", [("employee_id", ASCENDING)], {}),
+    ("advances", [("week_start_date", ASCENDING)], {}),
+    ("certifications", [("id", ASCENDING)], {}),
+    ("certifications", [("contractor_id", ASCENDING), ("week_start_date", DESCENDING)], {}),
+    ("certifications", [("created_at", DESCENDING)], {}),
+    # Calculations upsert history by id; unique, so concurrent re-runs can't duplicate it
+    ("payment_history", [("id", ASCENDING)], {"unique": True}),
+    ("payment_history", [("paid_at", DESCENDING)], {}),
+    ("payment_history", [("week_start_date", ASCENDING)], {}),
+    ("attendance", [("week_key", ASCENDING), ("employee_id", ASCENDING)], {}),
+    ("attendance_weeks", [("week_key", ASCENDING), ("employee_id", ASCENDING)], {}),
+    ("advances", [("week_key", ASCENDING), ("employee_id", ASCENDING)], {}),
+    ("certifications", [("week_key", ASCENDING), ("contractor_id", ASCENDING)], {}),
+    ("payment_history", [("week_key", ASCENDING), ("employee_id", ASCENDING)], {}),
+    ("tombstones", [("sync_seq", ASCENDING)], {}),
+    ("sync_leases", [("floor", ASCENDING)], {}),
+    ("sync_leases", [("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+    ("jobs", [("id", ASCENDING)], {"unique": True}),
+    ("jobs", [("status", ASCENDING), ("heartbeat_at", ASCENDING)], {}),
+    ("tombstones", [("collection", ASCENDING), ("sync_seq", ASCENDING)], {}),
+] + [(collection, [("sync_seq", ASCENDING)], {}) for collection in SYNC_COLLECTIONS]
+
+
+async def ensure_indexes():
+    for collection, keys, options in INDEXES:
+        try:
+            await db[collection].create_index(keys, **options)
+        except Exception as exc:
+            logger.error("Could not create index %s on %s: %s", keys, collection, exc)
+
+
+# A reservation counts as in flight until released or this old
+SYNC_LEASE_SECONDS = float(os.environ.get('SYNC_LEASE_SECONDS', '60'))
+
+# Highest sync_seq this worker has seen; the counter only grows, so anything
+# reserved later is above it
+sync_seq_seen = 0
+
+
+async def next_sync_seq(count: int = 1) -> int:
+    """Reserve ``count`` values of the global sync sequence and return the last one.
+
+    A lease is recorded in ``sync_leases`` before the counter moves, with a
+    floor no higher than the values about to be reserved, so /api/sync can
+    tell which sequences may still be unwritten. Leases taken during a
+    request are released when the request finishes; other callers run inside
+    ``sync_lease_scope``. Unreleased leases expire after SYNC_LEASE_SECONDS.
+    """
+    global sync_seq_seen
+    from uuid import uuid4
+    lease = uuid4().hex
+    if not sync_seq_seen:
+        # A fresh worker: a floor of 1 would hold every token back for the whole lease
+        counter = await db.counters.find_one({"_id": "sync_seq"}, {"value": 1})
+        sync_seq_seen = counter["value"] if counter else 0
+    expires_at = datetime.now(timezone.utc) + timedelta(seconds=SYNC_LEASE_SECONDS)
+    await db.sync_leases.insert_one({"_id": lease, "floor": sync_seq_seen + 1, "expires_at": expires_at})
+    context = request_context.get()
+    if context is not None:
+        context.sync_leases.append(lease)
+    doc = await db.counters.find_one_and_update(
+        {"_id": "sync_seq"},
+        {"$inc": {"value": count}},
+        projection={"value": 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    sync_seq_seen = max(sync_seq_seen, doc["value"])
+    return doc["value"]
+
+
+async def release_sync_leases(leases: List[str]):
+    """Mark reservations as written; their sequences become visible to sync tokens."""
+    if leases:
+        await db.sync_leases.delete_many({"_id": {"$in": list(leases)}})
+    leases.clear()
+
+
+@asynccontextmanager
+async def sync_lease_scope():
+    """Release the sync leases taken inside the block when it exits.
+
+    For writes outside requests (commands, background jobs), or to release a
+    request's leases before the response ends.
+    """
+    context = request_context.get()
+    token = None
+    if context is None:
+        context = RequestContext()
+        token = request_context.set(context)
+    start = len(context.sync_leases)
+    try:
+        yield
+    finally:
+        leases = context.sync_leases[start:]
+        del context.sync_leases[start:]
+        if token is not None:
+            request_context.reset(token)
+        await release_sync_leases(leases)
+
+
+async def settled_sync_seq(current: int) -> int:
+    """Highest sequence at or below ``current`` with no unwritten reservation below it.
+
+    Read the counter before calling: a writer records its lease before
+    moving the counter, so every reservation counted in ``current`` is either
+    released (written) or visible here. Expired leases (writers that died or
+    never released) are treated as written.
+    """
+    global sync_seq_seen
+    sync_seq_seen = max(sync_seq_seen, current)
+    lease = await db.sync_leases.find_one(
+        {"expires_at": {"$gt": datetime.now(timezone.utc)}}, sort=[("floor", ASCENDING)]
+    )
+    return current if lease is None else min(current, lease["floor"] - 1)
+
+
+async def sync_stamp() -> dict:
+    return {"updated_at": datetime.now(timezone.utc).isoformat(), "sync_seq": await next_sync_seq()}
+
+
+async def record_tombstones(collection: str, ids: List[str]):
+    if not ids:
+        return
+    last_seq = await next_sync_seq(len(ids))
+    deleted_at = datetime.now(timezone.utc).isoformat()
+    await db.tombstones.insert_many([
+        {"collection": collection, "id": doc_id, "sync_seq": last_seq - len(ids) + 1 + i, "deleted_at": deleted_at}
+        for i, doc_id in enumerate(ids)
+    ])
+
+
+def contractor_with_balance(contractor: dict) -> dict:
+    budget = contractor.get('budget', 0)
+    total_paid = contractor.get('total_paid', 0)
+    contractor['budget'] = budget
+    contractor['total_paid'] = total_paid
+    contractor['remaining_balance'] = budget - total_paid
+    if 'project_name' not in contractor:
+        contractor['project_name'] = 'Sin asignar'
+    return contractor
+
+
+def week_range_match(first_key: int, last_key: int) -> dict:
+    return {"$match": {"week_key": {"$gte": first_key, "$lte": last_key}}}
+
+
+def attendance_totals_group(prefix: str, by_week: bool) -> dict:
+    """$group stage summing days worked and late hours per employee (and week).
+
+    ``prefix`` is where status/late_hours live: ``$`` for daily documents,
+    ``$days.`` for unwound buckets.
+    """
+    key = {"employee_id": "$employee_id"}
+    if by_week:
+        key["week_key"] = "$week_key"
+    return {"$group": {
+        "_id": key,
+        "days_worked": {"$sum": {"$cond": [{"$in": [f"{prefix}status", ["present", "late"]]}, 1, 0]}},
+        "late_hours": {"$sum": {"$cond": [
+            {"$eq": [f"{prefix}status", "late"]}, {"$ifNull": [f"{prefix}late_hours", 0]}, 0
+        ]}},
+    }}
+
+
+class DailyAttendanceStore:
+    """Attendance stored as one document per employee per day (``attendance``)."""
+
+    collection = "attendance"
+
+    def flatten(self, docs: List[dict]) -> List[dict]:
+        for record in docs:
+            if 'late_hours' not in record:
+                record['late_hours'] = 0.0
+        return docs
+
+    async def find(self, query: dict, limit: Optional[int] = None) -> List[dict]:
+        return self.flatten(await db.attendance.find(query, {"_id": 0}).to_list(limit))
+
+    async def find_week(self, week_start: str) -> List[dict]:
+        return await self.find({"week_start_date": week_start}, 5000)
+
+    async def week_totals(self, first_key: int, last_key: int, by_week: bool) -> List[dict]:
+        return await db.attendance.aggregate([
+            week_range_match(first_key, last_key),
+            attendance_totals_group("$", by_week),
+        ]).to_list(None)
+
+    async def upsert(self, attendance_dict: dict) -> dict:
+        from uuid import uuid4
+        key = {"employee_id": attendance_dict['employee_id'], "date": attendance_dict['date']}
+        existing = await db.attendance.find_one(key)
+
+        if existing:
+            update_data = {
+                "status": attendance_dict['status'],
+                "late_hours": attendance_dict.get('late_hours', 0.0),
+                # Rewritten too, so records saved with a non-Monday week move to the canonical one
+                "week_start_date": attendance_dict['week_start_date'],
+                "week_key": week_key(attendance_dict['week_start_date']),
+                **await sync_stamp()
+            }
+            await db.attendance.update_one(key, {"$set": update_data})
+            updated = await db.attendance.find_one(key, {"_id": 0})
+            return self.flatten([updated])[0]
+
+        stamp = await sync_stamp()
+        attendance_obj = Attendance(
+            id=str(uuid4()),
+            employee_id=attendance_dict['employee_id'],
+            date=attendance_dict['date'],
+            status=attendance_dict['status'],
+            late_hours=attendance_dict.get('late_hours', 0.0),
+            week_start_date=attendance_dict['week_start_date'],
+            updated_at=stamp['updated_at']
+        )
+        doc = {**attendance_obj.model_dump(), **stamp, "week_key": week_key(attendance_obj.week_start_date)}
+        await db.attendance.insert_one(doc)
+        doc.pop('_id', None)
+        return doc
+
+    async def bulk_upsert(self, records: List[dict]) -> tuple:
+        """Upsert many days in one bulk_write; returns (inserted, updated).
+
+        ``records`` must not repeat an (employee_id, date) pair.
+        """
+        from uuid import uuid4
+        seq = await next_sync_seq(len(records)) - len(records)
+        updated_at = datetime.now(timezone.utc).isoformat()
+        operations = []
+        for record in records:
+            seq += 1
+            operations.append(UpdateOne(
+                {"employee_id": record['employee_id'], "date": record['date']},
+                {
+                    "$set": {
+                        "status": record['status'],
+                        "late_hours": record.get('late_hours', 0.0),
+                        "week_start_date": record['week_start_date'],
+                        "week_key": week_key(record['week_start_date']),
+                        "updated_at": updated_at,
+                        "sync_seq": seq,
+                    },
+                    "$setOnInsert": {"id": str(uuid4())},
+                },
+                upsert=True
+            ))
+        result = await db.attendance.bulk_write(operations, ordered=False)
+        return result.upserted_count, result.matched_count
+
+    async def count_employee_documents(self, employee_id: str) -> int:
+        return await db.attendance.count_documents({"employee_id": employee_id})
+
+    async def delete_employee_batch(self, employee_id: str, limit: int) -> Tuple[int, List[str]]:
+        """Delete up to ``limit`` of the employee's documents; returns (documents, day ids)."""
+        docs = await db.attendance.find({"employee_id": employee_id}, {"_id": 1, "id": 1}).to_list(limit)
+        if docs:
+            await db.attendance.delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}})
+        return len(docs), [doc["id"] for doc in docs if "id" in doc]
+
+
+class BucketedAttendanceStore:
+    """Attendance stored as one document per employee and week (``attendance_weeks``).
+
+    Each bucket holds a ``days`` array of ``{id, date, status, late_hours}``;
+    ``flatten`` turns buckets back into the per-day records the API returns,
+    so routes keep their response shapes under either layout.
+    """
+
+    collection = "attendance_weeks"
+
+    def flatten(self, buckets: List[dict]) -> List[dict]:
+        return [
+            {
+                "id": day["id"],
+                "employee_id": bucket["employee_id"],
+                "date": day["date"],
+                "status": day["status"],
+                "late_hours": day.get("late_hours", 0.0),
+                "week_start_date": bucket["week_start_date"],
+                "updated_at": bucket.get("updated_at"),
+            }
+            for bucket in buckets
+            for day in bucket.get("days", [])
+        ]
+
+    day_fields = ("id", "date", "status", "late_hours")
+
+    async def find(self, query: dict, limit: Optional[int] = None) -> List[dict]:
+        """Per-day records matching ``query``; day filters and ``limit`` run in Mongo."""
+        bucket_query = {k: v for k, v in query.items() if k not in self.day_fields}
+        day_query = {f"days.{k}": v for k, v in query.items() if k in self.day_fields}
+        pipeline = [{"$match": {**bucket_query, **day_query}}, {"$unwind": "$days"}]
+        if day_query:
+            # The first match picks buckets holding a matching day, this one the days
+            pipeline.append({"$match": day_query})
+        if limit:
+            pipeline.append({"$limit": limit})
+        pipeline.append({"$project": {"_id": 0, "employee_id": 1, "week_start_date": 1, "updated_at": 1, "days": 1}})
+        docs = await db.attendance_weeks.aggregate(pipeline).to_list(None)
+        return self.flatten([{**doc, "days": [doc["days"]]} for doc in docs])
+
+    async def find_week(self, week_start: str) -> List[dict]:
+        return await self.find({"week_start_date": week_start})
+
+    async def week_totals(self, first_key: int, last_key: int, by_week: bool) -> List[dict]:
+        return await db.attendance_weeks.aggregate([
+            week_range_match(first_key, last_key),
+            {"$unwind": "$days"},
+            attendance_totals_group("$days.", by_week),
+        ]).to_list(None)
+
+    async def upsert(self, attendance_dict: dict) -> dict:
+        from uuid import uuid4
+        key = {"employee_id": attendance_dict['employee_id'], "week_start_date": attendance_dict['week_start_date']}
+        date = attendance_dict['date']
+        stamp = await sync_stamp()
+        day = {
+            "id": str(uuid4()),
+            "date": date,
+            "status": attendance_dict['status'],
+            "late_hours": attendance_dict.get('late_hours', 0.0),
+        }
+        push = {
+            "$push": {"days": day},
+            "$set": stamp,
+            "$setOnInsert": {
+                "id": f"{key['employee_id']}:{key['week_start_date']}",
+                "week_key": week_key(key['week_start_date']),
+            },
+        }
+        bucket = None
+        while bucket is None:
+            bucket = await db.attendance_weeks.find_one_and_update(
+                {**key, "days.date": date},
+                {"$set": {
+                    "days.$.status": attendance_dict['status'],
+                    "days.$.late_hours": attendance_dict.get('late_hours', 0.0),
+                    **stamp
+                }},
+                projection={"_id": 0},
+                return_document=ReturnDocument.AFTER
+            )
+            if bucket is not None:
+                break
+            try:
+                # Only push into a bucket that still lacks the day, so two
+                # writers racing on a new day can't both append it
+                bucket = await db.attendance_weeks.find_one_and_update(
+                    {**key, "days.date": {"$ne": date}}, push,
+                    projection={"_id": 0}, upsert=True, return_document=ReturnDocument.AFTER
+                )
+            except DuplicateKeyError:
+                # The bucket exists and another writer added the day first:
+                # go back and update it in place
+                bucket = None
+        return next(r for r in self.flatten([bucket]) if r["date"] == date)
+
+    async def bulk_upsert(self, records: List[dict]) -> tuple:
+        """Upsert many days, one $pull + $push pair per bucket; returns (inserted, updated).
+
+        Existing days keep their ids. ``records`` must not repeat an
+        (employee_id, date) pair.
+        """
+        from uuid import uuid4
+        buckets = {}
+        for record in records:
+            buckets.setdefault((record['employee_id'], record['week_start_date']), []).append(record)
+        existing = await db.attendance_weeks.find(
+            {"id": {"$in": [f"{employee_id}:{week}" for employee_id, week in buckets]}},
+            {"_id": 0, "id": 1, "days.id": 1, "days.date": 1}
+        ).to_list(None)
+        day_ids = {(bucket['id'], day['date']): day['id'] for bucket in existing for day in bucket.get('days', [])}
+
+        seq = await next_sync_seq(len(buckets)) - len(buckets)
+        updated_at = datetime.now(timezone.utc).isoformat()
+        operations = []
+        updated = 0
+        for (employee_id, week), days in buckets.items():
+            bucket_id = f"{employee_id}:{week}"
+            key = {"employee_id": employee_id, "week_start_date": week}
+            new_days = []
+            for record in days:
+                day_id = day_ids.get((bucket_id, record['date']))
+                updated += day_id is not None
+                new_days.append({
+                    "id": day_id or str(uuid4()),
+                    "date": record['date'],
+                    "status": record['status'],
+                    "late_hours": record.get('late_hours', 0.0),
+                })
+            seq += 1
+            operations.append(UpdateOne(key, {"$pull": {"days": {"date": {"$in": [d['date'] for d in days]}}}}))
+            operations.append(UpdateOne(
+                key,
+                {
+                    "$push": {"days": {"$each": new_days, "$sort": {"date": 1}}},
+                    "$set": {"updated_at": updated_at, "sync_seq": seq},
+                    "$setOnInsert": {"id": bucket_id, "week_key": week_key(week)},
+                },
+                upsert=True
+            ))
+        # Ordered, so each bucket's $pull runs before its $push
+        await db.attendance_weeks.bulk_write(operations, ordered=True)
+        return len(records) - updated, updated
+
+    async def count_employee_documents(self, employee_id: str) -> int:
+        return await db.attendance_weeks.count_documents({"employee_id": employee_id})
+
+    async def delete_employee_batch(self, employee_id: str, limit: int) -> Tuple[int, List[str]]:
+        """Delete up to ``limit`` of the employee's buckets; returns (buckets, day ids)."""
+        buckets = await db.attendance_weeks.find({"employee_id": employee_id}, {"_id": 1, "days.id": 1}).to_list(limit)
+        if buckets:
+            await db.attendance_weeks.delete_many({"_id": {"$in": [bucket["_id"] for bucket in buckets]}})
+        return len(buckets), [day["id"] for bucket in buckets for day in bucket.get("days", [])]
+
+
+# "daily" keeps one document per employee per day; "bucketed" one per employee-week
+ATTENDANCE_LAYOUT = os.environ.get('ATTENDANCE_LAYOUT', 'daily').lower()
+attendance_store = BucketedAttendanceStore() if ATTENDANCE_LAYOUT == 'bucketed' else DailyAttendanceStore()
+
+
+async def watch_attendance_changes():
+    """Feed the attendance broker from a change stream when running on a replica set."""
+    try:
+        hello = await db.command("hello")
+    except Exception as exc:
+        logger.info("Attendance change stream disabled: %s", exc)
+        return
+    if not hello.get("setName"):
+        logger.info("Attendance change stream disabled: not a replica set")
+        return
+
+    resume_token = None
+    while True:
+        try:
+            async with db[attendance_store.collection].watch(
+                [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}],
+                full_document="updateLookup",
+                resume_after=resume_token
+            ) as stream:
+                attendance_broker.local_publish = False
+                async for change in stream:
+                    resume_token = stream.resume_token
+                    if change.get("fullDocument"):
+                        for record in attendance_store.flatten([change["fullDocument"]]):
+                            attendance_broker.publish(record)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            # Publish locally while the stream is down so this worker's writes still go out
+            attendance_broker.local_publish = True
+            logger.warning("Attendance change stream interrupted: %s", exc)
+            await asyncio.sleep(5)
+
+
+def publish_attendance(records):
+    if attendance_broker.local_publish:
+        for record in records:
+            attendance_broker.publish(record)
+
+
+async def run_startup_task(name: str, coro):
+    pending_startup.add(name)
+    try:
+        await coro
+    except Exception:
+        logger.exception("Startup task %s failed", name)
+    finally:
+        pending_startup.discard(name)
+
+
+JOB_CONCURRENCY = int(os.environ.get('JOB_CONCURRENCY', '2'))
+JOB_HEARTBEAT_SECONDS = float(os.environ.get('JOB_HEARTBEAT_SECONDS', '5'))
+JOB_STALE_SECONDS = float(os.environ.get('JOB_STALE_SECONDS', '30'))
+ACTIVE_JOB_STATUSES = ["queued", "running"]
+
+
+class Job(BaseModel):
+    id: str
+    type: str
+    status: str  # queued, running, done, failed or cancelled
+    params: Dict[str, Any] = Field(default_factory=dict)
+    progress: Dict[str, int] = Field(default_factory=lambda: {"done": 0, "total": 0})
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    # Set once the job writes results it must not stop halfway through; it can't be cancelled after that
+    committed: bool = False
+    created_at: str
+    updated_at: str
+    finished_at: Optional[str] = None
+
+
+class JobCreate(BaseModel):
+    type: str
+    params: Dict[str, Any] = Field(default_factory=dict)
+
+
+class JobRun:
+    """What a job handler gets: the job's parameters and a way to report progress."""
+
+    def __init__(self, job: dict):
+        self.id = job["id"]
+        self.type = job["type"]
+        self.params = job["params"]
+        self.done = 0
+        self.total = 0
+        self.cancelled = False
+        self.committed = False
+        self.task: Optional[asyncio.Task] = None
+
+    async def progress(self, done: int, total: Optional[int] = None):
+        self.done = done
+        if total is not None:
+            self.total = total
+        await db.jobs.update_one({"id": self.id}, {"$set": {
+            "progress": {"done": self.done, "total": self.total},
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }})
+
+    async def commit(self):
+        """Called by a handler before writes that must not stop halfway.
+
+        A cancellation requested earlier stops the job here; once this returns
+        the job can no longer be cancelled and runs to completion.
+        """
+        result = await db.jobs.update_one(
+            {"id": self.id, "cancel_requested": {"$ne": True}}, {"$set": {"committed": True}}
+        )
+        if not result.matched_count:
+            self.cancelled = True
+            raise asyncio.CancelledError
+        self.committed = True
+
+
+# job type -> (handler, model of the parameters a client may start it with, or None for internal jobs)
+job_handlers: Dict[str, Tuple[Callable[[JobRun], Awaitable[dict]], Optional[type]]] = {}
+# Jobs this worker is running or has queued, by id
+running_jobs: Dict[str, JobRun] = {}
+_job_slots: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+
+
+def job_handler(job_type: str, params_model: Optional[type] = None):
+    """Register the coroutine function that runs jobs of ``job_type``; it returns the job's result.
+
+    With a ``params_model`` clients can start the job through ``POST /api/jobs``.
+    A job interrupted by a shutdown or crash runs again from the start, so
+    handlers must be safe to re-run. Cancelling interrupts a handler at any
+    await until it calls ``run.commit()``.
+    """
+    def register(func):
+        job_handlers[job_type] = (func, params_model)
+        return func
+    return register
+
+
+def job_slots() -> asyncio.Semaphore:
+    """The semaphore bounding how many jobs this worker runs at once."""
+    global _job_slots
+    loop = asyncio.get_running_loop()
+    if _job_slots is None or _job_slots[0] is not loop:
+        _job_slots = (loop, asyncio.Semaphore(JOB_CONCURRENCY))
+    return _job_slots[1]
+
+
+def launch_job(job: dict) -> JobRun:
+    run = JobRun(job)
+    running_jobs[run.id] = run
+    run.task = asyncio.create_task(run_job(run))
+    return run
+
+
+async def start_job(job_type: str, params: dict) -> dict:
+    """Record a job and queue it on this worker; returns the job document."""
+    from uuid import uuid4
+    now = datetime.now(timezone.utc).isoformat()
+    job = Job(id=str(uuid4()), type=job_type, status="queued", params=params, created_at=now, updated_at=now)
+    doc = {**job.model_dump(), "heartbeat_at": now}
+    await db.jobs.insert_one(doc)
+    doc.pop("_id", None)
+    launch_job(doc)
+    return doc
+
+
+async def finish_job(job_id: str, update: dict):
+    now = datetime.now(timezone.utc).isoformat()
+    await db.jobs.update_one({"id": job_id}, {"$set": {**update, "updated_at": now, "finished_at": now}})
+
+
+async def run_job(run: JobRun):
+    # Started from a request, the task inherits that request's context: drop
+    # it so the job's sync leases aren't released when the response ends
+    request_context.set(None)
+    update = {"status": "done"}
+    try:
+        async with job_slots():
+            await db.jobs.update_one({"id": run.id}, {"$set": {"status": "running"}})
+            async with sync_lease_scope():
+                update["result"] = await job_handlers[run.type][0](run)
+    except asyncio.CancelledError:
+        if not run.cancelled:
+            # Shutting down: the job stays active and is resumed elsewhere or on the next start
+            raise
+        update = {"status": "cancelled"}
+    except Exception as exc:
+        logger.exception("Job %s (%s) failed", run.id, run.type)
+        update = {"status": "failed", "error": str(exc)}
+    finally:
+        running_jobs.pop(run.id, None)
+    await finish_job(run.id, update)
+
+
+async def cancel_local_job(job_id: str) -> bool:
+    """Cancel the job if this worker runs it, and wait for it to stop."""
+    run = running_jobs.get(job_id)
+    if run is None or run.committed:
+        return False
+    run.cancelled = True
+    run.task.cancel()
+    await asyncio.gather(run.task, return_exceptions=True)
+    if running_jobs.pop(job_id, None) is not None:
+        # Cancelled before its task started, so run_job never recorded it
+        await finish_job(job_id, {"status": "cancelled"})
+    return True
+
+
+async def beat_jobs():
+    """Refresh the heartbeat of this worker's jobs and apply cancellations made on other workers."""
+    if not running_jobs:
+        return
+    ids = list(running_jobs)
+    await db.jobs.update_many(
+        {"id": {"$in": ids}}, {"$set": {"heartbeat_at": datetime.now(timezone.utc).isoformat()}}
+    )
+    for job in await db.jobs.find({"id": {"$in": ids}, "cancel_requested": True}, {"_id": 0, "id": 1}).to_list(None):
+        await cancel_local_job(job["id"])
+
+
+async def resume_stale_jobs():
+    """Take over active jobs whose worker stopped sending heartbeats."""
+    now = datetime.now(timezone.utc)
+    query = {
+        "status": {"$in": ACTIVE_JOB_STATUSES},
+        "heartbeat_at": {"$lt": (now - timedelta(seconds=JOB_STALE_SECONDS)).isoformat()},
+        "id": {"$nin": list(running_jobs)},
+    }
+    # Claiming refreshes the heartbeat, so each job is taken by one worker only
+    while job := await db.jobs.find_one_and_update(
+        query, {"$set": {"heartbeat_at": now.isoformat()}}, projection={"_id": 0}
+    ):
+        if job.get("cancel_requested"):
+            await finish_job(job["id"], {"status": "cancelled"})
+        elif job["type"] not in job_handlers:
+            await finish_job(job["id"], {"status": "failed", "error": f"Unknown job type {job['type']}"})
+        else:
+            logger.info("Resuming job %s (%s)", job["id"], job["type"])
+            launch_job(job)
+
+
+async def watch_jobs():
+    while True:
+        try:
+            await beat_jobs()
+            await resume_stale_jobs()
+        except Exception as exc:
+            logger.warning("Could not check jobs: %s", exc)
+        await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+
+
+async def stop_jobs():
+    runs = list(running_jobs.values())
+    for run in runs:
+        run.task.cancel()
+    await asyncio.gather(*(run.task for run in runs), return_exceptions=True)
+    running_jobs.clear()
+    if runs:
+        # Mark them stale so the next worker to check resumes them right away
+        await db.jobs.update_many({"id": {"$in": [run.id for run in runs]}}, {"$set": {"heartbeat_at": ""}})
+
+
+CASCADE_BATCH_SIZE = int(os.environ.get('CASCADE_BATCH_SIZE', '1000'))
+
+
+async def delete_in_batches(run: JobRun, collection: str, query: dict) -> int:
+    """Delete the matching documents ``CASCADE_BATCH_SIZE`` at a time, recording tombstones."""
+    deleted = 0
+    while docs := await db[collection].find(query, {"_id": 1, "id": 1}).to_list(CASCADE_BATCH_SIZE):
+        await db[collection].delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}})
+        await record_tombstones(collection, [doc["id"] for doc in docs if "id" in doc])
+        deleted += len(docs)
+        await run.progress(run.done + len(docs))
+    return deleted
+
+
+@job_handler("cascade_delete")
+async def cascade_delete(run: JobRun) -> dict:
+    """Remove what referenced a deleted employee, contractor or project."""
+    collection, parent_id = run.params["collection"], run.params["id"]
+    if collection == "employees":
+        query = {"employee_id": parent_id}
+        await run.progress(0, await attendance_store.count_employee_documents(parent_id)
+                           + await db.advances.count_documents(query))
+        attendance = 0
+        while True:
+            documents, day_ids = await attendance_store.delete_employee_batch(parent_id, CASCADE_BATCH_SIZE)
+            if not documents:
+                break
+            await record_tombstones("attendance", day_ids)
+            attendance += len(day_ids)
+            await run.progress(run.done + documents)
+        return {"attendance": attendance, "advances": await delete_in_batches(run, "advances", query)}
+    if collection == "contractors":
+        query = {"contractor_id": parent_id}
+        await run.progress(0, await db.certifications.count_documents(query))
+        return {"certifications": await delete_in_batches(run, "certifications", query)}
+    # Employees stay, unassigned from the project
+    result = await db.employees.update_many(
+        {"project_id": parent_id}, {"$set": {"project_id": None, **await sync_stamp()}}
+    )
+    if result.modified_count:
+        await entity_written("employees")
+    await run.progress(result.modified_count, result.modified_count)
+    return {"employees_unassigned": result.modified_count}
+
+
+async def mongo_ping_ms():
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(db.command("ping"), timeout=2.0)
+    except Exception as exc:
+        logger.warning("Mongo ping failed: %s", exc)
+        return None
+    return round((time.perf_counter() - started) * 1000, 2)
 
 
 class PaymentCalculation(BaseModel):
-    week_start_date: str
+    week_start_date: WeekStart
+
+
+Multiplier = Annotated[float, Field(gt=0)]
+
+
+class PayrollScenario(BaseModel):
+    name: str
+    salary_multiplier: Multiplier = 1.0
+    trade_multipliers: Dict[str, Multiplier] = Field(default_factory=dict)
+    project_multipliers: Dict[str, Multiplier] = Field(default_factory=dict)
+    late_hour_rate: float = Field(1.0, ge=0)
+    contractor_payments: Dict[str, Annotated[float, Field(ge=0)]] = Field(default_factory=dict)
+
+
+class PayrollSimulation(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    from_week: Optional[WeekStart] = Field(None, alias="from")
+    to_week: Optional[WeekStart] = Field(None, alias="to")
+    scenarios: List[PayrollScenario] = Field(min_length=1, max_length=100)
+
+
+class BatchSubRequest(BaseModel):
+    id: Optional[str] = None
+    path: str
+    params: Dict[str, Any] = Field(default_factory=dict)
+    headers: Dict[str, str] = Field(default_factory=dict)
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchSubRequest]
+
+
+LOOKUP_MAX_IDS = 1000
+
+
+class EntityLookup(BaseModel):
+    ids: List[str] = Field(min_length=1, max_length=LOOKUP_MAX_IDS)
+    fields: Optional[List[str]] = None
 
 
 class DashboardStats(BaseModel):
@@ -186,6 +1602,156 @@ class DashboardStats(BaseModel):
     total_to_pay_friday: float
 
 
+# Opt-in: list endpoints skip response_model revalidation for our own documents
+FAST_JSON_RESPONSES = os.environ.get('FAST_JSON_RESPONSES', '').lower() in ('1', 'true', 'yes')
+FastJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+# model -> [(field name, default or _NO_DEFAULT, whether the field is a float)]
+_model_defaults = {}
+_NO_DEFAULT = object()
+
+
+def trusted_rows(model, docs, names: Optional[List[str]] = None):
+    """Shape documents like ``model`` would, without validating them.
+
+    Only used for documents read back from our own collections, which were
+    validated on the way in. Missing fields that have a default get it, ints
+    stored in float fields are serialized as floats and extra keys are
+    dropped, so the output matches the declared schema. With ``names`` only
+    those fields are kept.
+    """
+    if model not in _model_defaults:
+        _model_defaults[model] = [
+            (
+                name,
+                _NO_DEFAULT if field.is_required() else field.get_default(call_default_factory=True),
+                field.annotation is float or float in get_args(field.annotation),
+            )
+            for name, field in model.model_fields.items()
+        ]
+    fields = _model_defaults[model]
+    if names is not None:
+        fields = [field for field in fields if field[0] in names]
+    rows = []
+    for doc in docs:
+        row = {}
+        for name, default, is_float in fields:
+            value = doc.get(name, default)
+            if value is _NO_DEFAULT:
+                continue
+            if is_float and type(value) is int:
+                value = float(value)
+            row[name] = value
+        rows.append(row)
+    return rows
+
+
+@lru_cache(maxsize=256)
+def trimmed_adapter(model, names: Tuple[str, ...]) -> TypeAdapter:
+    """Validator for lists of ``model`` reduced to ``names``, built once per selection."""
+    trimmed = create_model(
+        f"{model.__name__}Fields",
+        __config__=ConfigDict(extra="ignore"),
+        **{name: (model.model_fields[name].annotation, model.model_fields[name]) for name in names}
+    )
+    return TypeAdapter(List[trimmed])
+
+
+def sparse_rows(model, docs, names: List[str]) -> List[dict]:
+    if FAST_JSON_RESPONSES:
+        return trusted_rows(model, docs, names)
+    adapter = trimmed_adapter(model, tuple(names))
+    return adapter.dump_python(adapter.validate_python(docs), mode="json")
+
+
+def list_response(model, docs, names: Optional[List[str]] = None):
+    """``docs`` as a response of ``model``; with ``names``, only those fields."""
+    if names is not None:
+        return FastJSONResponse(sparse_rows(model, docs, names))
+    if not FAST_JSON_RESPONSES:
+        return docs
+    return FastJSONResponse(trusted_rows(model, docs))
+
+
+def item_response(model, doc, names: Optional[List[str]] = None):
+    if names is None:
+        return doc
+    return FastJSONResponse(sparse_rows(model, [doc], names)[0])
+
+
+# Response fields computed from stored ones, which a projection must then fetch
+DERIVED_FIELDS = {"remaining_balance": ("budget", "total_paid")}
+
+
+def field_names(model, fields: Optional[List[str]]) -> Optional[List[str]]:
+    """Validated response fields of ``model`` to keep (``id`` always), or None for all."""
+    if not fields:
+        return None
+    unknown = [name for name in fields if name not in model.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    wanted = {"id", *fields}
+    return [name for name in model.model_fields if name in wanted]
+
+
+def parse_fields(model, fields: Optional[str]) -> Optional[List[str]]:
+    """The ``fields=a,b`` query parameter checked against ``model``."""
+    if fields is None:
+        return None
+    return field_names(model, [name for name in (part.strip() for part in fields.split(",")) if name])
+
+
+def mongo_projection(names: Optional[List[str]]) -> dict:
+    projection = {"_id": 0}
+    for name in names or ():
+        projection[name] = 1
+        for source in DERIVED_FIELDS.get(name, ()):
+            projection[source] = 1
+    return projection
+
+
+def split_ids(ids: str) -> List[str]:
+    id_list = [doc_id for doc_id in (part.strip() for part in ids.split(",")) if doc_id]
+    if len(id_list) > LOOKUP_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {LOOKUP_MAX_IDS} ids per request")
+    return id_list
+
+
+async def lookup_response(collection: str, model, ids: List[str], names: Optional[List[str]] = None):
+    """The documents with ``ids`` as a list response, trimmed to ``names`` when given."""
+    docs = await load_entities_by_id(collection, ids, mongo_projection(names))
+    if collection == "contractors":
+        for doc in docs:
+            contractor_with_balance(doc)
+    return list_response(model, docs, names)
+
+
+def collection_etag(request: Request, collection: str) -> str:
+    tag = f"{collection}-{collection_versions.get(collection)}"
+    if request.url.query:
+        tag += "-" + hashlib.sha1(request.url.query.encode()).hexdigest()[:12]
+    return f'"{tag}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [c.strip().removeprefix("W/") for c in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def with_etag(result, response: Response, etag: str):
+    target = result if isinstance(result, Response) else response
+    target.headers["ETag"] = etag
+    target.headers["Cache-Control"] = "no-cache"
+    return result
+
+
 @api_router.get("/")
 async def root():
     return {"message": "PayrollPro API"}
@@ -195,6 +1761,7 @@ async def root():
 async def create_employee(employee: EmployeeCreate):
     from uuid import uuid4
     employee_dict = employee.model_dump()
+    stamp = await sync_stamp()
     employee_obj = Employee(
         id=str(uuid4()),
         name=employee_dict['name'],
@@ -202,25 +1769,84 @@ async def create_employee(employee: EmployeeCreate):
         project_id=employee_dict.get('project_id'),
         trade=employee_dict.get('trade'),
         created_at=datetime.now(timezone.utc).isoformat(),
+        updated_at=stamp['updated_at'],
         is_active=True
     )
-    doc = employee_obj.model_dump()
+    doc = {**employee_obj.model_dump(), **stamp, "name_words": search_words(employee_obj.name)}
     await db.employees.insert_one(doc)
+    await entity_written("employees", doc=doc)
     return employee_obj
 
 
 @api_router.get("/employees", response_model=List[Employee])
-async def get_employees():
-    employees = await db.employees.find({}, {"_id": 0}).to_list(1000)
-    return employees
+async def get_employees(
+    request: Request,
+    response: Response,
+    q: Optional[str] = None,
+    project_id: Optional[str] = None,
+    trade: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    sort: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=5000),
+    ids: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """Employees, optionally filtered and sorted in Mongo.
+
+    ``q`` matches the start of words in the name, ignoring case and accents
+    ("jo pe" finds "José Pérez"); ``trade`` and ``project_id`` match whole
+    values, also ignoring case and accents. ``sort`` is name, daily_salary or
+    created_at, prefixed with ``-`` for descending. ``ids`` (comma separated) alone returns
+    those employees in the order given. ``fields=id,name`` trims every record
+    to those fields.
+    """
+    etag = collection_etag(request, "employees")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    names = parse_fields(Employee, fields)
+    id_list = split_ids(ids) if ids is not None else None
+    if q is None and project_id is None and trade is None and is_active is None and sort is None and limit is None:
+        if id_list is not None:
+            return with_etag(await lookup_response("employees", Employee, id_list, names), response, etag)
+        employees = await load_entities("employees", projection=mongo_projection(names))
+        return with_etag(list_response(Employee, employees, names), response, etag)
+
+    field = (sort or "name").removeprefix("-")
+    if field not in EMPLOYEE_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(EMPLOYEE_SORTS)}")
+    direction = DESCENDING if (sort or "").startswith("-") else ASCENDING
+    query = {
+        name: value for name, value in
+        (("project_id", project_id), ("trade", trade), ("is_active", is_active)) if value is not None
+    }
+    if id_list is not None:
+        query["id"] = {"$in": id_list}
+    words = search_words(q or "")
+    if words:
+        query["$and"] = [{"name_words": {"$regex": f"^{re.escape(word)}"}} for word in words]
+    # Every sort runs under the collation, so trade=albanil matches "Albañil" whatever the order
+    cursor = db.employees.find(query, mongo_projection(names), collation=NAME_COLLATION).sort(
+        [(field, direction), ("id", ASCENDING)]
+    )
+    if limit is not None:
+        cursor = cursor.limit(limit)
+    employees = await cursor.to_list(None)
+    return with_etag(list_response(Employee, employees, names), response, etag)
+
+
+@api_router.post("/employees/lookup", response_model=List[Employee])
+async def lookup_employees(lookup: EntityLookup):
+    """Employees with the given ids (unknown ids skipped), optionally trimmed to ``fields``."""
+    return await lookup_response("employees", Employee, lookup.ids, field_names(Employee, lookup.fields))
 
 
 @api_router.get("/employees/{employee_id}", response_model=Employee)
-async def get_employee(employee_id: str):
-    employee = await db.employees.find_one({"id": employee_id}, {"_id": 0})
+async def get_employee(employee_id: str, fields: Optional[str] = None):
+    names = parse_fields(Employee, fields)
+    employee = await loader("employees").load(employee_id)
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
-    return employee
+    return item_response(Employee, employee, names)
 
 
 @api_router.put("/employees/{employee_id}", response_model=Employee)
@@ -231,49 +1857,104 @@ async def update_employee(employee_id: str, update_data: EmployeeUpdate):
     
     update_dict = {k: v for k, v in update_data.model_dump().items() if v is not None}
     if update_dict:
+        update_dict.update(await sync_stamp())
+        if "name" in update_dict:
+            update_dict["name_words"] = search_words(update_dict["name"])
         await db.employees.update_one({"id": employee_id}, {"$set": update_dict})
     
     updated_employee = await db.employees.find_one({"id": employee_id}, {"_id": 0})
+    if update_dict:
+        await entity_written("employees", doc=updated_employee)
     return updated_employee
 
 
+@api_router.post("/employees/bulk-update")
+async def bulk_update_employees(bulk: EmployeeBulkUpdate):
+    """Apply one patch to every employee matching the filter, as a single update_many."""
+    query = bulk.filter.query()
+    if not query:
+        raise HTTPException(status_code=400, detail="filter must name ids, trade, project_id or is_active")
+    patch = {k: v for k, v in bulk.patch.model_dump().items() if v is not None}
+    if bulk.salary_factor is not None and "daily_salary" in patch:
+        raise HTTPException(status_code=400, detail="Use either patch.daily_salary or salary_factor")
+    if not patch and bulk.salary_factor is None:
+        raise HTTPException(status_code=400, detail="Nothing to update")
+
+    fields = {**patch, **await sync_stamp()}
+    if "name" in fields:
+        fields["name_words"] = search_words(fields["name"])
+    if bulk.salary_factor is None:
+        update = {"$set": fields}
+    else:
+        # Pipeline update so each salary is scaled from its stored value;
+        # $literal keeps patch strings from being read as field paths
+        update = [{"$set": {
+            **{name: {"$literal": value} for name, value in fields.items()},
+            "daily_salary": {"$multiply": ["$daily_salary", bulk.salary_factor]},
+        }}]
+    result = await db.employees.update_many(query, update)
+    if result.modified_count:
+        await entity_written("employees")
+    return {"matched": result.matched_count, "modified": result.modified_count}
+
+
 @api_router.delete("/employees/{employee_id}")
 async def delete_employee(employee_id: str):
     result = await db.employees.delete_one({"id": employee_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Employee not found")
-    return {"message": "Employee deleted successfully"}
+    await record_tombstones("employees", [employee_id])
+    await entity_written("employees", employee_id, deleted=True)
+    job = await start_job("cascade_delete", {"collection": "employees", "id": employee_id})
+    return {"message": "Employee deleted successfully", "job_id": job["id"]}
 
 
 @api_router.post("/projects", response_model=Project)
 async def create_project(project: ProjectCreate):
     from uuid import uuid4
     project_dict = project.model_dump()
+    stamp = await sync_stamp()
     project_obj = Project(
         id=str(uuid4()),
         name=project_dict['name'],
         description=project_dict.get('description', ''),
         start_date=project_dict['start_date'],
         is_active=True,
-        created_at=datetime.now(timezone.utc).isoformat()
+        created_at=datetime.now(timezone.utc).isoformat(),
+        updated_at=stamp['updated_at']
     )
-    doc = project_obj.model_dump()
+    doc = {**project_obj.model_dump(), **stamp}
     await db.projects.insert_one(doc)
+    await entity_written("projects", doc=doc)
     return project_obj
 
 
 @api_router.get("/projects", response_model=List[Project])
-async def get_projects():
-    projects = await db.projects.find({}, {"_id": 0}).to_list(1000)
-    return projects
+async def get_projects(request: Request, response: Response, ids: Optional[str] = None,
+                       fields: Optional[str] = None):
+    etag = collection_etag(request, "projects")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    names = parse_fields(Project, fields)
+    if ids is not None:
+        return with_etag(await lookup_response("projects", Project, split_ids(ids), names), response, etag)
+    projects = await load_entities("projects", projection=mongo_projection(names))
+    return with_etag(list_response(Project, projects, names), response, etag)
+
+
+@api_router.post("/projects/lookup", response_model=List[Project])
+async def lookup_projects(lookup: EntityLookup):
+    """Projects with the given ids (unknown ids skipped), optionally trimmed to ``fields``."""
+    return await lookup_response("projects", Project, lookup.ids, field_names(Project, lookup.fields))
 
 
 @api_router.get("/projects/{project_id}", response_model=Project)
-async def get_project(project_id: str):
-    project = await db.projects.find_one({"id": project_id}, {"_id": 0})
+async def get_project(project_id: str, fields: Optional[str] = None):
+    names = parse_fields(Project, fields)
+    project = await loader("projects").load(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    return project
+    return item_response(Project, project, names)
 
 
 @api_router.put("/projects/{project_id}", response_model=Project)
@@ -284,9 +1965,12 @@ async def update_project(project_id: str, update_data: ProjectUpdate):
     
     update_dict = {k: v for k, v in update_data.model_dump().items() if v is not None}
     if update_dict:
+        update_dict.update(await sync_stamp())
         await db.projects.update_one({"id": project_id}, {"$set": update_dict})
     
     updated_project = await db.projects.find_one({"id": project_id}, {"_id": 0})
+    if update_dict:
+        await entity_written("projects", doc=updated_project)
     return updated_project
 
 
@@ -295,13 +1979,17 @@ async def delete_project(project_id: str):
     result = await db.projects.delete_one({"id": project_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Project not found")
-    return {"message": "Project deleted successfully"}
+    await record_tombstones("projects", [project_id])
+    await entity_written("projects", project_id, deleted=True)
+    job = await start_job("cascade_delete", {"collection": "projects", "id": project_id})
+    return {"message": "Project deleted successfully", "job_id": job["id"]}
 
 
 @api_router.post("/contractors", response_model=Contractor)
 async def create_contractor(contractor: ContractorCreate):
     from uuid import uuid4
     contractor_dict = contractor.model_dump()
+    stamp = await sync_stamp()
     contractor_obj = Contractor(
         id=str(uuid4()),
         name=contractor_dict['name'],
@@ -311,40 +1999,43 @@ async def create_contractor(contractor: ContractorCreate):
         total_paid=0.0,
         remaining_balance=contractor_dict['budget'],
         created_at=datetime.now(timezone.utc).isoformat(),
+        updated_at=stamp['updated_at'],
         is_active=True
     )
-    doc = contractor_obj.model_dump()
+    doc = {**contractor_obj.model_dump(), **stamp}
     await db.contractors.insert_one(doc)
+    await entity_written("contractors", doc=doc)
     return contractor_obj
 
 
 @api_router.get("/contractors", response_model=List[Contractor])
-async def get_contractors():
-    contractors = await db.contractors.find({}, {"_id": 0}).to_list(1000)
+async def get_contractors(request: Request, response: Response, ids: Optional[str] = None,
+                          fields: Optional[str] = None):
+    etag = collection_etag(request, "contractors")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    names = parse_fields(Contractor, fields)
+    if ids is not None:
+        return with_etag(await lookup_response("contractors", Contractor, split_ids(ids), names), response, etag)
+    contractors = await load_entities("contractors", projection=mongo_projection(names))
     for contractor in contractors:
-        budget = contractor.get('budget', 0)
-        total_paid = contractor.get('total_paid', 0)
-        contractor['budget'] = budget
-        contractor['total_paid'] = total_paid
-        contractor['remaining_balance'] = budget - total_paid
-        if 'project_name' not in contractor:
-            contractor['project_name'] = 'Sin asignar'
-    return contractors
+        contractor_with_balance(contractor)
+    return with_etag(list_response(Contractor, contractors, names), response, etag)
+
+
+@api_router.post("/contractors/lookup", response_model=List[Contractor])
+async def lookup_contractors(lookup: EntityLookup):
+    """Contractors with the given ids (unknown ids skipped), optionally trimmed to ``fields``."""
+    return await lookup_response("contractors", Contractor, lookup.ids, field_names(Contractor, lookup.fields))
 
 
 @api_router.get("/contractors/{contractor_id}", response_model=Contractor)
-async def get_contractor(contractor_id: str):
-    contractor = await db.contractors.find_one({"id": contractor_id}, {"_id": 0})
+async def get_contractor(contractor_id: str, fields: Optional[str] = None):
+    names = parse_fields(Contractor, fields)
+    contractor = await loader("contractors").load(contractor_id)
     if not contractor:
         raise HTTPException(status_code=404, detail="Contractor not found")
-    budget = contractor.get('budget', 0)
-    total_paid = contractor.get('total_paid', 0)
-    contractor['budget'] = budget
-    contractor['total_paid'] = total_paid
-    contractor['remaining_balance'] = budget - total_paid
-    if 'project_name' not in contractor:
-        contractor['project_name'] = 'Sin asignar'
-    return contractor
+    return item_response(Contractor, contractor_with_balance(contractor), names)
 
 
 @api_router.put("/contractors/{contractor_id}", response_model=Contractor)
@@ -355,17 +2046,13 @@ async def update_contractor(contractor_id: str, update_data: ContractorUpdate):
     
     update_dict = {k: v for k, v in update_data.model_dump().items() if v is not None}
     if update_dict:
+        update_dict.update(await sync_stamp())
         await db.contractors.update_one({"id": contractor_id}, {"$set": update_dict})
     
     updated_contractor = await db.contractors.find_one({"id": contractor_id}, {"_id": 0})
-    budget = updated_contractor.get('budget', 0)
-    total_paid = updated_contractor.get('total_paid', 0)
-    updated_contractor['budget'] = budget
-    updated_contractor['total_paid'] = total_paid
-    updated_contractor['remaining_balance'] = budget - total_paid
-    if 'project_name' not in updated_contractor:
-        updated_contractor['project_name'] = 'Sin asignar'
-    return updated_contractor
+    if update_dict:
+        await entity_written("contractors", doc=updated_contractor)
+    return contractor_with_balance(updated_contractor)
 
 
 @api_router.delete("/contractors/{contractor_id}")
@@ -373,94 +2060,123 @@ async def delete_contractor(contractor_id: str):
     result = await db.contractors.delete_one({"id": contractor_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Contractor not found")
-    return {"message": "Contractor deleted successfully"}
+    await record_tombstones("contractors", [contractor_id])
+    await entity_written("contractors", contractor_id, deleted=True)
+    job = await start_job("cascade_delete", {"collection": "contractors", "id": contractor_id})
+    return {"message": "Contractor deleted successfully", "job_id": job["id"]}
 
 
 @api_router.post("/attendance", response_model=Attendance)
 async def create_attendance(attendance: AttendanceCreate):
-    from uuid import uuid4
-    attendance_dict = attendance.model_dump()
-    
-    existing = await db.attendance.find_one({
-        "employee_id": attendance_dict['employee_id'],
-        "date": attendance_dict['date']
-    })
-    
-    if existing:
-        update_data = {
-            "status": attendance_dict['status'],
-            "late_hours": attendance_dict.get('late_hours', 0.0)
-        }
-        await db.attendance.update_one(
-            {"employee_id": attendance_dict['employee_id'], "date": attendance_dict['date']},
-            {"$set": update_data}
-        )
-        updated = await db.attendance.find_one(
-            {"employee_id": attendance_dict['employee_id'], "date": attendance_dict['date']},
-            {"_id": 0}
-        )
-        if 'late_hours' not in updated:
-            updated['late_hours'] = 0.0
-        return updated
-    
-    attendance_obj = Attendance(
-        id=str(uuid4()),
-        employee_id=attendance_dict['employee_id'],
-        date=attendance_dict['date'],
-        status=attendance_dict['status'],
-        late_hours=attendance_dict.get('late_hours', 0.0),
-        week_start_date=attendance_dict['week_start_date']
-    )
-    doc = attendance_obj.model_dump()
-    await db.attendance.insert_one(doc)
-    return attendance_obj
+    record = await attendance_store.upsert(attendance.model_dump())
+    publish_attendance([record])
+    return record
 
 
 @api_router.get("/attendance", response_model=List[Attendance])
-async def get_attendance():
-    attendance = await db.attendance.find({}, {"_id": 0}).to_list(5000)
-    for record in attendance:
-        if 'late_hours' not in record:
-            record['late_hours'] = 0.0
-    return attendance
+async def get_attendance(fields: Optional[str] = None):
+    names = parse_fields(Attendance, fields)
+    attendance = await attendance_store.find({}, 5000)
+    return list_response(Attendance, attendance, names)
 
 
 @api_router.get("/attendance/week/{week_start}", response_model=List[Attendance])
-async def get_week_attendance(week_start: str):
-    attendance = await db.attendance.find({"week_start_date": week_start}, {"_id": 0}).to_list(5000)
-    for record in attendance:
-        if 'late_hours' not in record:
-            record['late_hours'] = 0.0
-    return attendance
+async def get_week_attendance(week_start: WeekStart, fields: Optional[str] = None):
+    names = parse_fields(Attendance, fields)
+    attendance = await attendance_store.find_week(week_start)
+    return list_response(Attendance, attendance, names)
+
+
+@api_router.get("/attendance/week/{week_start}/stream")
+async def stream_week_attendance(week_start: WeekStart, request: Request):
+    """Server-Sent Events with attendance deltas for one week.
+
+    Each ``attendance`` event carries one changed record. A ``resync`` event
+    means the client fell behind and should refetch the week.
+    """
+    queue = attendance_broker.subscribe(week_start)
+
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    delta = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if delta is None:
+                    yield "event: resync\ndata: {}\n\n"
+                else:
+                    yield f"event: attendance\ndata: {json.dumps(delta, separators=(',', ':'))}\n\n"
+        finally:
+            attendance_broker.unsubscribe(week_start, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @api_router.post("/advances", response_model=Advance)
 async def create_advance(advance: AdvanceCreate):
     from uuid import uuid4
     advance_dict = advance.model_dump()
+    stamp = await sync_stamp()
     advance_obj = Advance(
         id=str(uuid4()),
         employee_id=advance_dict['employee_id'],
         amount=advance_dict['amount'],
         date=advance_dict['date'],
         description=advance_dict.get('description', ''),
-        week_start_date=advance_dict['week_start_date']
+        week_start_date=advance_dict['week_start_date'],
+        updated_at=stamp['updated_at']
     )
-    doc = advance_obj.model_dump()
+    doc = {**advance_obj.model_dump(), **stamp, "week_key": week_key(advance_obj.week_start_date)}
     await db.advances.insert_one(doc)
     return advance_obj
 
 
+@api_router.post("/advances/bulk")
+async def create_advances(bulk: AdvanceBulkCreate):
+    """Create many advances with one insert_many, e.g. a payday round of advances."""
+    from uuid import uuid4
+    employee_ids = list({advance.employee_id for advance in bulk.advances})
+    found = await loader("employees").load_many(employee_ids)
+    unknown = [employee_id for employee_id, employee in zip(employee_ids, found) if employee is None]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown employees: {', '.join(sorted(unknown))}")
+
+    count = len(bulk.advances)
+    first_seq = await next_sync_seq(count) - count + 1
+    updated_at = datetime.now(timezone.utc).isoformat()
+    docs = [
+        {
+            **advance.model_dump(),
+            "id": str(uuid4()),
+            "updated_at": updated_at,
+            "sync_seq": first_seq + i,
+            "week_key": week_key(advance.week_start_date),
+        }
+        for i, advance in enumerate(bulk.advances)
+    ]
+    await db.advances.insert_many(docs)
+    return {"inserted": count, "ids": [doc["id"] for doc in docs]}
+
+
 @api_router.get("/advances", response_model=List[Advance])
-async def get_advances():
-    advances = await db.advances.find({}, {"_id": 0}).to_list(5000)
-    return advances
+async def get_advances(fields: Optional[str] = None):
+    names = parse_fields(Advance, fields)
+    advances = await db.advances.find({}, mongo_projection(names)).to_list(5000)
+    return list_response(Advance, advances, names)
 
 
 @api_router.get("/advances/employee/{employee_id}", response_model=List[Advance])
-async def get_employee_advances(employee_id: str):
-    advances = await db.advances.find({"employee_id": employee_id}, {"_id": 0}).to_list(1000)
-    return advances
+async def get_employee_advances(employee_id: str, fields: Optional[str] = None):
+    names = parse_fields(Advance, fields)
+    advances = await db.advances.find({"employee_id": employee_id}, mongo_projection(names)).to_list(1000)
+    return list_response(Advance, advances, names)
 
 
 @api_router.delete("/advances/{advance_id}")
@@ -468,21 +2184,41 @@ async def delete_advance(advance_id: str):
     result = await db.advances.delete_one({"id": advance_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Advance not found")
+    await record_tombstones("advances", [advance_id])
     return {"message": "Advance deleted successfully"}
 
 
-@api_router.post("/payments/calculate")
-async def calculate_payments(calculation: PaymentCalculation):
-    from uuid import uuid4
-    week_start = calculation.week_start_date
-    
-    employees = await db.employees.find({"is_active": True}, {"_id": 0}).to_list(1000)
-    contractors = await db.contractors.find({"is_active": True}, {"_id": 0}).to_list(1000)
-    attendance_records = await db.attendance.find({"week_start_date": week_start}, {"_id": 0}).to_list(5000)
-    advances_records = await db.advances.find({"week_start_date": week_start}, {"_id": 0}).to_list(5000)
+async def calculate_week_payments(week_start: str, run_id: str, run: Optional[JobRun] = None) -> dict:
+    """Record the week's payment history and pay contractors their weekly payment.
+
+    Safe to re-run with the same ``run_id``: history documents get ids derived
+    from it and each contractor is paid once per run, so a resumed job
+    doesn't pay twice.
+    """
+    from uuid import UUID, uuid5
+
+    results = await gather_queries({
+        "employees": load_entities("employees", active_only=True),
+        "contractors": load_entities("contractors", active_only=True),
+        "attendance": attendance_store.find_week(week_start),
+        "advances": db.advances.find({"week_start_date": week_start}, {"_id": 0}).to_list(5000),
+    })
+    employees = results["employees"]
+    contractors = results["contractors"]
+    attendance_records = results["attendance"]
+    advances_records = results["advances"]
+    if run is not None:
+        await run.progress(0, len(employees) + len(contractors))
     
+    if run is not None:
+        # History and contractor payments are written together or, on a crash, by a re-run
+        await run.commit()
+
     payment_records = []
+    # One sequence range for every document this calculation writes
+    next_seq = await next_sync_seq(len(employees) + len(contractors)) - len(employees) - len(contractors) + 1
     
+    operations = []
     for employee in employees:
         employee_attendance = [a for a in attendance_records if a['employee_id'] == employee['id']]
         days_worked = sum(1 for a in employee_attendance if a['status'] in ['present', 'late'])
@@ -499,7 +2235,7 @@ async def calculate_payments(calculation: PaymentCalculation):
         net_payment = total_salary - total_advances
         
         payment_obj = PaymentHistory(
-            id=str(uuid4()),
+            id=str(uuid5(UUID(run_id), employee['id'])),
             employee_id=employee['id'],
             week_start_date=week_start,
             days_worked=days_worked,
@@ -510,15 +2246,37 @@ async def calculate_payments(calculation: PaymentCalculation):
         )
         
         doc = payment_obj.model_dump()
-        await db.payment_history.insert_one(doc)
+        doc['updated_at'] = doc['paid_at']
+        doc['sync_seq'] = next_seq
+        doc['week_key'] = week_key(week_start)
+        next_seq += 1
+        operations.append(UpdateOne({"id": doc['id']}, {"$setOnInsert": doc}, upsert=True))
         payment_records.append(doc)
+    if operations:
+        await db.payment_history.bulk_write(operations, ordered=False)
+    if run is not None:
+        await run.progress(len(employees))
     
+    # Increment from the stored document, not the cached copy, which may
+    # predate a write made by another worker
+    updated_at = datetime.now(timezone.utc).isoformat()
+    operations = []
     for contractor in contractors:
-        new_total_paid = contractor.get('total_paid', 0) + contractor['weekly_payment']
-        await db.contractors.update_one(
-            {"id": contractor['id']},
-            {"$set": {"total_paid": new_total_paid}}
-        )
+        operations.append(UpdateOne(
+            {"id": contractor["id"], "last_payment_run": {"$ne": run_id}},
+            [{"$set": {
+                "total_paid": {"$add": [{"$ifNull": ["$total_paid", 0]}, "$weekly_payment"]},
+                "last_payment_run": run_id,
+                "updated_at": updated_at,
+                "sync_seq": next_seq
+            }}]
+        ))
+        next_seq += 1
+    if operations:
+        await db.contractors.bulk_write(operations, ordered=False)
+        await entity_written("contractors")
+    if run is not None:
+        await run.progress(len(employees) + len(contractors))
     
     return {
         "message": "Payments calculated successfully", 
@@ -527,51 +2285,67 @@ async def calculate_payments(calculation: PaymentCalculation):
     }
 
 
+@job_handler("calculate_payments", PaymentCalculation)
+async def calculate_payments_job(run: JobRun) -> dict:
+    return await calculate_week_payments(run.params["week_start_date"], run.id, run)
+
+
+@api_router.post("/payments/calculate")
+async def calculate_payments(calculation: PaymentCalculation):
+    """Calculate the week's payments within the request; ``POST /api/jobs`` runs the same in the background."""
+    from uuid import uuid4
+    return await calculate_week_payments(calculation.week_start_date, str(uuid4()))
+
+
 # Contractor Certifications endpoints
 @api_router.post("/certifications", response_model=ContractorCertification)
 async def create_certification(certification: ContractorCertificationCreate):
     from uuid import uuid4
     
     # Verify contractor exists
-    contractor = await db.contractors.find_one({"id": certification.contractor_id}, {"_id": 0})
+    contractor = await loader("contractors").load(certification.contractor_id)
     if not contractor:
         raise HTTPException(status_code=404, detail="Contractor not found")
     
     certification_dict = certification.model_dump()
+    stamp = await sync_stamp()
     certification_obj = ContractorCertification(
         id=str(uuid4()),
         contractor_id=certification_dict['contractor_id'],
         week_start_date=certification_dict['week_start_date'],
         amount=certification_dict['amount'],
         description=certification_dict.get('description', ''),
-        created_at=datetime.now(timezone.utc).isoformat()
+        created_at=datetime.now(timezone.utc).isoformat(),
+        updated_at=stamp['updated_at']
     )
-    doc = certification_obj.model_dump()
+    doc = {**certification_obj.model_dump(), **stamp, "week_key": week_key(certification_obj.week_start_date)}
     await db.certifications.insert_one(doc)
     
-    # Update contractor's total_paid
-    new_total_paid = contractor.get('total_paid', 0) + certification_dict['amount']
+    # $inc rather than cached total + amount, so concurrent certifications on other workers add up
     await db.contractors.update_one(
         {"id": certification.contractor_id},
-        {"$set": {"total_paid": new_total_paid}}
+        {"$inc": {"total_paid": certification_dict['amount']}, "$set": await sync_stamp()}
     )
+    await entity_written("contractors", certification.contractor_id)
     
     return certification_obj
 
 
 @api_router.get("/certifications", response_model=List[ContractorCertification])
-async def get_all_certifications():
-    certifications = await db.certifications.find({}, {"_id": 0}).sort("created_at", -1).to_list(5000)
-    return certifications
+async def get_all_certifications(fields: Optional[str] = None):
+    names = parse_fields(ContractorCertification, fields)
+    certifications = await db.certifications.find({}, mongo_projection(names)).sort("created_at", -1).to_list(5000)
+    return list_response(ContractorCertification, certifications, names)
 
 
 @api_router.get("/certifications/contractor/{contractor_id}", response_model=List[ContractorCertification])
-async def get_contractor_certifications(contractor_id: str):
+async def get_contractor_certifications(contractor_id: str, fields: Optional[str] = None):
+    names = parse_fields(ContractorCertification, fields)
     certifications = await db.certifications.find(
         {"contractor_id": contractor_id}, 
-        {"_id": 0}
+        mongo_projection(names)
     ).sort("week_start_date", -1).to_list(1000)
-    return certifications
+    return list_response(ContractorCertification, certifications, names)
 
 
 @api_router.delete("/certifications/{certification_id}")
@@ -581,33 +2355,116 @@ async def delete_certification(certification_id: str):
     if not certification:
         raise HTTPException(status_code=404, detail="Certification not found")
     
-    # Update contractor's total_paid
-    contractor = await db.contractors.find_one({"id": certification['contractor_id']}, {"_id": 0})
-    if contractor:
-        new_total_paid = max(0, contractor.get('total_paid', 0) - certification['amount'])
-        await db.contractors.update_one(
-            {"id": certification['contractor_id']},
-            {"$set": {"total_paid": new_total_paid}}
-        )
+    # Subtract in the database, never going below zero
+    result = await db.contractors.update_one(
+        {"id": certification['contractor_id']},
+        [{"$set": {
+            "total_paid": {"$max": [0, {"$subtract": [{"$ifNull": ["$total_paid", 0]}, certification['amount']]}]},
+            **await sync_stamp()
+        }}]
+    )
+    if result.matched_count:
+        await entity_written("contractors", certification['contractor_id'])
     
     result = await db.certifications.delete_one({"id": certification_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Certification not found")
+    await record_tombstones("certifications", [certification_id])
     return {"message": "Certification deleted successfully"}
 
 
 @api_router.get("/payments/history", response_model=List[PaymentHistory])
-async def get_payment_history():
-    payments = await db.payment_history.find({}, {"_id": 0}).sort("paid_at", -1).to_list(1000)
-    return payments
+async def get_payment_history(fields: Optional[str] = None):
+    names = parse_fields(PaymentHistory, fields)
+    payments = await db.payment_history.find({}, mongo_projection(names)).sort("paid_at", -1).to_list(1000)
+    return list_response(PaymentHistory, payments, names)
+
+
+@api_router.get("/sync")
+async def sync_changes(since: int = 0, collections: Optional[str] = None, limit: int = 5000):
+    """Records created, changed or deleted after the ``since`` token.
+
+    ``since=0`` (or a token from before a database reset) returns a full
+    snapshot. When a collection has more than ``limit`` changes, ``has_more``
+    is set and the returned token resumes from the last record sent; clients
+    apply changes as upserts, so overlap between pages is harmless. The token
+    also stays below any sequence still reserved by an in-flight write, so
+    changes past it may be sent again on the next call.
+    """
+    names = SYNC_COLLECTIONS if not collections else [c for c in collections.split(',') if c]
+    unknown = [name for name in names if name not in SYNC_COLLECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown collections: {', '.join(unknown)}")
+    if since < 0 or limit < 1:
+        raise HTTPException(status_code=400, detail="since must be >= 0 and limit >= 1")
+
+    counter = await db.counters.find_one({"_id": "sync_seq"}, {"value": 1})
+    current = counter["value"] if counter else 0
+    reset = since > current
+    if reset:
+        since = 0
+
+    # Stop short of sequences reserved by writes that haven't landed yet; a
+    # token past them would skip those documents for good
+    token = await settled_sync_seq(current)
+    has_more = False
+    changes = {}
+    for name in names:
+        source = attendance_store.collection if name == "attendance" else name
+        if since == 0:
+            docs = await db[source].find({}, {"_id": 0}).to_list(None)
+        else:
+            docs = await db[source].find(
+                {"sync_seq": {"$gt": since}}, {"_id": 0}
+            ).sort("sync_seq", 1).to_list(limit)
+            if len(docs) == limit:
+                has_more = True
+                last = docs[-1]["sync_seq"]
+                # Bulk updates stamp many documents with one sequence; never
+                # split those across pages, or the rest would be skipped
+                sent = {doc["id"] for doc in docs if doc["sync_seq"] == last}
+                docs += [
+                    doc for doc in await db[source].find({"sync_seq": last}, {"_id": 0}).to_list(None)
+                    if doc["id"] not in sent
+                ]
+                token = min(token, last)
+        if name == "contractors":
+            for contractor in docs:
+                contractor_with_balance(contractor)
+        elif name == "attendance":
+            docs = attendance_store.flatten(docs)
+        changes[name] = docs
+
+    deleted = {name: [] for name in names}
+    if since > 0:
+        tombstones = await db.tombstones.find(
+            {"collection": {"$in": names}, "sync_seq": {"$gt": since, "$lte": token}},
+            {"_id": 0, "collection": 1, "id": 1}
+        ).to_list(None)
+        for tombstone in tombstones:
+            deleted[tombstone["collection"]].append(tombstone["id"])
+
+    return {
+        "token": token,
+        "reset": reset,
+        "has_more": has_more,
+        "changes": changes,
+        "deleted": deleted,
+    }
 
 
 @api_router.get("/payments/by-project/{week_start}")
-async def get_payments_by_project(week_start: str):
-    employees = await db.employees.find({"is_active": True}, {"_id": 0}).to_list(1000)
-    projects = await db.projects.find({}, {"_id": 0}).to_list(1000)
-    attendance_records = await db.attendance.find({"week_start_date": week_start}, {"_id": 0}).to_list(5000)
-    advances_records = await db.advances.find({"week_start_date": week_start}, {"_id": 0}).to_list(5000)
+async def get_payments_by_project(week_start: WeekStart):
+    results = await gather_queries({
+        "employees": load_entities("employees", active_only=True),
+        "projects": load_entities("projects"),
+        "attendance": attendance_store.find_week(week_start),
+        "advances": db.advances.find({"week_start_date": week_start}, {"_id": 0}).to_list(5000),
+    })
+    employees = results["employees"]
+    projects = results["projects"]
+    attendance_records = results["attendance"]
+    advances_records = results["advances"]
     
     project_payments = {}
     
@@ -708,19 +2565,661 @@ async def get_payments_by_project(week_start: str):
     return {"projects": list(project_payments.values())}
 
 
+REPORT_GROUPS = ("project", "trade", "employee", "week")
+REPORT_TOTALS = ("days_worked", "gross_salary", "late_discount", "total_salary", "advances", "net_payment")
+
+
+def week_of_key(key: int) -> str:
+    return date.fromisocalendar(key // 100, key % 100, 1).isoformat()
+
+
+@api_router.get("/reports/payroll")
+async def get_payroll_report(
+    from_week: WeekStart = Query(..., alias="from"),
+    to_week: WeekStart = Query(..., alias="to"),
+    group_by: str = "project",
+):
+    """Payroll totals over a range of weeks, grouped by project, trade, employee or week.
+
+    Attendance, advances and certifications are each reduced by one grouped
+    aggregation per employee (or contractor), and per week only when grouping
+    by week, so the work grows with the size of the report rather than the
+    number of weeks. Salaries are the employees' current daily rates, as in
+    /payments/by-project.
+    """
+    if group_by not in REPORT_GROUPS:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of: {', '.join(REPORT_GROUPS)}")
+    first_key, last_key = week_key(from_week), week_key(to_week)
+    if first_key > last_key:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    by_week = group_by == "week"
+
+    def totals_by(field):
+        key = {field: f"${field}"}
+        if by_week:
+            key["week_key"] = "$week_key"
+        return key
+
+    results = await gather_queries({
+        "employees": load_entities("employees"),
+        "projects": load_entities("projects"),
+        "contractors": load_entities("contractors"),
+        "attendance": attendance_store.week_totals(first_key, last_key, by_week),
+        "advances": db.advances.aggregate([
+            week_range_match(first_key, last_key),
+            {"$group": {"_id": totals_by("employee_id"), "amount": {"$sum": "$amount"}}},
+        ]).to_list(None),
+        "certifications": db.certifications.aggregate([
+            week_range_match(first_key, last_key),
+            {"$group": {"_id": totals_by("contractor_id"), "amount": {"$sum": "$amount"}, "count": {"$sum": 1}}},
+        ]).to_list(None),
+    })
+    employees = {e['id']: e for e in results["employees"]}
+    project_names = {p['id']: p['name'] for p in results["projects"]}
+    contractors = {c['id']: c for c in results["contractors"]}
+
+    # (employee_id, week_key or None) -> attendance and advance totals
+    rows = {}
+    for total in results["attendance"]:
+        row = rows.setdefault((total['_id']['employee_id'], total['_id'].get('week_key')), {"advances": 0})
+        row.update(days_worked=total['days_worked'], late_hours=total['late_hours'])
+    for total in results["advances"]:
+        row = rows.setdefault((total['_id']['employee_id'], total['_id'].get('week_key')), {"advances": 0})
+        row['advances'] = total['amount']
+
+    groups = {}
+    for (employee_id, week), row in rows.items():
+        employee = employees.get(employee_id, {})
+        daily_salary = employee.get('daily_salary', 0)
+        if group_by == "project":
+            project_id = employee.get('project_id') or 'unassigned'
+            key, label = project_id, project_names.get(project_id, 'Sin asignar')
+        elif group_by == "trade":
+            key = label = employee.get('trade') or 'Sin rubro'
+        elif group_by == "employee":
+            key, label = employee_id, employee.get('name', employee_id)
+        else:
+            key = label = week_of_key(week)
+
+        group = groups.setdefault(key, {"key": key, "label": label, "employees": set(), **dict.fromkeys(REPORT_TOTALS, 0)})
+        days_worked = row.get('days_worked', 0)
+        gross_salary = days_worked * daily_salary
+        late_discount = row.get('late_hours', 0) * daily_salary / 8
+        group['employees'].add(employee_id)
+        group['days_worked'] += days_worked
+        group['gross_salary'] += gross_salary
+        group['late_discount'] += late_discount
+        group['total_salary'] += gross_salary - late_discount
+        group['advances'] += row['advances']
+        group['net_payment'] += gross_salary - late_discount - row['advances']
+
+    certifications = {}
+    for total in results["certifications"]:
+        contractor_id = total['_id']['contractor_id']
+        contractor = contractors.get(contractor_id, {})
+        if by_week:
+            key = label = week_of_key(total['_id']['week_key'])
+            extra = {}
+        else:
+            key, label = contractor_id, contractor.get('name', contractor_id)
+            extra = {"project_name": contractor.get('project_name', 'Sin asignar')}
+        entry = certifications.setdefault(key, {"key": key, "label": label, **extra, "count": 0, "amount": 0})
+        entry['count'] += total['count']
+        entry['amount'] += total['amount']
+
+    report_groups = sorted(groups.values(), key=lambda g: g['key'] if by_week else g['label'])
+    for group in report_groups:
+        group['employees'] = len(group['employees'])
+    certification_groups = sorted(certifications.values(), key=lambda c: c['key'] if by_week else c['label'])
+    certification_total = sum(c['amount'] for c in certification_groups)
+    totals = {name: sum(g[name] for g in report_groups) for name in REPORT_TOTALS}
+
+    return {
+        "from": from_week,
+        "to": to_week,
+        "weeks": (date.fromisoformat(to_week) - date.fromisoformat(from_week)).days // 7 + 1,
+        "group_by": group_by,
+        "groups": report_groups,
+        "totals": {**totals, "certifications": certification_total, "total_cost": totals['total_salary'] + certification_total},
+        "certifications": {"groups": certification_groups, "total": certification_total},
+    }
+
+
+ANALYTICS_BATCH_SIZE = int(os.environ.get('ANALYTICS_BATCH_SIZE', '5000'))
+
+
+async def analytics_weeks(from_week: Optional[str], to_week: Optional[str]):
+    """Employee-week frame for a range, year to date by default."""
+    today = datetime.now(timezone.utc).date()
+    from_week = from_week or date.fromisocalendar(today.isocalendar()[0], 1, 1).isoformat()
+    to_week = to_week or canonical_week_start(today.isoformat())
+    first_key, last_key = week_key(from_week), week_key(to_week)
+    if first_key > last_key:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+
+    results = await gather_queries({
+        "employees": load_entities("employees"),
+        "attendance": analytics.load_attendance(
+            db[attendance_store.collection], isinstance(attendance_store, BucketedAttendanceStore),
+            first_key, last_key, ANALYTICS_BATCH_SIZE
+        ),
+        "advances": analytics.load_advances(db.advances, first_key, last_key, ANALYTICS_BATCH_SIZE),
+    })
+    employees = results["employees"]
+    # Off the event loop; other requests keep being served between GIL switches
+    weeks = await asyncio.to_thread(
+        analytics.employee_weeks, results["attendance"], results["advances"], analytics.employees_frame(employees)
+    )
+    return {"from": from_week, "to": to_week}, weeks, employees
+
+
+@api_router.get("/analytics/payroll")
+async def get_payroll_analytics(
+    from_week: Optional[WeekStart] = Query(None, alias="from"),
+    to_week: Optional[WeekStart] = Query(None, alias="to"),
+):
+    period, weeks, _ = await analytics_weeks(from_week, to_week)
+    return {**period, **await asyncio.to_thread(analytics.payroll_metrics, weeks)}
+
+
+@api_router.get("/analytics/project-costs")
+async def get_project_cost_curves(
+    from_week: Optional[WeekStart] = Query(None, alias="from"),
+    to_week: Optional[WeekStart] = Query(None, alias="to"),
+):
+    period, weeks, _ = await analytics_weeks(from_week, to_week)
+    project_names = {p['id']: p['name'] for p in await load_entities("projects")}
+    curves = await asyncio.to_thread(analytics.project_cost_curves, weeks, project_names)
+    for curve in curves:
+        curve['weeks'] = [week_of_key(key) for key in curve['weeks']]
+    return {**period, "projects": curves}
+
+
+@api_router.get("/analytics/absenteeism")
+async def get_absenteeism(
+    from_week: Optional[WeekStart] = Query(None, alias="from"),
+    to_week: Optional[WeekStart] = Query(None, alias="to"),
+    group_by: str = "project",
+):
+    if group_by not in analytics.ABSENTEEISM_GROUPS:
+        raise HTTPException(
+            status_code=400, detail=f"group_by must be one of: {', '.join(analytics.ABSENTEEISM_GROUPS)}"
+        )
+    period, weeks, employees = await analytics_weeks(from_week, to_week)
+    if group_by == "project":
+        labels = {p['id']: p['name'] for p in await load_entities("projects")}
+        labels['unassigned'] = 'Sin asignar'
+    elif group_by == "employee":
+        labels = {e['id']: e['name'] for e in employees}
+    else:
+        labels = {}
+    rates = await asyncio.to_thread(analytics.absenteeism, weeks, group_by, labels)
+    return {**period, "group_by": group_by, "groups": rates}
+
+
+@api_router.post("/payroll/simulate")
+async def simulate_payroll(simulation: PayrollSimulation):
+    """Recompute the period's payroll under each what-if scenario; nothing is written.
+
+    The period defaults to the year to date, like the analytics endpoints.
+    Employee pay is recomputed from the period's attendance and advances;
+    active contractors are counted at their weekly payment for every week of
+    the period. Returns those totals as ``baseline`` and one set per scenario.
+    """
+    period, weeks, employees = await analytics_weeks(simulation.from_week, simulation.to_week)
+    contractors = await load_entities("contractors", active_only=True)
+    projects = await load_entities("projects")
+
+    unknown = []
+    trades = {e.get("trade") or "Sin rubro" for e in employees}
+    project_ids = {p["id"] for p in projects} | {"unassigned"}
+    contractor_ids = {c["id"] for c in contractors}
+    for scenario in simulation.scenarios:
+        unknown += [f"trade {t}" for t in scenario.trade_multipliers if t not in trades]
+        unknown += [f"project {p}" for p in scenario.project_multipliers if p not in project_ids]
+        unknown += [f"contractor {c}" for c in scenario.contractor_payments if c not in contractor_ids]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown {', '.join(dict.fromkeys(unknown))}")
+
+    week_count = (date.fromisoformat(period["to"]) - date.fromisoformat(period["from"])).days // 7 + 1
+    weekly_payments = {c["id"]: c["weekly_payment"] for c in contractors}
+    baseline = PayrollScenario(name="baseline")
+    totals = await asyncio.to_thread(
+        analytics.simulate_payroll, weeks, weekly_payments, week_count,
+        [scenario.model_dump() for scenario in [baseline, *simulation.scenarios]],
+    )
+    for scenario in totals[1:]:
+        scenario["difference"] = scenario["total_cost"] - totals[0]["total_cost"]
+    return {**period, "weeks": week_count, "baseline": totals[0], "scenarios": totals[1:]}
+
+
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '10000'))
+
+
+@api_router.get("/export/{collection}")
+async def export_collection(
+    collection: str,
+    format: str = "parquet",
+    from_week: Optional[WeekStart] = Query(None, alias="from"),
+    to_week: Optional[WeekStart] = Query(None, alias="to"),
+):
+    """Stream a collection, or a range of weeks of one, as a Parquet or Arrow IPC file."""
+    if collection not in exports.EXPORT_SCHEMAS:
+        raise HTTPException(status_code=404, detail="Unknown collection")
+    if format not in exports.EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(exports.EXPORT_FORMATS)}")
+    query = {}
+    if from_week or to_week:
+        if collection not in exports.WEEKLY_COLLECTIONS:
+            raise HTTPException(status_code=400, detail=f"{collection} cannot be filtered by week")
+        query["week_key"] = {}
+        if from_week:
+            query["week_key"]["$gte"] = week_key(from_week)
+        if to_week:
+            query["week_key"]["$lte"] = week_key(to_week)
+
+    cursor = exports.source_cursor(
+        db, collection, query, isinstance(attendance_store, BucketedAttendanceStore), EXPORT_BATCH_SIZE
+    )
+    extension, media_type = exports.EXPORT_FORMATS[format]
+    filename = "-".join(filter(None, [collection, from_week, to_week])) + f".{extension}"
+    return StreamingResponse(
+        exports.stream_export(cursor, exports.EXPORT_SCHEMAS[collection], format, EXPORT_BATCH_SIZE),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+RECEIPT_WORKERS = int(os.environ.get('RECEIPT_WORKERS', '0')) or None  # default: one per CPU
+RECEIPT_CHUNK_SIZE = int(os.environ.get('RECEIPT_CHUNK_SIZE', '50'))
+RECEIPT_CACHE_WEEKS = int(os.environ.get('RECEIPT_CACHE_WEEKS', '8'))
+
+receipt_pool: Optional[ProcessPoolExecutor] = None
+# week_start -> (fingerprint, rendered chunks), closed weeks only, least recently used first
+receipt_cache: "OrderedDict[str, Tuple[str, List[str]]]" = OrderedDict()
+
+
+def receipt_executor() -> ProcessPoolExecutor:
+    global receipt_pool
+    if receipt_pool is None:
+        # Spawned rather than forked: a fork would copy the Mongo client's threads and sockets
+        receipt_pool = ProcessPoolExecutor(RECEIPT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return receipt_pool
+
+
+async def week_receipts(week_start: str) -> Tuple[List[dict], Optional[str]]:
+    """Receipts for every employee and contractor paid in the week, and the
+    date its payments were calculated (None while the week is open)."""
+    results = await gather_queries({
+        "employees": load_entities("employees", active_only=True),
+        "contractors": load_entities("contractors", active_only=True),
+        "attendance": attendance_store.find_week(week_start),
+        "advances": db.advances.find({"week_start_date": week_start}, {"_id": 0}).to_list(5000),
+        "closed": db.payment_history.find(
+            {"week_start_date": week_start}, {"_id": 0, "paid_at": 1}
+        ).sort("paid_at", DESCENDING).limit(1).to_list(1),
+    })
+    closed_on = results["closed"][0]["paid_at"][:10] if results["closed"] else None
+    year = (closed_on or date.today().isoformat())[:4]
+
+    attendance_by_employee = {}
+    for record in results["attendance"]:
+        attendance_by_employee.setdefault(record["employee_id"], []).append(record)
+    advances_by_employee = {}
+    for advance in sorted(results["advances"], key=lambda a: a["date"]):
+        advances_by_employee.setdefault(advance["employee_id"], []).append(advance)
+
+    rows = []
+    for employee in sorted(results["employees"], key=lambda e: (e["name"], e["id"])):
+        employee_attendance = attendance_by_employee.get(employee["id"], [])
+        days_worked = sum(1 for a in employee_attendance if a["status"] in ("present", "late"))
+        late_hours = sum(a.get("late_hours", 0) for a in employee_attendance if a["status"] == "late")
+        gross = days_worked * employee["daily_salary"]
+        late_discount = late_hours * employee["daily_salary"] / 8
+        advances = advances_by_employee.get(employee["id"], [])
+        net = round(gross - late_discount - sum(a["amount"] for a in advances), 2)
+        if net > 0:
+            rows.append({
+                "number": f"{year}-{len(rows) + 1:04d}",
+                "name": employee["name"],
+                "gross": round(gross, 2),
+                "late_discount": round(late_discount, 2),
+                "advances": [
+                    {"date": a["date"], "amount": a["amount"], "description": a.get("description") or ""}
+                    for a in advances
+                ],
+                "net": net,
+            })
+
+    contractors = [c for c in results["contractors"] if c["weekly_payment"] > 0]
+    for i, contractor in enumerate(sorted(contractors, key=lambda c: (c["name"], c["id"])), 1):
+        rows.append({
+            "number": f"{year}-C-{i:04d}",
+            "name": contractor["name"],
+            "gross": contractor["weekly_payment"],
+            "net": contractor["weekly_payment"],
+            "is_contractor": True,
+            "project": contractor.get("project_name"),
+        })
+    return rows, closed_on
+
+
+async def stream_receipts(week_start: str, rows: List[dict], issued_on: str,
+                          fingerprint: Optional[str] = None) -> AsyncIterator[str]:
+    """Yield the receipts document, rendering chunks of receipts in worker processes.
+
+    With a ``fingerprint`` the week is closed: its document is served from
+    ``receipt_cache`` when the fingerprint matches, and cached once rendered.
+    """
+    global receipt_pool
+    yield receipts.document_head(week_start)
+    cached = receipt_cache.get(week_start)
+    if fingerprint is not None and cached is not None and cached[0] == fingerprint:
+        receipt_cache.move_to_end(week_start)
+        for chunk in cached[1]:
+            yield chunk
+    else:
+        loop = asyncio.get_running_loop()
+        pool = receipt_executor()
+        futures = [
+            loop.run_in_executor(pool, receipts.render_chunk, rows[i:i + RECEIPT_CHUNK_SIZE], week_start, issued_on)
+            for i in range(0, len(rows), RECEIPT_CHUNK_SIZE)
+        ]
+        chunks = []
+        try:
+            for future in futures:
+                chunks.append(await future)
+                yield chunks[-1]
+        except BrokenProcessPool:
+            # A worker died (killed, out of memory): start a fresh pool next time
+            if receipt_pool is pool:
+                receipt_pool = None
+            raise
+        finally:
+            for future in futures:
+                future.cancel()
+        if fingerprint is not None:
+            receipt_cache[week_start] = (fingerprint, chunks)
+            receipt_cache.move_to_end(week_start)
+            while len(receipt_cache) > RECEIPT_CACHE_WEEKS:
+                receipt_cache.popitem(last=False)
+    yield receipts.DOCUMENT_TAIL
+
+
+@api_router.post("/receipts/{week_start}")
+async def render_receipts(week_start: WeekStart):
+    """Stream every receipt of the week as one printable HTML document.
+
+    Once the week's payments are calculated the receipts are dated that day
+    and the rendered document is cached until their contents change.
+    """
+    rows, closed_on = await week_receipts(week_start)
+    issued_on = closed_on or date.today().isoformat()
+    fingerprint = None
+    if closed_on is not None:
+        fingerprint = hashlib.sha1(json.dumps([issued_on, rows], sort_keys=True).encode()).hexdigest()
+    return StreamingResponse(
+        stream_receipts(week_start, rows, issued_on, fingerprint),
+        media_type="text/html; charset=utf-8",
+        headers={
+            "Content-Disposition": f'inline; filename="recibos-{week_start}.html"',
+            "X-Receipt-Count": str(len(rows)),
+        },
+    )
+
+
+IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', '1000'))
+IMPORT_MAX_ERRORS = int(os.environ.get('IMPORT_MAX_ERRORS', '1000'))
+
+# Spanish labels from paper sheets map onto the stored statuses
+ATTENDANCE_STATUSES = {
+    "present": "present", "absent": "absent", "late": "late",
+    "presente": "present", "ausente": "absent", "tarde": "late",
+}
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.error_count = 0
+        self.errors = []
+
+    def error(self, line: int, messages: List[str]):
+        self.error_count += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"row": line, "errors": messages})
+
+    def result(self) -> dict:
+        return {
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
+
+
+def validation_messages(exc: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in exc.errors()]
+
+
+def check_date(value: str, field: str = "date"):
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{field}: must be a date in YYYY-MM-DD format")
+
+
+async def run_import(upload: UploadFile, model, required: tuple, write_chunk, prepare=None) -> ImportReport:
+    """Validate an uploaded CSV/XLSX against ``model`` and hand valid rows to ``write_chunk``.
+
+    Rows are read and validated IMPORT_CHUNK_SIZE at a time; file parsing runs
+    in a worker thread. Invalid rows are reported by line and skipped, the
+    rest are written.
+    """
+    try:
+        header, rows = await asyncio.to_thread(imports.read_rows, upload.filename, upload.file)
+    except imports.ImportFormatError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    missing = [name for name in required if name not in header]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Missing columns: {', '.join(missing)}")
+
+    report = ImportReport()
+    chunks = imports.chunked(rows, IMPORT_CHUNK_SIZE)
+    while True:
+        chunk = await asyncio.to_thread(next, chunks, None)
+        if chunk is None:
+            break
+        valid = []
+        for line, row in chunk:
+            report.rows += 1
+            try:
+                valid.append((line, model.model_validate(prepare(row) if prepare else row)))
+            except ValidationError as exc:
+                report.error(line, validation_messages(exc))
+            except ValueError as exc:
+                report.error(line, [str(exc)])
+        if valid:
+            await write_chunk(valid, report)
+    return report
+
+
+@api_router.post("/import/employees")
+async def import_employees(file: UploadFile = File(...)):
+    """Create employees from a CSV/XLSX with name, daily_salary and optional
+    project_id (or project, by name) and trade columns."""
+    from uuid import uuid4
+    projects = {p['name'].strip().lower(): p['id'] for p in await load_entities("projects")}
+
+    def prepare(row):
+        project = row.pop('project', None)
+        if project is not None and 'project_id' not in row:
+            row['project_id'] = projects.get(str(project).strip().lower())
+            if row['project_id'] is None:
+                raise ValueError(f"project: unknown project {project!r}")
+        return row
+
+    async def write(rows, report):
+        seq = await next_sync_seq(len(rows)) - len(rows)
+        created_at = datetime.now(timezone.utc).isoformat()
+        docs = []
+        for _, employee in rows:
+            seq += 1
+            employee_obj = Employee(
+                id=str(uuid4()), **employee.model_dump(), created_at=created_at, updated_at=created_at
+            )
+            docs.append({**employee_obj.model_dump(), "sync_seq": seq, "name_words": search_words(employee_obj.name)})
+        await db.employees.insert_many(docs, ordered=False)
+        report.inserted += len(docs)
+
+    report = await run_import(file, EmployeeCreate, ("name", "daily_salary"), write, prepare)
+    if report.inserted:
+        await entity_written("employees")
+    return report.result()
+
+
+@api_router.post("/import/attendance")
+async def import_attendance(file: UploadFile = File(...)):
+    """Upsert attendance from a CSV/XLSX with employee_id, date, status and
+    optional late_hours and week_start_date (derived from date when absent)."""
+    employee_ids = {e['id'] for e in await load_entities("employees")}
+    weeks = set()
+
+    def prepare(row):
+        status = ATTENDANCE_STATUSES.get(str(row.get('status', '')).lower())
+        if status is None:
+            raise ValueError("status: must be present, absent or late")
+        check_date(str(row.get('date', '')))
+        row['status'] = status
+        row.setdefault('week_start_date', row['date'])
+        return row
+
+    async def write(rows, report):
+        # Later rows for the same employee and day win
+        records = {}
+        for line, attendance in rows:
+            if attendance.employee_id not in employee_ids:
+                report.error(line, ["employee_id: unknown employee"])
+            elif canonical_week_start(attendance.date) != attendance.week_start_date:
+                report.error(line, [f"date: not in the week of {attendance.week_start_date}"])
+            else:
+                records[(attendance.employee_id, attendance.date)] = attendance.model_dump()
+        if records:
+            inserted, updated = await attendance_store.bulk_upsert(list(records.values()))
+            report.inserted += inserted
+            report.updated += updated
+            weeks.update(record['week_start_date'] for record in records.values())
+
+    report = await run_import(file, AttendanceCreate, ("employee_id", "date", "status"), write, prepare)
+    if attendance_broker.local_publish:
+        for week in weeks:
+            attendance_broker.resync(week)
+    return report.result()
+
+
+@api_router.post("/import/advances")
+async def import_advances(file: UploadFile = File(...)):
+    """Create advances from a CSV/XLSX with employee_id, amount, date and
+    optional description and week_start_date (derived from date when absent)."""
+    from uuid import uuid4
+    employee_ids = {e['id'] for e in await load_entities("employees")}
+
+    def prepare(row):
+        check_date(str(row.get('date', '')))
+        row.setdefault('week_start_date', row['date'])
+        return row
+
+    async def write(rows, report):
+        known = []
+        for line, advance in rows:
+            if advance.employee_id in employee_ids:
+                known.append(advance)
+            else:
+                report.error(line, ["employee_id: unknown employee"])
+        if not known:
+            return
+        seq = await next_sync_seq(len(known)) - len(known)
+        updated_at = datetime.now(timezone.utc).isoformat()
+        docs = []
+        for advance in known:
+            seq += 1
+            advance_obj = Advance(id=str(uuid4()), **advance.model_dump(), updated_at=updated_at)
+            docs.append({**advance_obj.model_dump(), "sync_seq": seq, "week_key": week_key(advance_obj.week_start_date)})
+        await db.advances.insert_many(docs, ordered=False)
+        report.inserted += len(docs)
+
+    report = await run_import(file, AdvanceCreate, ("employee_id", "amount", "date"), write, prepare)
+    return report.result()
+
+
+@api_router.post("/jobs", response_model=Job)
+async def create_job(job: JobCreate):
+    """Start a background job; poll ``GET /api/jobs/{id}`` for its progress and result."""
+    handler = job_handlers.get(job.type)
+    if handler is None or handler[1] is None:
+        public = [name for name, (_, params_model) in job_handlers.items() if params_model is not None]
+        raise HTTPException(status_code=400, detail=f"type must be one of: {', '.join(public)}")
+    try:
+        params = handler[1].model_validate(job.params).model_dump()
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=validation_messages(exc))
+    return await start_job(job.type, params)
+
+
+@api_router.get("/jobs/{job_id}", response_model=Job)
+async def get_job(job_id: str):
+    job = await db.jobs.find_one({"id": job_id}, {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@api_router.post("/jobs/{job_id}/cancel", response_model=Job)
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job; a job running on another worker stops within a heartbeat.
+
+    Jobs that already committed to writing their results (see ``JobRun.commit``) finish instead.
+    """
+    job = await db.jobs.find_one_and_update(
+        {"id": job_id, "status": {"$in": ACTIVE_JOB_STATUSES}, "committed": {"$ne": True}},
+        {"$set": {"cancel_requested": True, "updated_at": datetime.now(timezone.utc).isoformat()}},
+        projection={"_id": 0}, return_document=ReturnDocument.AFTER
+    )
+    if job is None:
+        job = await db.jobs.find_one({"id": job_id}, {"_id": 0, "status": 1})
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        if job["status"] in ACTIVE_JOB_STATUSES:
+            raise HTTPException(status_code=409, detail="Job is writing its results and can no longer be cancelled")
+        raise HTTPException(status_code=409, detail="Job already finished")
+    if await cancel_local_job(job_id):
+        job = await db.jobs.find_one({"id": job_id}, {"_id": 0})
+    return job
+
+
 @api_router.get("/dashboard/stats", response_model=DashboardStats)
 async def get_dashboard_stats():
     today = datetime.now(timezone.utc)
     week_start = (today - timedelta(days=today.weekday())).strftime("%Y-%m-%d")
     
-    all_employees = await db.employees.find({}, {"_id": 0}).to_list(1000)
+    results = await gather_queries({
+        "employees": load_entities("employees"),
+        "contractors": load_entities("contractors"),
+        "attendance": attendance_store.find_week(week_start),
+        "advances": db.advances.find({"week_start_date": week_start}, {"_id": 0}).to_list(5000),
+    })
+    
+    all_employees = results["employees"]
     active_employees = [e for e in all_employees if e.get('is_active', True)]
     
-    all_contractors = await db.contractors.find({}, {"_id": 0}).to_list(1000)
+    all_contractors = results["contractors"]
     active_contractors = [c for c in all_contractors if c.get('is_active', True)]
     
-    attendance_records = await db.attendance.find({"week_start_date": week_start}, {"_id": 0}).to_list(5000)
-    advances_records = await db.advances.find({"week_start_date": week_start}, {"_id": 0}).to_list(5000)
+    attendance_records = results["attendance"]
+    advances_records = results["advances"]
     
     total_payment = 0
     for employee in active_employees:
@@ -752,6 +3251,153 @@ async def get_dashboard_stats():
     return stats
 
 
+async def health_report():
+    ping_ms = await mongo_ping_ms()
+    loop_stats = loop_lag_monitor.stats()
+    pool_stats = pool_monitor.stats()
+    problems = [f"starting: {name}" for name in sorted(pending_startup)]
+    if ping_ms is None:
+        problems.append("mongo unreachable")
+    if loop_stats["lag_ms"] > READY_MAX_LOOP_LAG_MS:
+        problems.append("event loop lagging")
+    if pool_stats["wait_queue"] > READY_MAX_WAIT_QUEUE:
+        problems.append("connection pool saturated")
+    pool_stats["max_pool_size"] = MONGO_CLIENT_OPTIONS["maxPoolSize"]
+    pool_stats["min_pool_size"] = MONGO_CLIENT_OPTIONS["minPoolSize"]
+    return {
+        "status": "ok" if not problems else "degraded",
+        "ready": not problems,
+        "problems": problems,
+        "event_loop": loop_stats,
+        "mongo": {"ping_ms": ping_ms, "pool": pool_stats},
+    }
+
+
+@api_router.get("/health")
+async def health():
+    return await health_report()
+
+
+@api_router.get("/ready")
+async def ready():
+    report = await health_report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+
+BATCH_MAX_REQUESTS = int(os.environ.get('BATCH_MAX_REQUESTS', '20'))
+BATCH_CONCURRENCY = int(os.environ.get('BATCH_CONCURRENCY', '8'))
+
+
+class NonJSONResponse(Exception):
+    """Raised to stop a batch sub-request as soon as it answers with something other than JSON."""
+
+
+async def dispatch_internal_get(path: str, query: str, headers: Dict[str, str]):
+    """Run a GET through the app in-process and capture status, headers and body.
+
+    ``path`` is URL-encoded, as in a request line. Raises NonJSONResponse,
+    without reading the body, for responses that aren't JSON.
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": unquote(path),
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers.items()],
+        "client": None,
+        "server": None,
+    }
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        return {"type": "http.disconnect"}
+
+    status = 500
+    response_headers = {}
+    body = []
+    rejected = None
+
+    async def send(message):
+        nonlocal status, rejected
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers.update(
+                (k.decode('latin-1').lower(), v.decode('latin-1')) for k, v in message.get("headers", [])
+            )
+            # Bodiless answers such as 304 have no content type
+            content_type = response_headers.get("content-type")
+            if content_type is not None and not content_type.startswith("application/json"):
+                rejected = NonJSONResponse(content_type)
+                raise rejected
+        elif message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        if rejected is not None:
+            # Streaming responses re-raise it wrapped in an exception group
+            raise rejected
+        # The error middleware has already answered 500; keep the rest of the batch going
+        logger.exception("Batch sub-request to %s failed", path)
+        status = 500
+    return status, response_headers, b"".join(body)
+
+
+@api_router.post("/batch")
+async def batch(batch_request: BatchRequest):
+    """Run several GET sub-requests in one round trip.
+
+    Sub-requests are dispatched concurrently through the app itself, without
+    HTTP, and each result carries its own status code. Only JSON endpoints
+    can be batched: streams, exports and other responses are answered 400.
+    """
+    if len(batch_request.requests) > BATCH_MAX_REQUESTS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_REQUESTS} requests per batch")
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run(index: int, sub: BatchSubRequest):
+        parts = urlsplit(sub.path)
+        path = unquote(parts.path)
+        result = {"id": sub.id if sub.id is not None else str(index), "path": sub.path}
+        if not path.startswith("/api/") or path.rstrip("/") == "/api/batch" or path.endswith("/stream"):
+            return {**result, "status": 400, "body": {"detail": "Unsupported batch path"}}
+        query = "&".join(q for q in (parts.query, urlencode(sub.params, doseq=True)) if q)
+        try:
+            async with semaphore:
+                status, headers, body = await dispatch_internal_get(parts.path, query, sub.headers)
+        except NonJSONResponse:
+            return {**result, "status": 400, "body": {"detail": "Only JSON endpoints can be batched"}}
+        result.update({"status": status, "body": json.loads(body) if body else None})
+        if "etag" in headers:
+            result["etag"] = headers["etag"]
+        return result
+
+    responses = await asyncio.gather(*(run(i, sub) for i, sub in enumerate(batch_request.requests)))
+    return {"responses": responses}
+
+
+@api_router.get("/debug/profiles/{profile_id}")
+async def get_profile(profile_id: str, x_profile: Optional[str] = Header(None)):
+    if not PROFILE_TOKEN or not token_matches(x_profile or '', PROFILE_TOKEN):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    path = resolve_profile(PROFILE_DIR, profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    media_type = "text/plain" if path.suffix == ".folded" else "application/octet-stream"
+    return FileResponse(path, media_type=media_type, filename=profile_id)
+
+
 app.include_router(api_router)
 
 app.add_middleware(
@@ -760,14 +3406,15 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Server-Timing", "X-Profile-Id"],
 )
+app.add_middleware(RequestContextMiddleware)
+
+if PROFILE_TOKEN:
+    app.add_middleware(ProfilingMiddleware, token=PROFILE_TOKEN, output_dir=PROFILE_DIR)
 
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
@@ -0,0 +1,114 @@
+"""
+Benchmark: per-dict payroll loops vs the vectorized analytics module
+Usage: python benchmarks/analytics.py [employees] [weeks]
+
+Both sides start from the documents Mongo would return; the vectorized side
+includes building the column arrays.
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'benchmark')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
+
+import analytics  # noqa: E402
+import server  # noqa: E402
+
+
+def synthetic_data(employee_count, week_count):
+    rng = random.Random(7)
+    employees = [{
+        "id": f"e{i}",
+        "name": f"Employee {i}",
+        "daily_salary": float(rng.randrange(20000, 60000, 500)),
+        "project_id": f"p{i % 12}",
+        "trade": ["Albañil", "Electricista", "Plomero", "Pintor"][i % 4],
+    } for i in range(employee_count)]
+    attendance, advances = [], []
+    first = date(2025, 1, 6)
+    for w in range(week_count):
+        week_start = (first + timedelta(weeks=w)).isoformat()
+        key = server.week_key(week_start)
+        for employee in employees:
+            for d in range(6):
+                status = rng.choices(["present", "late", "absent"], [85, 8, 7])[0]
+                attendance.append({
+                    "employee_id": employee["id"],
+                    "week_start_date": week_start,
+                    "week_key": key,
+                    "status": status,
+                    "late_hours": rng.choice([0.5, 1.0, 2.0]) if status == "late" else 0.0,
+                })
+            if rng.random() < 0.2:
+                advances.append({"employee_id": employee["id"], "week_start_date": week_start,
+                                 "week_key": key, "amount": 5000.0})
+    return employees, attendance, advances
+
+
+def loop_totals(employees, attendance, advances):
+    # The shape of /payments/calculate and /payments/by-project, run once per week
+    weeks = sorted({a["week_start_date"] for a in attendance})
+    totals = {"days_worked": 0, "total_salary": 0.0, "net_payment": 0.0}
+    for week_start in weeks:
+        attendance_records = [a for a in attendance if a["week_start_date"] == week_start]
+        advances_records = [a for a in advances if a["week_start_date"] == week_start]
+        for employee in employees:
+            employee_attendance = [a for a in attendance_records if a['employee_id'] == employee['id']]
+            days_worked = sum(1 for a in employee_attendance if a['status'] in ['present', 'late'])
+            total_late_hours = sum(a.get('late_hours', 0) for a in employee_attendance if a['status'] == 'late')
+            late_discount = total_late_hours * employee['daily_salary'] / 8
+            total_advances = sum(a['amount'] for a in advances_records if a['employee_id'] == employee['id'])
+            total_salary = days_worked * employee['daily_salary'] - late_discount
+            totals["days_worked"] += days_worked
+            totals["total_salary"] += total_salary
+            totals["net_payment"] += total_salary - total_advances
+    return totals
+
+
+async def as_cursor(docs):
+    for doc in docs:
+        yield doc
+
+
+def vectorized_totals(employees, attendance, advances):
+    async def frames():
+        return (
+            await analytics.stream_frame(as_cursor(attendance), analytics.ATTENDANCE_COLUMNS),
+            await analytics.stream_frame(as_cursor(advances), analytics.ADVANCE_COLUMNS),
+        )
+    attendance_frame, advance_frame = asyncio.run(frames())
+    weeks = analytics.employee_weeks(attendance_frame, advance_frame, analytics.employees_frame(employees))
+    return analytics.payroll_metrics(weeks)
+
+
+def cpu_time(func, *args, repeat=3):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.process_time()
+        result = func(*args)
+        best = min(best, time.process_time() - started)
+    return best, result
+
+
+def main():
+    employee_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    week_count = int(sys.argv[2]) if len(sys.argv) > 2 else 52
+    employees, attendance, advances = synthetic_data(employee_count, week_count)
+
+    slow, expected = cpu_time(loop_totals, employees, attendance, advances)
+    fast, metrics = cpu_time(vectorized_totals, employees, attendance, advances)
+    for name, value in expected.items():
+        assert abs(metrics[name] - value) < 1e-6 * max(1.0, abs(value)), name
+
+    print(f"{employee_count} employees x {week_count} weeks ({len(attendance)} attendance rows)")
+    print(f"loops {slow * 1000:9.1f} ms  vectorized {fast * 1000:8.1f} ms  ({slow / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: default response_model serialization vs the FAST_JSON_RESPONSES path
+Usage: python benchmarks/serialization.py [rows]
+"""
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List
+from uuid import uuid4
+
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'benchmark')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
+
+from pydantic import TypeAdapter  # noqa: E402
+
+import server  # noqa: E402
+
+
+def attendance_docs(rows):
+    return [{
+        "id": str(uuid4()),
+        "employee_id": str(uuid4()),
+        "date": "2025-01-06",
+        "status": "present" if i % 5 else "late",
+        "late_hours": 0.0 if i % 5 else 1.5,
+        "week_start_date": "2025-01-06",
+    } for i in range(rows)]
+
+
+def payment_docs(rows):
+    return [{
+        "id": str(uuid4()),
+        "employee_id": str(uuid4()),
+        "week_start_date": "2025-01-06",
+        "days_worked": 5,
+        "total_salary": 150000.0,
+        "total_advances": 20000.0,
+        "net_payment": 130000.0,
+        "paid_at": "2025-01-10T18:00:00+00:00",
+    } for _ in range(rows)]
+
+
+def default_path(model, docs):
+    # What FastAPI does for response_model=List[model]: validate, dump, json.dumps
+    adapter = TypeAdapter(List[model])
+    content = adapter.dump_python(adapter.validate_python(docs), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def fast_path(model, docs):
+    return server.FastJSONResponse(server.trusted_rows(model, docs)).body
+
+
+def cpu_time(func, *args, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.process_time()
+        func(*args)
+        best = min(best, time.process_time() - started)
+    return best
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    for name, model, docs in [
+        ("attendance", server.Attendance, attendance_docs(rows)),
+        ("payments/history", server.PaymentHistory, payment_docs(rows)),
+    ]:
+        assert json.loads(default_path(model, docs)) == json.loads(fast_path(model, docs))
+        slow = cpu_time(default_path, model, docs)
+        fast = cpu_time(fast_path, model, docs)
+        print(f"{name:18} {rows} rows: default {slow * 1000:8.1f} ms  fast {fast * 1000:8.1f} ms  "
+              f"saved {(slow - fast) * 1000:8.1f} ms ({slow / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Helpers for tests that drive backend internals in-process
+They connect to the database named by MONGO_URL / DB_NAME (environment or
+backend/.env), like the backend itself; without them the importing test
+module is skipped.
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from dotenv import load_dotenv
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+load_dotenv(BACKEND_DIR / '.env')
+if not os.environ.get('MONGO_URL') or not os.environ.get('DB_NAME'):
+    pytest.skip("MONGO_URL and DB_NAME are needed for in-process tests", allow_module_level=True)
+
+sys.path.insert(0, str(BACKEND_DIR))
+
+import server  # noqa: E402
+
+
+def run(test):
+    """Run the coroutine function ``test`` with server.db connected and empty caches."""
+    async def main():
+        server.client = server.create_mongo_client()
+        server.db = server.client[os.environ['DB_NAME']]
+        server.collection_versions.versions = {}
+        for name in list(server.entity_caches):
+            server.entity_caches[name] = server.EntityCache(name)
+        try:
+            # Like a request: sync_seq reservations are released when the test body ends
+            async with server.sync_lease_scope():
+                return await test()
+        finally:
+            server.client.close()
+    return asyncio.run(main())
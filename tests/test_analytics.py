@@ -0,0 +1,88 @@
+"""
+Test suite for year-to-date analytics
+Tests: GET /api/analytics/payroll, /api/analytics/project-costs, /api/analytics/absenteeism
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+PERIOD = {"from": "2032-05-03", "to": "2032-05-16"}
+
+
+class TestAnalytics:
+    """Test suite for the vectorized analytics endpoints"""
+
+    @pytest.fixture
+    def project(self):
+        project = requests.post(f"{BASE_URL}/api/projects", json={
+            "name": "TEST_Analytics_Project",
+            "start_date": "2032-05-03"
+        }).json()
+        employee = requests.post(f"{BASE_URL}/api/employees", json={
+            "name": "TEST_Analytics_Employee",
+            "daily_salary": 1000.0,
+            "project_id": project["id"]
+        }).json()
+        days = [
+            ("2032-05-03", "2032-05-03", "present", 0),
+            ("2032-05-04", "2032-05-03", "absent", 0),
+            ("2032-05-10", "2032-05-10", "late", 4),
+            ("2032-05-11", "2032-05-10", "present", 0),
+        ]
+        for day, week, status, late_hours in days:
+            requests.post(f"{BASE_URL}/api/attendance", json={
+                "employee_id": employee["id"],
+                "date": day,
+                "status": status,
+                "late_hours": late_hours,
+                "week_start_date": week
+            })
+        advance = requests.post(f"{BASE_URL}/api/advances", json={
+            "employee_id": employee["id"],
+            "amount": 250.0,
+            "date": "2032-05-05",
+            "week_start_date": "2032-05-03"
+        }).json()
+        yield project
+        requests.delete(f"{BASE_URL}/api/advances/{advance['id']}")
+        requests.delete(f"{BASE_URL}/api/employees/{employee['id']}")
+        requests.delete(f"{BASE_URL}/api/projects/{project['id']}")
+
+    def test_payroll_metrics(self, project):
+        response = requests.get(f"{BASE_URL}/api/analytics/payroll", params=PERIOD)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["from"] == PERIOD["from"]
+        assert data["days_worked"] >= 3
+        assert data["weeks"] == 2
+
+    def test_project_cost_curve(self, project):
+        data = requests.get(f"{BASE_URL}/api/analytics/project-costs", params=PERIOD).json()
+        curve = next(p for p in data["projects"] if p["project_id"] == project["id"])
+        assert curve["weeks"] == ["2032-05-03", "2032-05-10"]
+        assert curve["cost"] == [1000.0, 1500.0]
+        assert curve["cumulative_cost"] == [1000.0, 2500.0]
+
+    def test_absenteeism_by_project(self, project):
+        data = requests.get(f"{BASE_URL}/api/analytics/absenteeism", params={**PERIOD, "group_by": "project"}).json()
+        group = next(g for g in data["groups"] if g["key"] == project["id"])
+        assert group["label"] == "TEST_Analytics_Project"
+        assert group["recorded_days"] == 4
+        assert group["absence_rate"] == 0.25
+        assert group["lateness_rate"] == 0.25
+        assert group["late_hours_per_late"] == 4.0
+
+    def test_year_to_date_default(self):
+        response = requests.get(f"{BASE_URL}/api/analytics/payroll")
+        assert response.status_code == 200
+        assert response.json()["from"].endswith(("-12-29", "-12-30", "-12-31", "-01-01", "-01-02", "-01-03", "-01-04"))
+
+    def test_unknown_group_rejected(self):
+        response = requests.get(f"{BASE_URL}/api/analytics/absenteeism", params={"group_by": "week"})
+        assert response.status_code == 400
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
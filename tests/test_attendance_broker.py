@@ -0,0 +1,67 @@
+"""
+Test suite for the in-process attendance broker
+Tests: fan-out by week, slow consumers resynced instead of blocking, unsubscribe
+"""
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
+from broker import AttendanceBroker  # noqa: E402
+
+
+def record(date, week="2025-01-06", status="present"):
+    return {"id": f"day-{date}", "employee_id": "e1", "date": date, "status": status,
+            "late_hours": 0.0, "week_start_date": week}
+
+
+class TestAttendanceBroker:
+    """Test suite for AttendanceBroker"""
+
+    def test_publish_fans_out_by_week(self):
+        """Every subscriber of the record's week gets the delta; other weeks get nothing"""
+        broker = AttendanceBroker()
+        first, second = broker.subscribe("2025-01-06"), broker.subscribe("2025-01-06")
+        other = broker.subscribe("2025-01-13")
+        broker.publish({**record("2025-01-07"), "sync_seq": 12})
+
+        expected = {"id": "day-2025-01-07", "employee_id": "e1", "date": "2025-01-07",
+                    "status": "present", "late_hours": 0.0}
+        assert first.get_nowait() == expected
+        assert second.get_nowait() == expected
+        assert other.empty()
+
+    def test_full_queue_is_replaced_by_resync(self):
+        """A subscriber that falls behind loses its backlog and gets a single resync marker"""
+        broker = AttendanceBroker(queue_size=2)
+        slow = broker.subscribe("2025-01-06")
+        for date in ("2025-01-06", "2025-01-07", "2025-01-08"):
+            broker.publish(record(date))
+        assert slow.qsize() == 1
+        assert slow.get_nowait() is None
+
+        # Delivery resumes after the resync
+        broker.publish(record("2025-01-09"))
+        assert slow.get_nowait()["date"] == "2025-01-09"
+
+    def test_resync_week(self):
+        broker = AttendanceBroker()
+        queue = broker.subscribe("2025-01-06")
+        broker.publish(record("2025-01-06"))
+        broker.resync("2025-01-06")
+        broker.resync("2025-01-13")
+        assert queue.qsize() == 1
+        assert queue.get_nowait() is None
+
+    def test_unsubscribe(self):
+        broker = AttendanceBroker()
+        queue = broker.subscribe("2025-01-06")
+        broker.unsubscribe("2025-01-06", queue)
+        broker.unsubscribe("2025-01-06", queue)
+        broker.publish(record("2025-01-07"))
+        assert queue.empty()
+        assert broker._subscribers == {}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
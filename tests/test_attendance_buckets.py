@@ -0,0 +1,169 @@
+"""
+Test suite for the bucketed attendance layout
+Tests: flatten round-trip, upsert (including a lost race for a new day), bulk_upsert, migrate-attendance
+"""
+import pytest
+from uuid import uuid4
+
+from tests.in_process import run, server
+
+import manage  # noqa: E402
+
+WEEK = "2025-01-06"
+DAYS = ["2025-01-06", "2025-01-07", "2025-01-08"]
+
+
+def record(employee_id, date, status="present", late_hours=0.0):
+    return {"employee_id": employee_id, "date": date, "status": status,
+            "late_hours": late_hours, "week_start_date": WEEK}
+
+
+def new_employee_id():
+    return f"TEST_Bucket_{uuid4().hex}"
+
+
+class TestBucketedStore:
+    """Test suite for BucketedAttendanceStore"""
+
+    def test_upsert_round_trip(self):
+        """Upserted days come back from find() as per-day records; re-upserting keeps the id"""
+        async def scenario():
+            store = server.BucketedAttendanceStore()
+            employee_id = new_employee_id()
+            created = [await store.upsert(record(employee_id, date)) for date in DAYS]
+            updated = await store.upsert(record(employee_id, DAYS[1], "late", 2.0))
+
+            assert updated["id"] == created[1]["id"]
+            records = await store.find({"employee_id": employee_id})
+            assert [r["date"] for r in records] == DAYS
+            assert {r["id"] for r in records} == {r["id"] for r in created}
+            by_date = {r["date"]: r for r in records}
+            assert by_date[DAYS[1]]["status"] == "late"
+            assert by_date[DAYS[1]]["late_hours"] == 2.0
+            assert all(r["week_start_date"] == WEEK and r["employee_id"] == employee_id for r in records)
+
+            bucket = await server.db.attendance_weeks.find_one({"employee_id": employee_id})
+            assert bucket["id"] == f"{employee_id}:{WEEK}"
+            assert bucket["week_key"] == server.week_key(WEEK)
+            assert store.flatten([bucket]) == records
+            await server.db.attendance_weeks.delete_many({"employee_id": employee_id})
+        run(scenario)
+
+    def test_upsert_after_losing_race_for_new_day(self, monkeypatch):
+        """A day pushed by another writer after our miss is updated, not appended twice"""
+        async def scenario():
+            await server.ensure_indexes()
+            store = server.BucketedAttendanceStore()
+            employee_id = new_employee_id()
+            await store.upsert(record(employee_id, DAYS[0]))
+
+            collection_type = type(server.db.attendance_weeks)
+            original = collection_type.find_one_and_update
+            raced = []
+
+            async def find_one_and_update(self, filter, update, *args, **kwargs):
+                if not raced and filter.get("days.date") == DAYS[1]:
+                    # Our in-place update misses, then another writer adds the day
+                    raced.append(True)
+                    await original(self, {"employee_id": employee_id, "week_start_date": WEEK},
+                                   {"$push": {"days": {"id": "other-writer", "date": DAYS[1],
+                                                       "status": "absent", "late_hours": 0.0}}})
+                    return None
+                return await original(self, filter, update, *args, **kwargs)
+            monkeypatch.setattr(collection_type, "find_one_and_update", find_one_and_update)
+
+            saved = await store.upsert(record(employee_id, DAYS[1], "late", 1.0))
+            monkeypatch.undo()
+
+            assert raced
+            assert saved["id"] == "other-writer"
+            assert saved["status"] == "late"
+            bucket = await server.db.attendance_weeks.find_one({"employee_id": employee_id})
+            assert [day["date"] for day in bucket["days"]] == DAYS[:2]
+            await server.db.attendance_weeks.delete_many({"employee_id": employee_id})
+        run(scenario)
+
+    def test_bulk_upsert(self):
+        """bulk_upsert counts inserts and updates, keeps existing ids and sorts days"""
+        async def scenario():
+            store = server.BucketedAttendanceStore()
+            employee_id = new_employee_id()
+            existing = await store.upsert(record(employee_id, DAYS[1]))
+
+            inserted, updated = await store.bulk_upsert([
+                record(employee_id, DAYS[2]),
+                record(employee_id, DAYS[1], "absent"),
+                record(employee_id, DAYS[0], "late", 0.5),
+            ])
+            assert (inserted, updated) == (2, 1)
+
+            records = await store.find({"employee_id": employee_id})
+            assert [r["date"] for r in records] == DAYS
+            by_date = {r["date"]: r for r in records}
+            assert by_date[DAYS[1]]["id"] == existing["id"]
+            assert by_date[DAYS[1]]["status"] == "absent"
+            assert by_date[DAYS[0]]["late_hours"] == 0.5
+            await server.db.attendance_weeks.delete_many({"employee_id": employee_id})
+        run(scenario)
+
+    def test_find_filters_days_and_limits(self):
+        """Day-level filters match single days and the limit counts days, not buckets"""
+        async def scenario():
+            store = server.BucketedAttendanceStore()
+            employee_id = new_employee_id()
+            await store.bulk_upsert([
+                record(employee_id, DAYS[0]),
+                record(employee_id, DAYS[1], "late", 1.0),
+                record(employee_id, DAYS[2]),
+            ])
+
+            late = await store.find({"employee_id": employee_id, "status": "late"})
+            assert [(r["date"], r["late_hours"]) for r in late] == [(DAYS[1], 1.0)]
+            assert [r["date"] for r in await store.find({"employee_id": employee_id, "date": DAYS[2]})] == [DAYS[2]]
+            assert [r["date"] for r in await store.find({"employee_id": employee_id}, 2)] == DAYS[:2]
+            assert await store.find({"employee_id": employee_id, "status": "absent"}) == []
+            await server.db.attendance_weeks.delete_many({"employee_id": employee_id})
+        run(scenario)
+
+
+class TestMigrateAttendance:
+    """Test suite for the migrate-attendance command"""
+
+    def test_daily_to_bucketed_and_back(self):
+        """Records keep their ids and fields through a round trip between layouts"""
+        employee_id = new_employee_id()
+        daily = [
+            {**record(employee_id, date, "late" if i == 2 else "present", 1.5 if i == 2 else 0.0),
+             "id": str(uuid4()), "updated_at": "2025-01-08T00:00:00+00:00"}
+            for i, date in enumerate(DAYS)
+        ]
+
+        async def seed():
+            await server.db.attendance.insert_many([dict(r) for r in daily])
+        run(seed)
+
+        manage.migrate_attendance(to="bucketed", batch_size=2, drop_source=False)
+
+        async def check_buckets():
+            buckets = await server.db.attendance_weeks.find({"employee_id": employee_id}, {"_id": 0}).to_list(None)
+            assert len(buckets) == 1
+            assert buckets[0]["week_key"] == server.week_key(WEEK)
+            assert [(d["id"], d["date"], d["status"], d["late_hours"]) for d in buckets[0]["days"]] == \
+                [(r["id"], r["date"], r["status"], r["late_hours"]) for r in daily]
+            await server.db.attendance.delete_many({"employee_id": employee_id})
+        run(check_buckets)
+
+        manage.migrate_attendance(to="daily", batch_size=2, drop_source=False)
+
+        async def check_daily():
+            records = await server.db.attendance.find({"employee_id": employee_id}, {"_id": 0}).sort("date", 1).to_list(None)
+            assert [(r["id"], r["date"], r["status"], r["late_hours"], r["week_start_date"]) for r in records] == \
+                [(r["id"], r["date"], r["status"], r["late_hours"], r["week_start_date"]) for r in daily]
+            assert all(r["week_key"] == server.week_key(WEEK) for r in records)
+            await server.db.attendance.delete_many({"employee_id": employee_id})
+            await server.db.attendance_weeks.delete_many({"employee_id": employee_id})
+        run(check_daily)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,98 @@
+"""
+Test suite for live attendance updates
+Tests: GET /api/attendance/week/{week_start}/stream delivers deltas and resync events
+"""
+import json
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+WEEK = "2034-03-06"
+
+
+def next_event(lines):
+    """The next (event, data) pair from an SSE line iterator, skipping comments"""
+    event, data = None, None
+    for line in lines:
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            data = json.loads(line[len("data: "):])
+        elif line == "" and event is not None:
+            return event, data
+    raise AssertionError("stream ended without an event")
+
+
+class TestAttendanceStream:
+    """Test suite for the attendance SSE stream"""
+
+    @pytest.fixture
+    def employee(self):
+        employee = requests.post(f"{BASE_URL}/api/employees", json={
+            "name": "TEST_Stream_Employee",
+            "daily_salary": 1000.0
+        }).json()
+        yield employee
+        requests.delete(f"{BASE_URL}/api/employees/{employee['id']}")
+
+    def open_stream(self, week=WEEK):
+        response = requests.get(f"{BASE_URL}/api/attendance/week/{week}/stream", stream=True, timeout=20)
+        assert response.status_code == 200
+        assert response.headers["Content-Type"].startswith("text/event-stream")
+        lines = response.iter_lines(chunk_size=1, decode_unicode=True)
+        assert next(lines) == "retry: 3000"
+        return response, lines
+
+    def test_write_is_delivered(self, employee):
+        """A saved attendance day reaches subscribers of its week as an attendance event"""
+        response, lines = self.open_stream()
+        try:
+            saved = requests.post(f"{BASE_URL}/api/attendance", json={
+                "employee_id": employee["id"],
+                "date": "2034-03-08",
+                "status": "late",
+                "late_hours": 1.5,
+                "week_start_date": WEEK
+            }).json()
+            event, data = next_event(lines)
+            assert event == "attendance"
+            assert data == {
+                "id": saved["id"], "employee_id": employee["id"], "date": "2034-03-08",
+                "status": "late", "late_hours": 1.5
+            }
+        finally:
+            response.close()
+
+    def test_bulk_import_sends_resync(self, employee):
+        """Bulk imports ask subscribers to refetch the week instead of sending each row"""
+        response, lines = self.open_stream()
+        try:
+            csv = f"employee_id,date,status\n{employee['id']},2034-03-07,present\n{employee['id']},2034-03-09,absent\n"
+            result = requests.post(f"{BASE_URL}/api/import/attendance", files={"file": ("a.csv", csv.encode())})
+            assert result.status_code == 200
+            assert next_event(lines) == ("resync", {})
+        finally:
+            response.close()
+
+    def test_other_weeks_are_not_delivered(self, employee):
+        """Subscribers only get records of the week they subscribed to"""
+        response, lines = self.open_stream("2034-03-13")
+        try:
+            requests.post(f"{BASE_URL}/api/attendance", json={
+                "employee_id": employee["id"], "date": "2034-03-08", "status": "present", "week_start_date": WEEK
+            })
+            saved = requests.post(f"{BASE_URL}/api/attendance", json={
+                "employee_id": employee["id"], "date": "2034-03-14", "status": "absent",
+                "week_start_date": "2034-03-13"
+            }).json()
+            event, data = next_event(lines)
+            assert event == "attendance"
+            assert data["id"] == saved["id"]
+        finally:
+            response.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,82 @@
+"""
+Test suite for batched sub-requests
+Tests: POST /api/batch
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestBatchAPI:
+    """Test suite for the batch endpoint"""
+
+    def test_batch_returns_each_result(self):
+        """Each sub-request result matches the equivalent direct GET"""
+        response = requests.post(f"{BASE_URL}/api/batch", json={"requests": [
+            {"id": "employees", "path": "/api/employees"},
+            {"id": "week", "path": "/api/attendance/week/2025-01-06"},
+            {"id": "history", "path": "/api/payments/history"},
+        ]})
+
+        assert response.status_code == 200
+        results = {r["id"]: r for r in response.json()["responses"]}
+        assert set(results) == {"employees", "week", "history"}
+        for result in results.values():
+            assert result["status"] == 200
+            assert isinstance(result["body"], list)
+        assert results["employees"]["body"] == requests.get(f"{BASE_URL}/api/employees").json()
+        assert results["employees"]["etag"]
+
+    def test_per_item_status(self):
+        """A failing sub-request does not fail the batch"""
+        response = requests.post(f"{BASE_URL}/api/batch", json={"requests": [
+            {"path": "/api/employees/does-not-exist"},
+            {"path": "/api/sync", "params": {"collections": "projects"}},
+        ]})
+
+        assert response.status_code == 200
+        first, second = response.json()["responses"]
+        assert first["id"] == "0"
+        assert first["status"] == 404
+        assert first["body"]["detail"] == "Employee not found"
+        assert second["status"] == 200
+        assert "projects" in second["body"]["changes"]
+
+    def test_rejects_non_api_and_nested_batch(self):
+        response = requests.post(f"{BASE_URL}/api/batch", json={"requests": [
+            {"path": "/docs"},
+            {"path": "/api/batch"},
+        ]})
+        assert [r["status"] for r in response.json()["responses"]] == [400, 400]
+
+    def test_rejects_non_json_endpoints(self):
+        """Streams and binary exports can't be carried in a JSON batch"""
+        response = requests.post(f"{BASE_URL}/api/batch", json={"requests": [
+            {"path": "/api/export/employees"},
+            {"path": "/api/export/employees", "params": {"format": "arrow"}},
+            {"path": "/api/attendance/week/2025-01-06/stream"},
+        ]})
+        assert response.status_code == 200
+        assert [r["status"] for r in response.json()["responses"]] == [400, 400, 400]
+
+    def test_percent_encoded_path(self):
+        response = requests.post(f"{BASE_URL}/api/batch", json={"requests": [
+            {"path": "/api/attendance/week/2025%2D01%2D06"},
+            {"path": "/api/%62atch"},
+        ]})
+        week, nested = response.json()["responses"]
+        assert week["status"] == 200
+        assert week["body"] == requests.get(f"{BASE_URL}/api/attendance/week/2025-01-06").json()
+        assert nested["status"] == 400
+
+    def test_rejects_oversized_batch(self):
+        response = requests.post(f"{BASE_URL}/api/batch", json={
+            "requests": [{"path": "/api/"}] * 1000
+        })
+        assert response.status_code == 400
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,125 @@
+"""
+Test suite for bulk writes
+Tests: POST /api/employees/bulk-update, POST /api/advances/bulk, sync pages around bulk sequences
+"""
+import pytest
+import requests
+import os
+from uuid import uuid4
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestBulkEmployees:
+    """Test suite for bulk employee updates"""
+
+    @pytest.fixture
+    def crew(self):
+        trade = f"TEST_Bulk_{uuid4().hex[:8]}"
+        employees = [
+            requests.post(f"{BASE_URL}/api/employees", json={
+                "name": f"TEST_Bulk_{i}", "daily_salary": 1000.0 + i * 100, "trade": trade, "project_id": "TEST_Bulk_A"
+            }).json()
+            for i in range(3)
+        ]
+        yield trade, employees
+        for employee in employees:
+            requests.delete(f"{BASE_URL}/api/employees/{employee['id']}")
+
+    def bulk_update(self, body):
+        return requests.post(f"{BASE_URL}/api/employees/bulk-update", json=body)
+
+    def get(self, employee):
+        return requests.get(f"{BASE_URL}/api/employees/{employee['id']}").json()
+
+    def test_raise_for_a_trade(self, crew):
+        """salary_factor multiplies the salary of everyone in the trade"""
+        trade, employees = crew
+        response = self.bulk_update({"filter": {"trade": trade}, "salary_factor": 1.1})
+        assert response.status_code == 200
+        assert response.json() == {"matched": 3, "modified": 3}
+        for employee in employees:
+            assert self.get(employee)["daily_salary"] == pytest.approx(employee["daily_salary"] * 1.1)
+
+    def test_move_and_deactivate(self, crew):
+        trade, employees = crew
+        response = self.bulk_update({"filter": {"trade": trade, "project_id": "TEST_Bulk_A"},
+                                     "patch": {"project_id": "TEST_Bulk_B"}})
+        assert response.json()["modified"] == 3
+        assert {self.get(e)["project_id"] for e in employees} == {"TEST_Bulk_B"}
+
+        ids = [employees[0]["id"], employees[1]["id"]]
+        response = self.bulk_update({"filter": {"ids": ids}, "patch": {"is_active": False}})
+        assert response.json() == {"matched": 2, "modified": 2}
+        assert [self.get(e)["is_active"] for e in employees] == [False, False, True]
+
+        # The list endpoint reflects bulk writes immediately
+        listed = {e["id"]: e for e in requests.get(f"{BASE_URL}/api/employees").json()}
+        assert listed[employees[0]["id"]]["is_active"] is False
+
+    def test_invalid_requests(self, crew):
+        trade, _ = crew
+        assert self.bulk_update({"filter": {}, "patch": {"is_active": False}}).status_code == 400
+        assert self.bulk_update({"filter": {"trade": trade}}).status_code == 400
+        conflicting = {"filter": {"trade": trade}, "patch": {"daily_salary": 5.0}, "salary_factor": 2}
+        assert self.bulk_update(conflicting).status_code == 400
+        assert self.bulk_update({"filter": {"trade": trade}, "salary_factor": 0}).status_code == 422
+
+    def test_sync_pages_keep_bulk_sequences_together(self, crew):
+        """Documents stamped by one bulk write come back in the same sync page"""
+        trade, employees = crew
+        token = requests.get(f"{BASE_URL}/api/sync", params={"collections": "employees"}).json()["token"]
+        self.bulk_update({"filter": {"trade": trade}, "patch": {"is_active": False}})
+
+        data = requests.get(f"{BASE_URL}/api/sync", params={
+            "since": token, "collections": "employees", "limit": 1
+        }).json()
+        assert sorted(e["id"] for e in data["changes"]["employees"]) == sorted(e["id"] for e in employees)
+        data = requests.get(f"{BASE_URL}/api/sync", params={
+            "since": data["token"], "collections": "employees", "limit": 1
+        }).json()
+        assert data["changes"]["employees"] == []
+
+
+class TestBulkAdvances:
+    """Test suite for bulk advance creation"""
+
+    @pytest.fixture
+    def employees(self):
+        employees = [
+            requests.post(f"{BASE_URL}/api/employees", json={"name": f"TEST_BulkAdv_{i}", "daily_salary": 1000.0}).json()
+            for i in range(2)
+        ]
+        yield employees
+        for employee in employees:
+            requests.delete(f"{BASE_URL}/api/employees/{employee['id']}")
+
+    def test_create_many(self, employees):
+        response = requests.post(f"{BASE_URL}/api/advances/bulk", json={"advances": [
+            {"employee_id": employee["id"], "amount": 500.0, "date": "2035-05-09", "week_start_date": "2035-05-09"}
+            for employee in employees
+        ]})
+        assert response.status_code == 200
+        result = response.json()
+        assert result["inserted"] == 2
+        for employee, advance_id in zip(employees, result["ids"]):
+            [advance] = requests.get(f"{BASE_URL}/api/advances/employee/{employee['id']}").json()
+            assert advance["id"] == advance_id
+            assert advance["week_start_date"] == "2035-05-07"
+            requests.delete(f"{BASE_URL}/api/advances/{advance_id}")
+
+    def test_unknown_employee_rejects_the_batch(self, employees):
+        response = requests.post(f"{BASE_URL}/api/advances/bulk", json={"advances": [
+            {"employee_id": employees[0]["id"], "amount": 500.0, "date": "2035-05-09", "week_start_date": "2035-05-05"},
+            {"employee_id": "TEST_BulkAdv_missing", "amount": 500.0, "date": "2035-05-09", "week_start_date": "2035-05-05"},
+        ]})
+        assert response.status_code == 400
+        assert "TEST_BulkAdv_missing" in response.json()["detail"]
+        assert requests.get(f"{BASE_URL}/api/advances/employee/{employees[0]['id']}").json() == []
+
+    def test_empty_batch(self):
+        assert requests.post(f"{BASE_URL}/api/advances/bulk", json={"advances": []}).status_code == 422
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
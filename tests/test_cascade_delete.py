@@ -0,0 +1,93 @@
+"""
+Test suite for cascading deletes
+Tests: deleting an employee, contractor or project schedules a job that cleans up dependent records; GET /api/jobs/{id}
+"""
+import pytest
+import requests
+import os
+import time
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+WEEK = "2038-08-02"
+
+
+def wait_for_job(job_id):
+    for _ in range(100):
+        job = requests.get(f"{BASE_URL}/api/jobs/{job_id}").json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish: {job}")
+
+
+class TestCascadeDelete:
+    """Test suite for dependent-record cleanup jobs"""
+
+    def test_employee(self):
+        employee = requests.post(f"{BASE_URL}/api/employees", json={"name": "TEST_Cascade_Employee", "daily_salary": 1000.0}).json()
+        for day in ("2038-08-02", "2038-08-03", "2038-08-10"):
+            requests.post(f"{BASE_URL}/api/attendance", json={
+                "employee_id": employee["id"], "date": day, "status": "present",
+                "week_start_date": "2038-08-09" if day == "2038-08-10" else WEEK
+            })
+        requests.post(f"{BASE_URL}/api/advances", json={
+            "employee_id": employee["id"], "amount": 100.0, "date": WEEK, "week_start_date": WEEK
+        })
+        token = requests.get(f"{BASE_URL}/api/sync", params={"collections": "attendance,advances"}).json()["token"]
+        attendance_ids = [
+            a["id"] for a in requests.get(f"{BASE_URL}/api/attendance/week/{WEEK}").json()
+            if a["employee_id"] == employee["id"]
+        ]
+
+        response = requests.delete(f"{BASE_URL}/api/employees/{employee['id']}")
+        assert response.status_code == 200
+        job = wait_for_job(response.json()["job_id"])
+        assert job["status"] == "done"
+        assert job["type"] == "cascade_delete"
+        assert job["result"] == {"attendance": 3, "advances": 1}
+        assert job["progress"]["done"] == job["progress"]["total"] > 0
+
+        week = requests.get(f"{BASE_URL}/api/attendance/week/{WEEK}").json()
+        assert not [a for a in week if a["employee_id"] == employee["id"]]
+        assert requests.get(f"{BASE_URL}/api/advances/employee/{employee['id']}").json() == []
+        # Sync clients are told about the removed records
+        deleted = requests.get(f"{BASE_URL}/api/sync", params={
+            "since": token, "collections": "attendance,advances"
+        }).json()["deleted"]
+        assert set(attendance_ids) <= set(deleted["attendance"])
+        assert len(deleted["advances"]) >= 1
+
+    def test_contractor(self):
+        contractor = requests.post(f"{BASE_URL}/api/contractors", json={
+            "name": "TEST_Cascade_Contractor", "weekly_payment": 100.0, "project_name": "TEST_Cascade", "budget": 1000.0
+        }).json()
+        for amount in (100.0, 200.0):
+            requests.post(f"{BASE_URL}/api/certifications", json={
+                "contractor_id": contractor["id"], "amount": amount, "week_start_date": WEEK
+            })
+        response = requests.delete(f"{BASE_URL}/api/contractors/{contractor['id']}")
+        job = wait_for_job(response.json()["job_id"])
+        assert job["result"] == {"certifications": 2}
+        assert requests.get(f"{BASE_URL}/api/certifications/contractor/{contractor['id']}").json() == []
+
+    def test_project_unassigns_employees(self):
+        project = requests.post(f"{BASE_URL}/api/projects", json={"name": "TEST_Cascade_Project", "start_date": WEEK}).json()
+        employee = requests.post(f"{BASE_URL}/api/employees", json={
+            "name": "TEST_Cascade_Assigned", "daily_salary": 1000.0, "project_id": project["id"]
+        }).json()
+        try:
+            response = requests.delete(f"{BASE_URL}/api/projects/{project['id']}")
+            job = wait_for_job(response.json()["job_id"])
+            assert job["result"] == {"employees_unassigned": 1}
+            assert requests.get(f"{BASE_URL}/api/employees/{employee['id']}").json()["project_id"] is None
+        finally:
+            requests.delete(f"{BASE_URL}/api/employees/{employee['id']}")
+
+    def test_missing(self):
+        assert requests.delete(f"{BASE_URL}/api/employees/TEST_Cascade_missing").status_code == 404
+        assert requests.get(f"{BASE_URL}/api/jobs/TEST_Cascade_missing").status_code == 404
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,40 @@
+"""
+Test suite for the daily attendance layout
+Tests: upsert of an existing day rewrites its week to the canonical Monday
+"""
+import pytest
+from uuid import uuid4
+
+from tests.in_process import run, server
+
+
+class TestDailyStore:
+    """Test suite for DailyAttendanceStore"""
+
+    def test_upsert_moves_existing_day_to_canonical_week(self):
+        """A day saved under a mid-week week_start_date is moved to the Monday on update"""
+        async def scenario():
+            store = server.DailyAttendanceStore()
+            employee_id = f"TEST_Daily_{uuid4().hex}"
+            # Saved before week starts were normalized
+            await server.db.attendance.insert_one({
+                "id": "legacy-day", "employee_id": employee_id, "date": "2025-01-08", "status": "present",
+                "late_hours": 0.0, "week_start_date": "2025-01-08", "updated_at": "2025-01-08T00:00:00+00:00",
+            })
+            saved = await store.upsert({
+                "employee_id": employee_id, "date": "2025-01-08", "status": "late", "late_hours": 1.0,
+                "week_start_date": server.canonical_week_start("2025-01-08"),
+            })
+
+            assert saved["id"] == "legacy-day"
+            assert saved["week_start_date"] == "2025-01-06"
+            week = await store.find_week("2025-01-06")
+            assert [r["id"] for r in week if r["employee_id"] == employee_id] == ["legacy-day"]
+            stored = await server.db.attendance.find_one({"id": "legacy-day"})
+            assert stored["week_key"] == server.week_key("2025-01-06")
+            await server.db.attendance.delete_many({"employee_id": employee_id})
+        run(scenario)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,80 @@
+"""
+Test suite for employee search
+Tests: GET /api/employees with q, project_id, trade, is_active, sort and limit
+"""
+import pytest
+import requests
+import os
+from uuid import uuid4
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestEmployeeSearch:
+    """Test suite for server-side employee filtering"""
+
+    @pytest.fixture
+    def roster(self):
+        # A made-up surname keeps the search to this test's employees
+        tag = f"zq{uuid4().hex[:8]}"
+        trade = f"TEST_Search_{tag}"
+        people = [
+            ("José Pérez", 1200.0, "TEST_Search_A"),
+            ("Josefina Álvarez", 1500.0, "TEST_Search_A"),
+            ("Juan Peña", 900.0, "TEST_Search_B"),
+        ]
+        employees = [
+            requests.post(f"{BASE_URL}/api/employees", json={
+                "name": f"{name} {tag}", "daily_salary": salary, "trade": trade, "project_id": project_id
+            }).json()
+            for name, salary, project_id in people
+        ]
+        yield tag, trade, employees
+        for employee in employees:
+            requests.delete(f"{BASE_URL}/api/employees/{employee['id']}")
+
+    def search(self, **params):
+        response = requests.get(f"{BASE_URL}/api/employees", params=params)
+        assert response.status_code == 200
+        return [e["name"].rsplit(" ", 1)[0] for e in response.json()]
+
+    def test_prefix_search_ignores_accents_and_case(self, roster):
+        tag, _, _ = roster
+        assert set(self.search(q=f"{tag} jose")) == {"José Pérez", "Josefina Álvarez"}
+        assert self.search(q=f"{tag} JOSE PER") == ["José Pérez"]
+        assert self.search(q=f"{tag} alv") == ["Josefina Álvarez"]
+        assert self.search(q=f"{tag} pena") == ["Juan Peña"]
+        assert self.search(q=f"{tag} erez") == []
+
+    def test_filters(self, roster):
+        tag, trade, employees = roster
+        assert self.search(trade=trade, project_id="TEST_Search_B") == ["Juan Peña"]
+        requests.put(f"{BASE_URL}/api/employees/{employees[0]['id']}", json={"is_active": False})
+        assert self.search(trade=trade, is_active="false") == ["José Pérez"]
+        assert self.search(trade=trade, is_active="true") == ["Josefina Álvarez", "Juan Peña"]
+
+    def test_renamed_employee_is_found_by_new_name(self, roster):
+        tag, _, employees = roster
+        requests.put(f"{BASE_URL}/api/employees/{employees[2]['id']}", json={"name": f"Joaquín Peña {tag}"})
+        assert self.search(q=f"{tag} joaq") == ["Joaquín Peña"]
+        assert self.search(q=f"{tag} juan") == []
+
+    def test_sort_and_limit(self, roster):
+        _, trade, _ = roster
+        assert self.search(trade=trade, sort="-daily_salary") == ["Josefina Álvarez", "José Pérez", "Juan Peña"]
+        assert self.search(trade=trade, sort="daily_salary", limit=2) == ["Juan Peña", "José Pérez"]
+
+    def test_invalid_parameters(self):
+        assert requests.get(f"{BASE_URL}/api/employees", params={"sort": "password"}).status_code == 400
+        assert requests.get(f"{BASE_URL}/api/employees", params={"limit": 0}).status_code == 422
+
+    def test_etag_depends_on_query(self, roster):
+        _, trade, _ = roster
+        everyone = requests.get(f"{BASE_URL}/api/employees")
+        filtered = requests.get(f"{BASE_URL}/api/employees", params={"trade": trade})
+        assert everyone.headers["ETag"] != filtered.headers["ETag"]
+        assert len(filtered.json()) == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,149 @@
+"""
+Test suite for the process-wide entity caches
+Tests: write-through on writes, reload after another worker's write, concurrent writes, contractor totals under stale caches
+"""
+import asyncio
+import pytest
+from uuid import uuid4
+
+from tests.in_process import run, server
+
+
+async def insert_contractor(total_paid=0.0):
+    contractor = {
+        "id": f"TEST_Cache_{uuid4().hex}", "name": "TEST_Cache_Contractor", "weekly_payment": 100.0,
+        "project_name": "TEST_Cache_Project", "budget": 10000.0, "total_paid": total_paid,
+        "created_at": "2025-01-06T00:00:00+00:00", "is_active": True,
+    }
+    await server.db.contractors.insert_one(dict(contractor))
+    await server.entity_written("contractors", contractor["id"])
+    return contractor
+
+
+class TestEntityCache:
+    """Test suite for EntityCache and entity_written"""
+
+    def test_write_through(self):
+        """Writes through the API update the loaded cache in place"""
+        async def scenario():
+            cache = server.entity_caches["employees"]
+            await cache.load()
+            employee = await server.create_employee(server.EmployeeCreate(name="TEST_Cache_Employee", daily_salary=900.0))
+            assert cache.get(employee.id)["daily_salary"] == 900.0
+            assert not cache.is_stale()
+
+            await server.update_employee(employee.id, server.EmployeeUpdate(daily_salary=950.0))
+            assert cache.get(employee.id)["daily_salary"] == 950.0
+
+            await server.delete_employee(employee.id)
+            assert cache.get(employee.id) is None
+            assert not cache.is_stale()
+        run(scenario)
+
+    def test_other_worker_write_reloads(self):
+        """A version bump this process didn't make marks the cache stale until reloaded"""
+        async def scenario():
+            cache = server.entity_caches["projects"]
+            await cache.load()
+            project_id = f"TEST_Cache_{uuid4().hex}"
+            # Another worker: writes the document and bumps the shared version directly
+            await server.db.projects.insert_one({
+                "id": project_id, "name": "TEST_Cache_Project", "start_date": "2025-01-06",
+                "created_at": "2025-01-06T00:00:00+00:00",
+            })
+            await server.db.collection_versions.update_one({"_id": "projects"}, {"$inc": {"version": 1}}, upsert=True)
+
+            await server.collection_versions.load()
+            assert cache.is_stale()
+            await cache.load()
+            assert cache.get(project_id)["name"] == "TEST_Cache_Project"
+            await server.db.projects.delete_one({"id": project_id})
+        run(scenario)
+
+    def test_version_gap_reloads_on_write(self):
+        """A local write after a missed remote write reloads instead of patching"""
+        async def scenario():
+            cache = server.entity_caches["projects"]
+            await cache.load()
+            project_id = f"TEST_Cache_{uuid4().hex}"
+            await server.db.projects.insert_one({
+                "id": project_id, "name": "TEST_Cache_Remote", "start_date": "2025-01-06",
+                "created_at": "2025-01-06T00:00:00+00:00",
+            })
+            await server.db.collection_versions.update_one({"_id": "projects"}, {"$inc": {"version": 1}}, upsert=True)
+
+            created = await server.create_project(server.ProjectCreate(name="TEST_Cache_Local", start_date="2025-01-06"))
+            assert cache.get(project_id) is not None
+            assert cache.get(created.id) is not None
+            await server.db.projects.delete_many({"id": {"$in": [project_id, created.id]}})
+        run(scenario)
+
+    def test_concurrent_writes_apply_in_order(self, monkeypatch):
+        """A write that reads its document back doesn't overwrite a later write to the same document"""
+        async def scenario():
+            cache = server.entity_caches["projects"]
+            await cache.load()
+            project = {"id": f"TEST_Cache_{uuid4().hex}", "name": "TEST_Cache_First", "start_date": "2025-01-06",
+                       "created_at": "2025-01-06T00:00:00+00:00"}
+            await server.db.projects.insert_one(dict(project))
+
+            collection_type = type(server.db.projects)
+            original = collection_type.find_one
+
+            async def slow_find_one(self, *args, **kwargs):
+                doc = await original(self, *args, **kwargs)
+                await asyncio.sleep(0.05)
+                return doc
+            monkeypatch.setattr(collection_type, "find_one", slow_find_one)
+
+            version = cache.version
+            renamed = {**project, "name": "TEST_Cache_Second"}
+            await asyncio.gather(
+                cache.written(version + 1, project["id"], None, False),
+                cache.written(version + 2, project["id"], renamed, False),
+            )
+            monkeypatch.undo()
+            assert cache.version == version + 2
+            assert cache.get(project["id"])["name"] == "TEST_Cache_Second"
+            await server.db.projects.delete_one({"id": project["id"]})
+        run(scenario)
+
+
+class TestContractorTotals:
+    """total_paid is changed in the database, not from the cached copy"""
+
+    def test_certifications_add_to_stored_total(self):
+        async def scenario():
+            await server.entity_caches["contractors"].load()
+            contractor = await insert_contractor(total_paid=100.0)
+            # Another worker certifies 50; this process's cache still says 100
+            await server.db.contractors.update_one({"id": contractor["id"]}, {"$inc": {"total_paid": 50.0}})
+
+            certification = await server.create_certification(server.ContractorCertificationCreate(
+                contractor_id=contractor["id"], week_start_date="2025-01-06", amount=25.0
+            ))
+            stored = await server.db.contractors.find_one({"id": contractor["id"]})
+            assert stored["total_paid"] == 175.0
+
+            await server.delete_certification(certification.id)
+            stored = await server.db.contractors.find_one({"id": contractor["id"]})
+            assert stored["total_paid"] == 150.0
+            await server.db.contractors.delete_one({"id": contractor["id"]})
+        run(scenario)
+
+    def test_delete_never_goes_negative(self):
+        async def scenario():
+            contractor = await insert_contractor(total_paid=0.0)
+            certification = await server.create_certification(server.ContractorCertificationCreate(
+                contractor_id=contractor["id"], week_start_date="2025-01-06", amount=40.0
+            ))
+            await server.db.contractors.update_one({"id": contractor["id"]}, {"$set": {"total_paid": 10.0}})
+            await server.delete_certification(certification.id)
+            stored = await server.db.contractors.find_one({"id": contractor["id"]})
+            assert stored["total_paid"] == 0
+            await server.db.contractors.delete_one({"id": contractor["id"]})
+        run(scenario)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
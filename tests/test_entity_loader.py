@@ -0,0 +1,107 @@
+"""
+Test suite for the per-request EntityLoader
+Tests: concurrent loads batched into one query, repeated ids deduplicated, per-request caching
+"""
+import asyncio
+import pytest
+from uuid import uuid4
+
+from tests.in_process import run, server
+
+
+async def insert_advances(count):
+    ids = [f"TEST_Loader_{uuid4().hex}" for _ in range(count)]
+    await server.db.advances.insert_many([
+        {"id": doc_id, "employee_id": "TEST_Loader_Employee", "amount": 10.0 * (i + 1),
+         "date": "2025-01-06", "week_start_date": "2025-01-06", "week_key": 202502}
+        for i, doc_id in enumerate(ids)
+    ])
+    return ids
+
+
+@pytest.fixture
+def watch_finds(monkeypatch):
+    """Call inside a scenario to record the filter of every find() run from then on"""
+    def watch():
+        calls = []
+        collection_type = type(server.db.advances)
+        original = collection_type.find
+
+        def find(self, *args, **kwargs):
+            calls.append((self.name, args[0] if args else kwargs.get('filter')))
+            return original(self, *args, **kwargs)
+        monkeypatch.setattr(collection_type, "find", find)
+        return calls
+    return watch
+
+
+def advance_queries(calls):
+    return [query for name, query in calls if name == "advances"]
+
+
+class TestEntityLoader:
+    """Test suite for EntityLoader batching"""
+
+    def test_concurrent_loads_share_one_query(self, watch_finds):
+        """Loads started together are resolved with a single $in find"""
+        async def scenario():
+            ids = await insert_advances(3)
+            find_calls = watch_finds()
+            loader = server.loader("advances")
+            docs = await asyncio.gather(*(loader.load(doc_id) for doc_id in ids), loader.load("TEST_Loader_missing"))
+
+            assert [doc["id"] for doc in docs[:3]] == ids
+            assert docs[3] is None
+            queries = advance_queries(find_calls)
+            assert len(queries) == 1
+            assert sorted(queries[0]["id"]["$in"]) == sorted(ids + ["TEST_Loader_missing"])
+            await server.db.advances.delete_many({"id": {"$in": ids}})
+        run(scenario)
+
+    def test_repeated_ids_are_deduplicated(self, watch_finds):
+        """The same id requested many times is queried once and returned to every caller"""
+        async def scenario():
+            [doc_id] = await insert_advances(1)
+            find_calls = watch_finds()
+            docs = await server.loader("advances").load_many([doc_id] * 5)
+
+            assert all(doc["id"] == doc_id for doc in docs)
+            assert advance_queries(find_calls)[0]["id"]["$in"] == [doc_id]
+            # Callers get their own copies
+            docs[0]["amount"] = -1
+            assert docs[1]["amount"] == 10.0
+            await server.db.advances.delete_many({"id": doc_id})
+        run(scenario)
+
+    def test_results_are_cached_for_the_request(self, watch_finds):
+        """A later load in the same request is served without another query"""
+        async def scenario():
+            [doc_id] = await insert_advances(1)
+            find_calls = watch_finds()
+            assert server.loader("advances") is server.loader("advances")
+            await server.loader("advances").load(doc_id)
+            await server.loader("advances").load(doc_id)
+            assert len(advance_queries(find_calls)) == 1
+
+            server.loader("advances").clear(doc_id)
+            await server.loader("advances").load(doc_id)
+            assert len(advance_queries(find_calls)) == 2
+            await server.db.advances.delete_many({"id": doc_id})
+        run(scenario)
+
+    def test_loaded_entity_cache_is_used(self, watch_finds):
+        """Collections with a loaded entity cache are served without querying"""
+        async def scenario():
+            employee = await server.create_employee(server.EmployeeCreate(name="TEST_Loader_Employee", daily_salary=800.0))
+            await server.entity_caches["employees"].load()
+            find_calls = watch_finds()
+            doc = await server.loader("employees").load(employee.id)
+
+            assert doc["name"] == "TEST_Loader_Employee"
+            assert not [query for name, query in find_calls if name == "employees"]
+            await server.delete_employee(employee.id)
+        run(scenario)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,71 @@
+"""
+Test suite for conditional GETs on collection endpoints
+Tests: ETag / If-None-Match on GET /api/employees, /api/projects, /api/contractors
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestCollectionETags:
+    """Test suite for ETag revalidation"""
+
+    @pytest.mark.parametrize("collection", ["employees", "projects", "contractors"])
+    def test_matching_etag_returns_304(self, collection):
+        """A request with the current ETag is answered with 304 and no body"""
+        first = requests.get(f"{BASE_URL}/api/{collection}")
+        assert first.status_code == 200
+        etag = first.headers.get("ETag")
+        assert etag, "Collection response should carry an ETag"
+
+        second = requests.get(f"{BASE_URL}/api/{collection}", headers={"If-None-Match": etag})
+        assert second.status_code == 304
+        assert second.headers.get("ETag") == etag
+        assert second.content == b""
+
+    def test_write_changes_etag(self):
+        """Creating an employee invalidates the previous ETag"""
+        etag = requests.get(f"{BASE_URL}/api/employees").headers["ETag"]
+
+        created = requests.post(f"{BASE_URL}/api/employees", json={
+            "name": "TEST_ETag_Employee",
+            "daily_salary": 1000.0
+        })
+        assert created.status_code == 200
+        employee_id = created.json()["id"]
+
+        try:
+            response = requests.get(f"{BASE_URL}/api/employees", headers={"If-None-Match": etag})
+            assert response.status_code == 200
+            assert response.headers["ETag"] != etag
+            assert any(e["id"] == employee_id for e in response.json())
+        finally:
+            requests.delete(f"{BASE_URL}/api/employees/{employee_id}")
+
+    def test_contractor_etag_changes_after_certification(self):
+        """Certifications change total_paid, so they invalidate the contractors ETag"""
+        contractor = requests.post(f"{BASE_URL}/api/contractors", json={
+            "name": "TEST_ETag_Contractor",
+            "weekly_payment": 1000.0,
+            "project_name": "TEST_ETag_Project",
+            "budget": 10000.0
+        }).json()
+        etag = requests.get(f"{BASE_URL}/api/contractors").headers["ETag"]
+
+        try:
+            cert = requests.post(f"{BASE_URL}/api/certifications", json={
+                "contractor_id": contractor["id"],
+                "week_start_date": "2025-01-06",
+                "amount": 500.0
+            }).json()
+            response = requests.get(f"{BASE_URL}/api/contractors", headers={"If-None-Match": etag})
+            assert response.status_code == 200
+            requests.delete(f"{BASE_URL}/api/certifications/{cert['id']}")
+        finally:
+            requests.delete(f"{BASE_URL}/api/contractors/{contractor['id']}")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,131 @@
+"""
+Test suite for columnar exports
+Tests: GET /api/export/{collection} as Parquet and Arrow IPC, multi-batch encoding
+"""
+import asyncio
+import io
+import pytest
+import requests
+import os
+import sys
+from pathlib import Path
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.ipc as ipc  # noqa: E402
+import pyarrow.parquet as pq  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
+import exports  # noqa: E402
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestColumnarExport:
+    """Test suite for the export endpoint"""
+
+    @pytest.fixture
+    def employee(self):
+        employee = requests.post(f"{BASE_URL}/api/employees", json={
+            "name": "TEST_Export_Employee",
+            "daily_salary": 1000.0
+        }).json()
+        for day, status in [("2033-02-07", "present"), ("2033-02-08", "late")]:
+            requests.post(f"{BASE_URL}/api/attendance", json={
+                "employee_id": employee["id"],
+                "date": day,
+                "status": status,
+                "late_hours": 1.0 if status == "late" else 0.0,
+                "week_start_date": "2033-02-07"
+            })
+        yield employee
+        requests.delete(f"{BASE_URL}/api/employees/{employee['id']}")
+
+    def test_parquet_week_range(self, employee):
+        """A week range exports typed columns for just that week"""
+        response = requests.get(f"{BASE_URL}/api/export/attendance", params={
+            "from": "2033-02-07", "to": "2033-02-07"
+        })
+        assert response.status_code == 200
+        assert "attachment" in response.headers["Content-Disposition"]
+        table = pq.read_table(io.BytesIO(response.content))
+        assert pa.types.is_dictionary(table.schema.field("status").type)
+        assert table.schema.field("late_hours").type == pa.float64()
+        rows = [r for r in table.to_pylist() if r["employee_id"] == employee["id"]]
+        assert sorted(r["status"] for r in rows) == ["late", "present"]
+        assert {str(r["week_start_date"]) for r in table.to_pylist()} == {"2033-02-07"}
+
+    def test_arrow_format(self, employee):
+        response = requests.get(f"{BASE_URL}/api/export/employees", params={"format": "arrow"})
+        assert response.status_code == 200
+        table = ipc.open_file(pa.BufferReader(response.content)).read_all()
+        assert employee["id"] in table.column("id").to_pylist()
+
+    def test_invalid_requests(self):
+        assert requests.get(f"{BASE_URL}/api/export/users").status_code == 404
+        assert requests.get(f"{BASE_URL}/api/export/attendance", params={"format": "csv"}).status_code == 400
+        response = requests.get(f"{BASE_URL}/api/export/employees", params={"from": "2033-02-07"})
+        assert response.status_code == 400
+
+
+def contractor_docs(count):
+    # More project names than an int8 dictionary index can address
+    return [{
+        "id": f"c{i}", "name": f"Contractor {i}", "weekly_payment": 100.0, "project_name": f"Project {i % 200}",
+        "budget": 1000.0, "total_paid": 0.0, "is_active": True, "created_at": "2025-01-06T00:00:00+00:00",
+    } for i in range(count)]
+
+
+async def as_cursor(docs):
+    for doc in docs:
+        yield doc
+
+
+class TestExportBatches:
+    """Test suite for exports written as several record batches"""
+
+    def stream(self, fmt, docs, batch_size):
+        async def collect():
+            schema = exports.EXPORT_SCHEMAS["contractors"]
+            return b"".join([chunk async for chunk in exports.stream_export(as_cursor(docs), schema, fmt, batch_size)])
+        return asyncio.run(collect())
+
+    def test_arrow_batches_with_different_dictionaries(self):
+        """Batches whose category values differ encode into one readable IPC file"""
+        docs = contractor_docs(450)
+        reader = ipc.open_file(pa.BufferReader(self.stream("arrow", docs, 40)))
+        assert reader.num_record_batches == 12
+        table = reader.read_all()
+        assert table.column("project_name").to_pylist() == [doc["project_name"] for doc in docs]
+        assert table.column("id").to_pylist() == [doc["id"] for doc in docs]
+
+    def test_parquet_batches_keep_dictionary_columns(self):
+        docs = contractor_docs(450)
+        # 200 distinct names within one batch
+        table = pq.read_table(io.BytesIO(self.stream("parquet", docs, 300)))
+        assert pa.types.is_dictionary(table.schema.field("project_name").type)
+        assert table.column("project_name").to_pylist() == [doc["project_name"] for doc in docs]
+
+    def test_invalid_dates_become_null(self, caplog):
+        """A malformed stored date doesn't abort the export"""
+        schema = exports.EXPORT_SCHEMAS["advances"]
+        docs = [{"id": f"a{i}", "employee_id": "e", "amount": 10.0, "date": date, "week_start_date": "2025-01-06",
+                 "week_key": 1} for i, date in enumerate(["2025-01-07", "07/01/2025", None, "2025-02-30"])]
+
+        async def collect():
+            return b"".join([chunk async for chunk in exports.stream_export(as_cursor(docs), schema, "parquet", 2)])
+        table = pq.read_table(io.BytesIO(asyncio.run(collect())))
+        assert [str(d) if d else None for d in table.column("date").to_pylist()] == ["2025-01-07", None, None, None]
+        assert "Exported 1 invalid date values as null" in caplog.text
+
+    def test_export_file_arrow(self, tmp_path):
+        path = tmp_path / "contractors.arrow"
+        rows = asyncio.run(exports.export_file(
+            as_cursor(contractor_docs(300)), exports.EXPORT_SCHEMAS["contractors"], "arrow", path, 64
+        ))
+        assert rows == 300
+        with pa.memory_map(str(path)) as source:
+            assert ipc.open_file(source).read_all().num_rows == 300
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
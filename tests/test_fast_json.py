@@ -0,0 +1,99 @@
+"""
+Test suite for the FAST_JSON_RESPONSES list fast path
+Tests: trusted_rows + FastJSONResponse produce the same JSON as response_model validation, with and without fields=
+"""
+import json
+from typing import List
+
+import pytest
+from pydantic import TypeAdapter
+
+from tests.in_process import run, server
+
+
+def fast_json(model, docs):
+    return json.loads(server.FastJSONResponse(server.trusted_rows(model, docs)).body)
+
+
+def response_model_json(model, docs):
+    adapter = TypeAdapter(List[model])
+    return adapter.dump_python(adapter.validate_python(docs), mode="json")
+
+
+class TestFastJSON:
+    """Test suite for trusted_rows"""
+
+    @pytest.mark.parametrize("model, docs", [
+        ("Employee", [
+            # Missing optional fields, plus bookkeeping fields the model doesn't declare
+            {"id": "e1", "name": "Ana", "daily_salary": 1000.5, "created_at": "2025-01-06T00:00:00+00:00",
+             "sync_seq": 4, "name_normalized": "ana"},
+            # Whole amounts stored as ints still serialize as floats
+            {"id": "e2", "name": "Luis", "daily_salary": 900, "project_id": "p1", "trade": "Pintor",
+             "created_at": "2025-01-06T00:00:00+00:00", "updated_at": "2025-01-07T00:00:00+00:00",
+             "is_active": False},
+        ]),
+        ("Attendance", [
+            {"id": "a1", "employee_id": "e1", "date": "2025-01-07", "status": "present",
+             "week_start_date": "2025-01-06", "week_key": 202502},
+            {"id": "a2", "employee_id": "e1", "date": "2025-01-08", "status": "late", "late_hours": 2,
+             "week_start_date": "2025-01-06", "updated_at": "2025-01-08T00:00:00+00:00"},
+        ]),
+        ("Contractor", [
+            {"id": "c1", "name": "Obras SA", "weekly_payment": 100.0, "project_name": "Torre",
+             "budget": 1000.0, "created_at": "2025-01-06T00:00:00+00:00"},
+            {"id": "c2", "name": "Pintura SRL", "weekly_payment": 50.25, "project_name": "Casa",
+             "budget": 500.0, "total_paid": 100.5, "remaining_balance": 399.5,
+             "created_at": "2025-01-06T00:00:00+00:00", "is_active": False},
+        ]),
+        ("PaymentHistory", [
+            {"id": "h1", "employee_id": "e1", "week_start_date": "2025-01-06", "days_worked": 5,
+             "total_salary": 5000.0, "total_advances": 100.0, "net_payment": 4900.0,
+             "paid_at": "2025-01-10T00:00:00+00:00", "sync_seq": 9},
+        ]),
+    ])
+    def test_matches_response_model(self, model, docs):
+        model = getattr(server, model)
+        # Compared as text, so 900 and 900.0 differ
+        assert json.dumps(fast_json(model, docs)) == json.dumps(response_model_json(model, docs))
+
+    def test_missing_required_field_is_left_out(self):
+        """Only fields with a default are filled in; a required field is never made up as null"""
+        rows = server.trusted_rows(server.Employee, [{"id": "e1", "daily_salary": 1000}])
+        assert "name" not in rows[0]
+        assert rows[0]["daily_salary"] == 1000.0 and isinstance(rows[0]["daily_salary"], float)
+        assert rows[0]["is_active"] is True
+
+    @pytest.mark.parametrize("names", [["id", "name"], ["id", "daily_salary", "is_active"]])
+    def test_trimmed_rows_match_trimmed_model(self, names, monkeypatch):
+        """With fields=, the fast path and the trimmed response model agree too"""
+        docs = [
+            {"id": "e1", "name": "Ana", "daily_salary": 1000.5, "created_at": "2025-01-06T00:00:00+00:00"},
+            {"id": "e2", "name": "Luis", "daily_salary": 900, "is_active": False, "created_at": "2025-01-06"},
+        ]
+        monkeypatch.setattr(server, "FAST_JSON_RESPONSES", True)
+        fast = json.loads(server.list_response(server.Employee, docs, names).body)
+        monkeypatch.setattr(server, "FAST_JSON_RESPONSES", False)
+        validated = json.loads(server.list_response(server.Employee, docs, names).body)
+        assert fast == validated
+        assert [list(row) for row in fast] == [names, names]
+
+    def test_stored_documents_match(self):
+        """Documents as the write endpoints store them serialize identically either way"""
+        async def scenario():
+            employee = await server.create_employee(server.EmployeeCreate(name="TEST_Fast_Employee", daily_salary=1200))
+            advance = await server.create_advance(server.AdvanceCreate(
+                employee_id=employee.id, amount=300, date="2025-01-08", week_start_date="2025-01-06"
+            ))
+            employees = await server.db.employees.find({"id": employee.id}, {"_id": 0}).to_list(None)
+            advances = await server.db.advances.find({"id": advance.id}, {"_id": 0}).to_list(None)
+
+            assert fast_json(server.Employee, employees) == response_model_json(server.Employee, employees)
+            assert fast_json(server.Advance, advances) == response_model_json(server.Advance, advances)
+            await server.db.advances.delete_many({"id": advance.id})
+            await server.delete_employee(employee.id)
+        run(scenario)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,78 @@
+"""
+Test suite for sparse fieldsets
+Tests: fields= on list and get endpoints trims records, unknown fields are rejected
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestSparseFields:
+    """Test suite for the fields= parameter"""
+
+    @pytest.fixture
+    def employee(self):
+        employee = requests.post(f"{BASE_URL}/api/employees", json={
+            "name": "TEST_Fields_Employee", "daily_salary": 1000.0, "trade": "TEST_Fields_Trade"
+        }).json()
+        yield employee
+        requests.delete(f"{BASE_URL}/api/employees/{employee['id']}")
+
+    def test_employee_list(self, employee):
+        response = requests.get(f"{BASE_URL}/api/employees", params={"fields": "name,daily_salary"})
+        assert response.status_code == 200
+        rows = response.json()
+        assert all(set(row) == {"id", "name", "daily_salary"} for row in rows)
+        assert {"id": employee["id"], "name": "TEST_Fields_Employee", "daily_salary": 1000.0} in rows
+
+    def test_filtered_employee_list(self, employee):
+        response = requests.get(f"{BASE_URL}/api/employees", params={
+            "trade": "TEST_Fields_Trade", "sort": "-daily_salary", "fields": "is_active"
+        })
+        assert response.json() == [{"id": employee["id"], "is_active": True}]
+
+    def test_single_employee(self, employee):
+        response = requests.get(f"{BASE_URL}/api/employees/{employee['id']}", params={"fields": "trade"})
+        assert response.json() == {"id": employee["id"], "trade": "TEST_Fields_Trade"}
+        assert requests.get(f"{BASE_URL}/api/employees/{employee['id']}").json() == employee
+
+    def test_week_lists(self, employee):
+        requests.post(f"{BASE_URL}/api/attendance", json={
+            "employee_id": employee["id"], "date": "2036-06-03", "status": "present", "week_start_date": "2036-06-02"
+        })
+        requests.post(f"{BASE_URL}/api/advances", json={
+            "employee_id": employee["id"], "amount": 50.0, "date": "2036-06-03", "week_start_date": "2036-06-02"
+        })
+        attendance = requests.get(f"{BASE_URL}/api/attendance/week/2036-06-02", params={"fields": "employee_id,status"})
+        assert {"employee_id": employee["id"], "status": "present"} in [
+            {k: v for k, v in row.items() if k != "id"} for row in attendance.json()
+        ]
+        assert all(set(row) == {"id", "employee_id", "status"} for row in attendance.json())
+
+        advances = requests.get(f"{BASE_URL}/api/advances/employee/{employee['id']}", params={"fields": "amount"}).json()
+        assert [set(row) for row in advances] == [{"id", "amount"}]
+        requests.delete(f"{BASE_URL}/api/advances/{advances[0]['id']}")
+
+    def test_contractor_derived_field(self):
+        contractor = requests.post(f"{BASE_URL}/api/contractors", json={
+            "name": "TEST_Fields_Contractor", "weekly_payment": 10.0, "project_name": "TEST_Fields", "budget": 500.0
+        }).json()
+        try:
+            response = requests.get(f"{BASE_URL}/api/contractors/{contractor['id']}", params={"fields": "remaining_balance"})
+            assert response.json() == {"id": contractor["id"], "remaining_balance": 500.0}
+            listed = requests.get(f"{BASE_URL}/api/contractors", params={"fields": "name"}).json()
+            assert {"id": contractor["id"], "name": "TEST_Fields_Contractor"} in listed
+        finally:
+            requests.delete(f"{BASE_URL}/api/contractors/{contractor['id']}")
+
+    def test_unknown_field(self):
+        response = requests.get(f"{BASE_URL}/api/employees", params={"fields": "name,password"})
+        assert response.status_code == 400
+        assert "password" in response.json()["detail"]
+        assert requests.get(f"{BASE_URL}/api/advances", params={"fields": "_id"}).status_code == 400
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,99 @@
+"""
+Test suite for concurrent handler reads
+Tests: gather_queries results, concurrency limit, cancellation on failure, Server-Timing entries
+"""
+import asyncio
+import gc
+import warnings
+import pytest
+import requests
+import os
+
+from tests.in_process import server
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestGatherQueries:
+    """Test suite for gather_queries"""
+
+    def test_results_by_name(self):
+        async def read(value, delay):
+            await asyncio.sleep(delay)
+            return value
+
+        async def main():
+            return await server.gather_queries({"slow": read(1, 0.02), "fast": read(2, 0)})
+        assert asyncio.run(main()) == {"slow": 1, "fast": 2}
+
+    def test_concurrency_limit(self):
+        """No more than ``limit`` reads run at the same time"""
+        running, peak = 0, 0
+
+        async def read():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        async def main():
+            await server.gather_queries({f"q{i}": read() for i in range(7)}, limit=3)
+        asyncio.run(main())
+        assert peak == 3
+
+    def test_failure_cancels_the_others(self):
+        """The first error propagates and reads still running are cancelled, never left behind"""
+        cancelled = []
+
+        async def slow(name):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(name)
+                raise
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        async def main():
+            with pytest.raises(RuntimeError, match="boom"):
+                await server.gather_queries(
+                    {"a": slow("a"), "b": failing(), "c": slow("c"), "d": slow("d"), "e": slow("e")}, limit=2
+                )
+            return len([t for t in asyncio.all_tasks() if t is not asyncio.current_task()])
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", RuntimeWarning)
+            assert asyncio.run(main()) == 0
+            gc.collect()
+        # Reads still waiting for a slot are closed without running (no "never awaited" warning)
+        assert "a" in cancelled
+        assert "e" not in cancelled
+
+    def test_timings_recorded(self):
+        """Each read's duration is recorded on the request context"""
+        async def read():
+            await asyncio.sleep(0.01)
+
+        async def main():
+            context = server.RequestContext()
+            server.request_context.set(context)
+            await server.gather_queries({"employees": read(), "advances": read()})
+            return context.timings
+
+        timings = dict(asyncio.run(main()))
+        assert set(timings) == {"employees", "advances"}
+        assert all(elapsed >= 0.009 for elapsed in timings.values())
+
+    def test_server_timing_header(self):
+        """Handlers that gather reads report each one in Server-Timing"""
+        response = requests.get(f"{BASE_URL}/api/payments/by-project/2025-01-06")
+        assert response.status_code == 200
+        names = {entry.split(";")[0].strip() for entry in response.headers["Server-Timing"].split(",")}
+        assert {"employees", "projects", "attendance", "advances"} <= names
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,38 @@
+"""
+Test suite for health and readiness endpoints
+Tests: GET /api/health, GET /api/ready
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestHealthAPI:
+    """Test suite for liveness/readiness reporting"""
+
+    def test_health_reports_loop_and_pool(self):
+        """Health always answers 200 with event loop and Mongo pool stats"""
+        response = requests.get(f"{BASE_URL}/api/health")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert "ready" in data
+        assert set(data["event_loop"]) >= {"lag_ms", "mean_lag_ms", "max_lag_ms"}
+        assert set(data["mongo"]["pool"]) >= {"checked_out", "available", "wait_queue"}
+        assert data["mongo"]["ping_ms"] is not None, "Mongo should be reachable"
+
+    def test_ready_status_matches_report(self):
+        """Ready answers 200 when ready and 503 otherwise"""
+        response = requests.get(f"{BASE_URL}/api/ready")
+
+        assert response.status_code in (200, 503)
+        data = response.json()
+        assert data["ready"] == (response.status_code == 200)
+        if not data["ready"]:
+            assert len(data["problems"]) > 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
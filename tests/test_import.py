@@ -0,0 +1,92 @@
+"""
+Test suite for bulk imports
+Tests: POST /api/import/employees, /api/import/attendance, /api/import/advances
+"""
+import io
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+def upload(kind, content, filename="import.csv"):
+    return requests.post(f"{BASE_URL}/api/import/{kind}", files={"file": (filename, content)})
+
+
+class TestBulkImport:
+    """Test suite for CSV/XLSX imports"""
+
+    @pytest.fixture
+    def employees(self):
+        csv = (
+            "name;daily_salary;trade\n"
+            "TEST_Import_A;1000;Albañil\n"
+            "TEST_Import_B;not-a-number;Pintor\n"
+            "TEST_Import_C;1500;\n"
+        )
+        response = upload("employees", csv.encode())
+        assert response.status_code == 200
+        report = response.json()
+        created = [e for e in requests.get(f"{BASE_URL}/api/employees").json() if e["name"].startswith("TEST_Import_")]
+        yield report, {e["name"]: e for e in created}
+        for employee in created:
+            requests.delete(f"{BASE_URL}/api/employees/{employee['id']}")
+
+    def test_employees_report_row_errors(self, employees):
+        """Valid rows are created, invalid ones reported by line"""
+        report, created = employees
+        assert report["rows"] == 3
+        assert report["inserted"] == 2
+        assert [e["row"] for e in report["errors"]] == [3]
+        assert "daily_salary" in report["errors"][0]["errors"][0]
+        assert set(created) == {"TEST_Import_A", "TEST_Import_C"}
+        assert created["TEST_Import_A"]["trade"] == "Albañil"
+
+    def test_attendance_upserts(self, employees):
+        _, created = employees
+        employee_id = created["TEST_Import_A"]["id"]
+        csv = (
+            "employee_id,date,status,late_hours\n"
+            f"{employee_id},2034-06-05,presente,\n"
+            f"{employee_id},2034-06-06,tarde,2\n"
+            f"{employee_id},2034-06-07,vacaciones,\n"
+            "unknown-employee,2034-06-05,present,\n"
+        )
+        report = upload("attendance", csv.encode()).json()
+        assert report["inserted"] == 2
+        assert sorted(e["row"] for e in report["errors"]) == [4, 5]
+
+        csv = f"employee_id,date,status\n{employee_id},2034-06-06,absent\n"
+        report = upload("attendance", csv.encode()).json()
+        assert (report["inserted"], report["updated"]) == (0, 1)
+
+        week = requests.get(f"{BASE_URL}/api/attendance/week/2034-06-05").json()
+        statuses = {a["date"]: a["status"] for a in week if a["employee_id"] == employee_id}
+        assert statuses == {"2034-06-05": "present", "2034-06-06": "absent"}
+
+    def test_advances_xlsx(self, employees):
+        openpyxl = pytest.importorskip("openpyxl")
+        _, created = employees
+        employee_id = created["TEST_Import_C"]["id"]
+        workbook = openpyxl.Workbook()
+        workbook.active.append(["Employee ID", "Amount", "Date", "Description"])
+        workbook.active.append([employee_id, 250, "2034-06-07", "TEST_Import"])
+        content = io.BytesIO()
+        workbook.save(content)
+
+        report = upload("advances", content.getvalue(), "advances.xlsx").json()
+        assert report["inserted"] == 1
+        advances = requests.get(f"{BASE_URL}/api/advances/employee/{employee_id}").json()
+        assert [(a["amount"], a["week_start_date"]) for a in advances] == [(250.0, "2034-06-05")]
+        for advance in advances:
+            requests.delete(f"{BASE_URL}/api/advances/{advance['id']}")
+
+    def test_missing_columns_rejected(self):
+        response = upload("employees", b"name\nTEST_Import_Nobody\n")
+        assert response.status_code == 400
+        assert "daily_salary" in response.json()["detail"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,189 @@
+"""
+Test suite for the in-process job runner
+Tests: bounded concurrency, cancellation, resuming stale jobs, re-running calculate_payments, batched cascades
+"""
+import asyncio
+import pytest
+
+from tests.in_process import run, server
+
+
+@pytest.fixture
+def sleeper(monkeypatch):
+    """A client-startable job type that waits until released"""
+    release = {}
+
+    async def handler(job):
+        await job.progress(0, 1)
+        await release.setdefault(job.id, asyncio.Event()).wait()
+        await job.progress(1)
+        return {"slept": True}
+
+    monkeypatch.setitem(server.job_handlers, "test_sleep", (handler, server.PaymentCalculation))
+    return release
+
+
+async def job_status(job_id):
+    return (await server.get_job(job_id))["status"]
+
+
+async def settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+class TestJobRunner:
+    """Test suite for start_job, cancel_job and resume_stale_jobs"""
+
+    def test_bounded_concurrency(self, sleeper, monkeypatch):
+        monkeypatch.setattr(server, "JOB_CONCURRENCY", 1)
+
+        async def scenario():
+            first = await server.start_job("test_sleep", {})
+            second = await server.start_job("test_sleep", {})
+            await settle()
+            assert await job_status(first["id"]) == "running"
+            assert await job_status(second["id"]) == "queued"
+
+            sleeper.setdefault(first["id"], asyncio.Event()).set()
+            await server.running_jobs[first["id"]].task
+            await settle()
+            assert await job_status(second["id"]) == "running"
+            sleeper.setdefault(second["id"], asyncio.Event()).set()
+            await server.running_jobs[second["id"]].task
+            job = await server.get_job(second["id"])
+            assert job["status"] == "done"
+            assert job["result"] == {"slept": True}
+            assert job["progress"] == {"done": 1, "total": 1}
+        run(scenario)
+
+    def test_cancel(self, sleeper):
+        async def scenario():
+            running = await server.start_job("test_sleep", {})
+            await settle()
+            job = await server.cancel_job(running["id"])
+            assert job["status"] == "cancelled"
+            assert job["cancel_requested"] is True
+            assert running["id"] not in server.running_jobs
+
+            # Cancelled before its task got to run
+            queued = await server.start_job("test_sleep", {})
+            assert (await server.cancel_job(queued["id"]))["status"] == "cancelled"
+        run(scenario)
+
+    def test_cancel_from_another_worker(self, sleeper):
+        """The flag set by another worker is applied on the next heartbeat"""
+        async def scenario():
+            job = await server.start_job("test_sleep", {})
+            await settle()
+            await server.db.jobs.update_one({"id": job["id"]}, {"$set": {"cancel_requested": True}})
+            await server.beat_jobs()
+            assert await job_status(job["id"]) == "cancelled"
+        run(scenario)
+
+    def test_committed_job_is_not_cancelled(self, monkeypatch):
+        """After commit() a job runs to completion; a cancellation requested before stops it there"""
+        release = asyncio.Event()
+
+        async def handler(job):
+            await release.wait()
+            await job.commit()
+            await asyncio.sleep(0.05)
+            return {"written": True}
+
+        monkeypatch.setitem(server.job_handlers, "test_commit", (handler, server.PaymentCalculation))
+
+        async def scenario():
+            writing = await server.start_job("test_commit", {})
+            release.set()
+            await settle()
+            with pytest.raises(server.HTTPException) as exc:
+                await server.cancel_job(writing["id"])
+            assert exc.value.status_code == 409
+            await server.running_jobs[writing["id"]].task
+            job = await server.get_job(writing["id"])
+            assert (job["status"], job["committed"], job["result"]) == ("done", True, {"written": True})
+
+            release.clear()
+            requested = await server.start_job("test_commit", {})
+            await settle()
+            await server.db.jobs.update_one({"id": requested["id"]}, {"$set": {"cancel_requested": True}})
+            release.set()
+            await server.running_jobs[requested["id"]].task
+            job = await server.get_job(requested["id"])
+            assert (job["status"], job["committed"]) == ("cancelled", False)
+        run(scenario)
+
+    def test_resume_stale_jobs(self, sleeper):
+        """Jobs left active by a stopped worker are taken over, once"""
+        async def scenario():
+            job = await server.start_job("test_sleep", {})
+            await settle()
+            await server.stop_jobs()
+            assert await job_status(job["id"]) == "running"
+            assert not server.running_jobs
+
+            await server.resume_stale_jobs()
+            assert list(server.running_jobs) == [job["id"]]
+            await server.resume_stale_jobs()
+            assert list(server.running_jobs) == [job["id"]]
+            sleeper.setdefault(job["id"], asyncio.Event()).set()
+            await server.running_jobs[job["id"]].task
+            assert await job_status(job["id"]) == "done"
+
+            # A recent heartbeat means the owner is alive
+            alive = await server.start_job("test_sleep", {})
+            await settle()
+            server.running_jobs.pop(alive["id"]).task.cancel()
+            await server.resume_stale_jobs()
+            assert alive["id"] not in server.running_jobs
+            await server.db.jobs.delete_one({"id": alive["id"]})
+        run(scenario)
+
+    def test_calculate_payments_can_rerun(self):
+        """A resumed payroll job writes each history record and pays each contractor once"""
+        async def scenario():
+            employee = await server.create_employee(server.EmployeeCreate(name="TEST_Runner_Employee", daily_salary=800))
+            contractor = await server.create_contractor(server.ContractorCreate(
+                name="TEST_Runner_Contractor", weekly_payment=300, project_name="TEST_Runner", budget=5000
+            ))
+            job = await server.start_job("calculate_payments", {"week_start_date": "2039-06-06"})
+            await server.running_jobs[job["id"]].task
+            await server.calculate_payments_job(server.JobRun(job))
+
+            history = await server.db.payment_history.find({"employee_id": employee.id}).to_list(None)
+            assert len(history) == 1
+            stored = await server.db.contractors.find_one({"id": contractor.id})
+            assert stored["total_paid"] == 300
+            assert (await server.get_job(job["id"]))["status"] == "done"
+
+            await server.db.payment_history.delete_many({"employee_id": employee.id})
+            await server.delete_employee(employee.id)
+            await server.delete_contractor(contractor.id)
+            await asyncio.gather(*(r.task for r in list(server.running_jobs.values())))
+        run(scenario)
+
+    def test_cascade_batches(self, monkeypatch):
+        monkeypatch.setattr(server, "CASCADE_BATCH_SIZE", 2)
+
+        async def scenario():
+            employee = await server.create_employee(server.EmployeeCreate(name="TEST_Runner_Cascade", daily_salary=1))
+            for day in range(3, 8):
+                await server.create_attendance(server.AttendanceCreate(
+                    employee_id=employee.id, date=f"2039-07-0{day}", status="present", week_start_date="2039-07-04"
+                ))
+            for _ in range(3):
+                await server.create_advance(server.AdvanceCreate(
+                    employee_id=employee.id, amount=10, date="2039-07-05", week_start_date="2039-07-04"
+                ))
+            job_id = (await server.delete_employee(employee.id))["job_id"]
+            await server.running_jobs[job_id].task
+            job = await server.get_job(job_id)
+            assert job["result"] == {"attendance": 5, "advances": 3}
+            assert job["progress"]["done"] == job["progress"]["total"]
+            assert await server.attendance_store.find({"employee_id": employee.id}) == []
+        run(scenario)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
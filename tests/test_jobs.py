@@ -0,0 +1,70 @@
+"""
+Test suite for the background job API
+Tests: POST /api/jobs with calculate_payments, GET /api/jobs/{id}, POST /api/jobs/{id}/cancel, validation
+"""
+import pytest
+import requests
+import os
+import time
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+def wait_for_job(job_id):
+    for _ in range(100):
+        job = requests.get(f"{BASE_URL}/api/jobs/{job_id}").json()
+        if job["status"] in ("done", "failed", "cancelled"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish: {job}")
+
+
+class TestJobs:
+    """Test suite for the job endpoints"""
+
+    def test_calculate_payments(self):
+        employee = requests.post(f"{BASE_URL}/api/employees", json={"name": "TEST_Job_Employee", "daily_salary": 1000.0}).json()
+        try:
+            requests.post(f"{BASE_URL}/api/attendance", json={
+                "employee_id": employee["id"], "date": "2039-05-03", "status": "present", "week_start_date": "2039-05-02"
+            })
+            response = requests.post(f"{BASE_URL}/api/jobs", json={
+                "type": "calculate_payments", "params": {"week_start_date": "2039-05-04"}
+            })
+            assert response.status_code == 200
+            job = response.json()
+            assert job["status"] in ("queued", "running", "done")
+            assert job["params"] == {"week_start_date": "2039-05-02"}
+
+            job = wait_for_job(job["id"])
+            assert job["status"] == "done"
+            assert job["result"]["message"] == "Payments calculated successfully"
+            assert job["progress"]["done"] == job["progress"]["total"]
+            history = [
+                h for h in requests.get(f"{BASE_URL}/api/payments/history").json()
+                if h["employee_id"] == employee["id"] and h["week_start_date"] == "2039-05-02"
+            ]
+            assert [h["total_salary"] for h in history] == [1000.0]
+        finally:
+            requests.delete(f"{BASE_URL}/api/employees/{employee['id']}")
+
+    def test_invalid_jobs(self):
+        assert requests.post(f"{BASE_URL}/api/jobs", json={"type": "TEST_Job_missing"}).status_code == 400
+        # Internal job types can't be started by clients
+        response = requests.post(f"{BASE_URL}/api/jobs", json={"type": "cascade_delete", "params": {}})
+        assert response.status_code == 400
+        assert "calculate_payments" in response.json()["detail"]
+        response = requests.post(f"{BASE_URL}/api/jobs", json={"type": "calculate_payments", "params": {}})
+        assert response.status_code == 422
+
+    def test_cancel(self):
+        job = requests.post(f"{BASE_URL}/api/jobs", json={
+            "type": "calculate_payments", "params": {"week_start_date": "2039-05-02"}
+        }).json()
+        wait_for_job(job["id"])
+        assert requests.post(f"{BASE_URL}/api/jobs/{job['id']}/cancel").status_code == 409
+        assert requests.post(f"{BASE_URL}/api/jobs/TEST_Job_missing/cancel").status_code == 404
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,98 @@
+"""
+Test suite for app startup and Mongo client settings
+Tests: MONGO_* environment parsing, lifespan warmup (loaded caches, timeout fallback) and shutdown
+"""
+import asyncio
+import pytest
+
+from tests.in_process import server
+
+MONGO_ENV = [
+    'MONGO_MAX_POOL_SIZE', 'MONGO_MIN_POOL_SIZE', 'MONGO_CONNECT_TIMEOUT_MS', 'MONGO_SERVER_SELECTION_TIMEOUT_MS',
+    'MONGO_SOCKET_TIMEOUT_MS', 'MONGO_WAIT_QUEUE_TIMEOUT_MS', 'MONGO_MAX_IDLE_TIME_MS', 'MONGO_COMPRESSORS',
+    'MONGO_WRITE_CONCERN', 'MONGO_JOURNAL',
+]
+
+
+@pytest.fixture
+def clean_env(monkeypatch):
+    for name in MONGO_ENV:
+        monkeypatch.delenv(name, raising=False)
+    return monkeypatch
+
+
+class TestMongoClientOptions:
+    """Test suite for mongo_client_options"""
+
+    def test_defaults(self, clean_env):
+        assert server.mongo_client_options() == {"maxPoolSize": 100, "minPoolSize": 0}
+
+    def test_environment_overrides(self, clean_env):
+        clean_env.setenv('MONGO_MAX_POOL_SIZE', '20')
+        clean_env.setenv('MONGO_MIN_POOL_SIZE', '5')
+        clean_env.setenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', '2500')
+        clean_env.setenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', '1000')
+        clean_env.setenv('MONGO_SOCKET_TIMEOUT_MS', '')
+        clean_env.setenv('MONGO_COMPRESSORS', 'zstd,snappy')
+        clean_env.setenv('MONGO_WRITE_CONCERN', '1')
+        clean_env.setenv('MONGO_JOURNAL', 'false')
+        assert server.mongo_client_options() == {
+            "maxPoolSize": 20, "minPoolSize": 5, "serverSelectionTimeoutMS": 2500, "waitQueueTimeoutMS": 1000,
+            "compressors": "zstd,snappy", "w": 1, "journal": False,
+        }
+
+    def test_named_write_concern(self, clean_env):
+        clean_env.setenv('MONGO_WRITE_CONCERN', 'majority')
+        clean_env.setenv('MONGO_JOURNAL', 'yes')
+        options = server.mongo_client_options()
+        assert options["w"] == "majority"
+        assert options["journal"] is True
+
+
+class TestLifespan:
+    """Test suite for the lifespan handler"""
+
+    @pytest.fixture(autouse=True)
+    def reset_caches(self):
+        server.collection_versions.versions = {}
+        for name in list(server.entity_caches):
+            server.entity_caches[name] = server.EntityCache(name)
+
+    def test_warmup_loads_caches_before_serving(self):
+        async def main():
+            async with server.lifespan(server.app):
+                assert server.db is not None
+                assert "warmup" not in server.pending_startup
+                assert all(cache.loaded for cache in server.entity_caches.values())
+                ping = await server.db.command("ping")
+                assert ping["ok"]
+            # Background loops are stopped on shutdown
+            assert server.collection_versions._task is None or server.collection_versions._task.done()
+        asyncio.run(main())
+
+    def test_slow_warmup_continues_in_background(self, monkeypatch):
+        """Serving starts after WARMUP_TIMEOUT_SECONDS and readiness reports the pending warmup"""
+        release = None
+
+        async def slow_hook():
+            await release.wait()
+
+        monkeypatch.setattr(server, "WARMUP_TIMEOUT_SECONDS", 0.05)
+        monkeypatch.setattr(server, "warmup_hooks", server.warmup_hooks + [slow_hook])
+
+        async def main():
+            nonlocal release
+            release = asyncio.Event()
+            async with server.lifespan(server.app):
+                assert "warmup" in server.pending_startup
+                release.set()
+                for _ in range(100):
+                    if "warmup" not in server.pending_startup:
+                        break
+                    await asyncio.sleep(0.01)
+                assert "warmup" not in server.pending_startup
+        asyncio.run(main())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
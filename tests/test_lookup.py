@@ -0,0 +1,88 @@
+"""
+Test suite for batch lookups by id
+Tests: GET /api/{employees,projects,contractors}?ids=, POST /api/{collection}/lookup with fields
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestLookup:
+    """Test suite for fetching known sets of entities"""
+
+    @pytest.fixture
+    def employees(self):
+        employees = [
+            requests.post(f"{BASE_URL}/api/employees", json={
+                "name": f"TEST_Lookup_{i}", "daily_salary": 1000.0 + i, "trade": "Pintor"
+            }).json()
+            for i in range(3)
+        ]
+        yield employees
+        for employee in employees:
+            requests.delete(f"{BASE_URL}/api/employees/{employee['id']}")
+
+    @pytest.fixture
+    def contractor(self):
+        contractor = requests.post(f"{BASE_URL}/api/contractors", json={
+            "name": "TEST_Lookup_Contractor", "weekly_payment": 100.0,
+            "project_name": "TEST_Lookup_Project", "budget": 1000.0
+        }).json()
+        yield contractor
+        requests.delete(f"{BASE_URL}/api/contractors/{contractor['id']}")
+
+    def test_get_by_ids_keeps_order(self, employees):
+        """Known ids come back in the order asked, unknown and repeated ids are skipped"""
+        ids = [employees[2]["id"], "TEST_Lookup_missing", employees[0]["id"], employees[2]["id"]]
+        response = requests.get(f"{BASE_URL}/api/employees", params={"ids": ",".join(ids)})
+        assert response.status_code == 200
+        assert response.headers["ETag"]
+        assert [e["id"] for e in response.json()] == [employees[2]["id"], employees[0]["id"]]
+        assert response.json()[0] == employees[2]
+
+    def test_ids_combine_with_filters(self, employees):
+        requests.put(f"{BASE_URL}/api/employees/{employees[1]['id']}", json={"is_active": False})
+        ids = ",".join(e["id"] for e in employees)
+        response = requests.get(f"{BASE_URL}/api/employees", params={"ids": ids, "is_active": "false"})
+        assert [e["id"] for e in response.json()] == [employees[1]["id"]]
+
+    def test_post_lookup_with_fields(self, employees):
+        response = requests.post(f"{BASE_URL}/api/employees/lookup", json={
+            "ids": [employees[0]["id"], employees[1]["id"]], "fields": ["name", "daily_salary"]
+        })
+        assert response.status_code == 200
+        assert response.json() == [
+            {"id": e["id"], "name": e["name"], "daily_salary": e["daily_salary"]} for e in employees[:2]
+        ]
+
+    def test_contractor_fields_include_derived_balance(self, contractor):
+        response = requests.post(f"{BASE_URL}/api/contractors/lookup", json={
+            "ids": [contractor["id"]], "fields": ["remaining_balance"]
+        })
+        assert response.json() == [{"id": contractor["id"], "remaining_balance": 1000.0}]
+        listed = requests.get(f"{BASE_URL}/api/contractors", params={"ids": contractor["id"]}).json()
+        assert listed == [contractor]
+
+    def test_projects(self):
+        project = requests.post(f"{BASE_URL}/api/projects", json={
+            "name": "TEST_Lookup_Project", "start_date": "2025-01-06"
+        }).json()
+        try:
+            assert requests.get(f"{BASE_URL}/api/projects", params={"ids": project["id"]}).json() == [project]
+            response = requests.post(f"{BASE_URL}/api/projects/lookup", json={"ids": [project["id"]], "fields": ["name"]})
+            assert response.json() == [{"id": project["id"], "name": "TEST_Lookup_Project"}]
+        finally:
+            requests.delete(f"{BASE_URL}/api/projects/{project['id']}")
+
+    def test_invalid_requests(self):
+        assert requests.post(f"{BASE_URL}/api/employees/lookup", json={"ids": []}).status_code == 422
+        response = requests.post(f"{BASE_URL}/api/employees/lookup", json={"ids": ["x"], "fields": ["password"]})
+        assert response.status_code == 400
+        too_many = ",".join(f"id{i}" for i in range(1001))
+        assert requests.get(f"{BASE_URL}/api/projects", params={"ids": too_many}).status_code == 400
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
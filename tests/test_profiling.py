@@ -0,0 +1,111 @@
+"""
+Test suite for on-demand request profiling
+Tests: ProfilingMiddleware only profiles requests with the token, profile ids can't escape PROFILE_DIR
+"""
+import asyncio
+import os
+import pstats
+import pytest
+import requests
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
+from profiling import ProfilingMiddleware, resolve_profile  # noqa: E402
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+TOKEN = "s3cret-token"
+
+
+async def app(scope, receive, send):
+    await asyncio.sleep(0.01)
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def call(middleware, headers=(), query=b""):
+    scope = {"type": "http", "path": "/api/employees", "headers": list(headers), "query_string": query}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    return dict(messages[0]["headers"])
+
+
+class TestProfilingMiddleware:
+    """Test suite for token gating of request profiles"""
+
+    @pytest.fixture
+    def middleware(self, tmp_path):
+        return ProfilingMiddleware(app, token=TOKEN, output_dir=tmp_path)
+
+    def test_requests_without_token_are_not_profiled(self, middleware, tmp_path):
+        headers = call(middleware)
+        assert b"x-profile-id" not in headers
+        assert not list(tmp_path.iterdir())
+
+    @pytest.mark.parametrize("supplied", [b"wrong", b"s3cret", b"s3cret-token-and-more", b"", "s3cret-tokén".encode()])
+    def test_wrong_token_is_not_profiled(self, middleware, tmp_path, supplied):
+        headers = call(middleware, headers=[(b"x-profile", supplied)])
+        assert b"x-profile-id" not in headers
+        assert not list(tmp_path.iterdir())
+
+    def test_non_ascii_query_token_is_not_profiled(self, middleware, tmp_path):
+        headers = call(middleware, query=b"_profile=%C3%A9")
+        assert b"x-profile-id" not in headers
+        assert not list(tmp_path.iterdir())
+
+    def test_header_token_writes_sampled_profile(self, middleware, tmp_path):
+        headers = call(middleware, headers=[(b"x-profile", TOKEN.encode())])
+        profile_id = headers[b"x-profile-id"].decode()
+        assert "-api-employees-" in profile_id
+        assert profile_id.endswith(".folded")
+        assert resolve_profile(tmp_path, profile_id) == tmp_path / profile_id
+
+    def test_query_token_and_cprofile_mode(self, middleware, tmp_path):
+        headers = call(
+            middleware,
+            headers=[(b"x-profile-mode", b"cprofile")],
+            query=f"_profile={TOKEN}".encode(),
+        )
+        profile_id = headers[b"x-profile-id"].decode()
+        assert profile_id.endswith(".prof")
+        stats = pstats.Stats(str(tmp_path / profile_id))
+        assert stats.total_calls > 0
+
+    def test_unknown_mode_falls_back_to_sampling(self, middleware):
+        headers = call(middleware, headers=[(b"x-profile", TOKEN.encode()), (b"x-profile-mode", b"perf")])
+        assert headers[b"x-profile-id"].endswith(b".folded")
+
+
+class TestResolveProfile:
+    """Test suite for profile lookups"""
+
+    def test_only_plain_ids_inside_the_directory(self, tmp_path):
+        (tmp_path / "1-api-abc.folded").write_text("main 1\n")
+        (tmp_path.parent / "outside.folded").write_text("secret\n")
+        assert resolve_profile(tmp_path, "1-api-abc.folded") == tmp_path / "1-api-abc.folded"
+        assert resolve_profile(tmp_path, "missing.folded") is None
+        assert resolve_profile(tmp_path, "../outside.folded") is None
+        assert resolve_profile(tmp_path, "..") is None
+        assert resolve_profile(tmp_path, ".hidden") is None
+
+    def test_download_needs_token(self):
+        """Without the configured token the download endpoint behaves as if nothing exists"""
+        response = requests.get(f"{BASE_URL}/api/debug/profiles/1-api-abc.folded", headers={"X-Profile": "guess"})
+        assert response.status_code == 404
+
+    def test_download_with_non_ascii_token(self):
+        """A header outside ASCII is a wrong token, not a server error"""
+        response = requests.get(f"{BASE_URL}/api/debug/profiles/1-api-abc.folded",
+                                headers={"X-Profile": "é".encode("latin-1")})
+        assert response.status_code == 404
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,132 @@
+"""
+Test suite for server-side receipts
+Tests: amount-in-words and currency formatting, POST /api/receipts/{week_start} for open and closed weeks
+"""
+import pytest
+import random
+import requests
+import os
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
+import receipts  # noqa: E402
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestReceiptText:
+    """Test suite for the receipts module"""
+
+    @pytest.mark.parametrize("amount, words", [
+        (0, "cero"),
+        (7, "siete"),
+        (16, "dieciséis"),
+        (45, "cuarenta y cinco"),
+        (100, "cien"),
+        (215, "doscientos quince"),
+        (1000, "mil"),
+        (2500, "dos mil quinientos"),
+        (48350.5, "cuarenta y ocho mil trescientos cincuenta con 50/100"),
+        (0.29, "con 29/100"),
+    ])
+    def test_amount_in_words(self, amount, words):
+        """Same wording as the frontend's numberToWords"""
+        assert receipts.amount_in_words(amount) == words
+
+    def test_currency(self):
+        assert receipts.format_currency(1234567.5) == "$ 1.234.567,50"
+        assert receipts.format_currency(-80) == "-$ 80,00"
+
+    def test_render_escapes_names(self):
+        html = receipts.render_chunk([{
+            "number": "2030-0001", "name": "<b>Ana</b>", "gross": 1000.0, "late_discount": 0.0,
+            "advances": [{"date": "2030-01-08", "amount": 100.0, "description": "a & b"}], "net": 900.0,
+        }], "2030-01-07", "2030-01-12")
+        assert "&lt;b&gt;Ana&lt;/b&gt;" in html
+        assert "• 08/01 (a &amp; b)" in html
+        assert "Semana del 07/01/2030 al 13/01/2030" in html
+        assert "novecientos PESOS" in html
+
+
+class TestReceiptsEndpoint:
+    """Test suite for POST /api/receipts/{week_start}"""
+
+    @pytest.fixture(autouse=True)
+    def fresh_week(self):
+        # A fresh week per test: payment history can't be deleted
+        monday = date(2101, 1, 3) + timedelta(weeks=random.randrange(50000))
+        self.week = monday.isoformat()
+        self.days = [(monday + timedelta(days=i)).isoformat() for i in range(3)]
+
+    @pytest.fixture
+    def crew(self):
+        employees = [
+            requests.post(f"{BASE_URL}/api/employees", json={"name": name, "daily_salary": 1000.0}).json()
+            for name in ("TEST_Receipt_Beta", "TEST_Receipt_Alfa", "TEST_Receipt_Idle")
+        ]
+        contractor = requests.post(f"{BASE_URL}/api/contractors", json={
+            "name": "TEST_Receipt_Contractor", "weekly_payment": 2500.0,
+            "project_name": "TEST_Receipt_Obra", "budget": 100000.0
+        }).json()
+        for employee in employees[:2]:
+            for day in self.days[:2]:
+                requests.post(f"{BASE_URL}/api/attendance", json={
+                    "employee_id": employee["id"], "date": day, "status": "present", "week_start_date": self.week
+                })
+        requests.post(f"{BASE_URL}/api/attendance", json={
+            "employee_id": employees[0]["id"], "date": self.days[2], "status": "late",
+            "late_hours": 2, "week_start_date": self.week
+        })
+        yield employees, contractor
+        for employee in employees:
+            requests.delete(f"{BASE_URL}/api/employees/{employee['id']}")
+        requests.delete(f"{BASE_URL}/api/contractors/{contractor['id']}")
+
+    def render(self):
+        response = requests.post(f"{BASE_URL}/api/receipts/{self.week}")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/html")
+        return response.text
+
+    def test_open_week(self, crew):
+        html = self.render()
+        assert html.startswith("<!DOCTYPE html>") and html.endswith("</body></html>\n")
+        # Employees by name, only those with something to collect, then contractors
+        assert html.index("TEST_Receipt_Alfa") < html.index("TEST_Receipt_Beta") < html.index("TEST_Receipt_Contractor")
+        assert "TEST_Receipt_Idle" not in html
+        assert "Descuento por tardanzas:</span><span>- $ 250,00" in html
+        assert "dos mil setecientos cincuenta PESOS" in html
+        assert "Certificación semanal - Obra: TEST_Receipt_Obra" in html
+        assert f"Fecha: {date.today().strftime('%d/%m/%Y')}" in html
+
+    def test_closed_week_is_cached_until_it_changes(self, crew):
+        employees, _ = crew
+        requests.post(f"{BASE_URL}/api/payments/calculate", json={"week_start_date": self.week})
+        first = self.render()
+        assert self.render() == first
+
+        advance = requests.post(f"{BASE_URL}/api/advances", json={
+            "employee_id": employees[1]["id"], "amount": 500.0, "date": self.days[1],
+            "week_start_date": self.week, "description": "TEST_Receipt_Advance"
+        }).json()
+        try:
+            changed = self.render()
+            assert "TEST_Receipt_Advance" in changed
+            assert "mil quinientos PESOS" in changed
+        finally:
+            requests.delete(f"{BASE_URL}/api/advances/{advance['id']}")
+        assert self.render() == first
+
+    def test_empty_week(self):
+        response = requests.post(f"{BASE_URL}/api/receipts/{self.week}")
+        assert response.status_code == 200
+        assert "</body></html>" in response.text
+
+    def test_invalid_week(self):
+        assert requests.post(f"{BASE_URL}/api/receipts/not-a-week").status_code == 422
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
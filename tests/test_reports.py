@@ -0,0 +1,85 @@
+"""
+Test suite for multi-week payroll reports
+Tests: GET /api/reports/payroll?from=&to=&group_by=
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestPayrollReport:
+    """Test suite for the payroll report"""
+
+    @pytest.fixture
+    def employee(self):
+        employee = requests.post(f"{BASE_URL}/api/employees", json={
+            "name": "TEST_Report_Employee",
+            "daily_salary": 800.0,
+            "trade": "TEST_Report_Trade"
+        }).json()
+        days = [
+            ("2031-03-03", "2031-03-03", "present", 0),
+            ("2031-03-04", "2031-03-03", "late", 2),
+            ("2031-03-10", "2031-03-10", "present", 0),
+            ("2031-03-11", "2031-03-10", "absent", 0),
+        ]
+        for day, week, status, late_hours in days:
+            requests.post(f"{BASE_URL}/api/attendance", json={
+                "employee_id": employee["id"],
+                "date": day,
+                "status": status,
+                "late_hours": late_hours,
+                "week_start_date": week
+            })
+        advance = requests.post(f"{BASE_URL}/api/advances", json={
+            "employee_id": employee["id"],
+            "amount": 300.0,
+            "date": "2031-03-12",
+            "week_start_date": "2031-03-10"
+        }).json()
+        yield employee
+        requests.delete(f"{BASE_URL}/api/advances/{advance['id']}")
+        requests.delete(f"{BASE_URL}/api/employees/{employee['id']}")
+
+    def test_group_by_employee(self, employee):
+        """Totals over the range match the per-week formula"""
+        response = requests.get(f"{BASE_URL}/api/reports/payroll", params={
+            "from": "2031-03-03", "to": "2031-03-16", "group_by": "employee"
+        })
+        assert response.status_code == 200
+        data = response.json()
+        assert data["weeks"] == 2
+        group = next(g for g in data["groups"] if g["key"] == employee["id"])
+        assert group["days_worked"] == 3
+        assert group["gross_salary"] == 2400.0
+        assert group["late_discount"] == 200.0
+        assert group["advances"] == 300.0
+        assert group["net_payment"] == 1900.0
+
+    def test_group_by_week(self, employee):
+        data = requests.get(f"{BASE_URL}/api/reports/payroll", params={
+            "from": "2031-03-03", "to": "2031-03-10", "group_by": "week"
+        }).json()
+        keys = [g["key"] for g in data["groups"]]
+        assert keys == sorted(keys)
+        assert {"2031-03-03", "2031-03-10"} <= set(keys)
+
+    def test_range_excludes_other_weeks(self, employee):
+        data = requests.get(f"{BASE_URL}/api/reports/payroll", params={
+            "from": "2031-03-10", "to": "2031-03-10", "group_by": "trade"
+        }).json()
+        group = next(g for g in data["groups"] if g["key"] == "TEST_Report_Trade")
+        assert group["days_worked"] == 1
+        assert group["net_payment"] == 500.0
+
+    def test_invalid_parameters(self):
+        params = {"from": "2031-03-10", "to": "2031-03-03"}
+        assert requests.get(f"{BASE_URL}/api/reports/payroll", params=params).status_code == 400
+        params = {"from": "2031-03-03", "to": "2031-03-10", "group_by": "month"}
+        assert requests.get(f"{BASE_URL}/api/reports/payroll", params=params).status_code == 400
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,99 @@
+"""
+Test suite for what-if payroll simulation
+Tests: POST /api/payroll/simulate salary multipliers, late-hour rate, contractor payments, validation
+"""
+import pytest
+import random
+import requests
+import os
+from datetime import date, timedelta
+from uuid import uuid4
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestPayrollSimulation:
+    """Test suite for the simulation endpoint"""
+
+    @pytest.fixture
+    def payroll(self):
+        monday = date(2101, 1, 3) + timedelta(weeks=random.randrange(50000))
+        week = monday.isoformat()
+        trade = f"TEST_Sim_{uuid4().hex[:8]}"
+        project = requests.post(f"{BASE_URL}/api/projects", json={"name": "TEST_Sim_Project", "start_date": week}).json()
+        mason = requests.post(f"{BASE_URL}/api/employees", json={
+            "name": "TEST_Sim_Mason", "daily_salary": 1000.0, "trade": trade, "project_id": project["id"]
+        }).json()
+        helper = requests.post(f"{BASE_URL}/api/employees", json={"name": "TEST_Sim_Helper", "daily_salary": 2000.0}).json()
+        contractor = requests.post(f"{BASE_URL}/api/contractors", json={
+            "name": "TEST_Sim_Contractor", "weekly_payment": 1000.0, "project_name": "TEST_Sim", "budget": 50000.0
+        }).json()
+        for i in range(3):
+            day = (monday + timedelta(days=i)).isoformat()
+            requests.post(f"{BASE_URL}/api/attendance", json={
+                "employee_id": helper["id"], "date": day, "status": "present", "week_start_date": week
+            })
+            requests.post(f"{BASE_URL}/api/attendance", json={
+                "employee_id": mason["id"], "date": day, "status": "late" if i == 2 else "present",
+                "late_hours": 2 if i == 2 else 0, "week_start_date": week
+            })
+        advance = requests.post(f"{BASE_URL}/api/advances", json={
+            "employee_id": mason["id"], "amount": 300.0, "date": week, "week_start_date": week
+        }).json()
+        yield {"week": week, "trade": trade, "project": project, "contractor": contractor}
+        requests.delete(f"{BASE_URL}/api/advances/{advance['id']}")
+        for employee in (mason, helper):
+            requests.delete(f"{BASE_URL}/api/employees/{employee['id']}")
+        requests.delete(f"{BASE_URL}/api/projects/{project['id']}")
+        requests.delete(f"{BASE_URL}/api/contractors/{contractor['id']}")
+
+    def simulate(self, payroll, scenarios):
+        return requests.post(f"{BASE_URL}/api/payroll/simulate", json={
+            "from": payroll["week"], "to": payroll["week"], "scenarios": scenarios
+        })
+
+    def test_scenarios(self, payroll):
+        response = self.simulate(payroll, [
+            {"name": "raise", "trade_multipliers": {payroll["trade"]: 1.1}},
+            {"name": "strict", "late_hour_rate": 1.5},
+            {"name": "combined", "salary_multiplier": 1.1, "project_multipliers": {payroll["project"]["id"]: 2}},
+            {"name": "contractor", "contractor_payments": {payroll["contractor"]["id"]: 400.0}},
+        ])
+        assert response.status_code == 200
+        data = response.json()
+        assert data["weeks"] == 1
+        baseline = data["baseline"]
+        assert baseline["gross_salary"] == pytest.approx(9000.0)
+        assert baseline["late_discount"] == pytest.approx(250.0)
+        assert baseline["net_payment"] == pytest.approx(8450.0)
+
+        raise_, strict, combined, contractor = data["scenarios"]
+        assert [s["name"] for s in data["scenarios"]] == ["raise", "strict", "combined", "contractor"]
+        assert raise_["difference"] == pytest.approx(275.0)
+        assert strict["late_discount"] == pytest.approx(375.0)
+        assert strict["difference"] == pytest.approx(-125.0)
+        assert combined["gross_salary"] == pytest.approx(13200.0)
+        assert combined["late_discount"] == pytest.approx(550.0)
+        assert combined["advances"] == baseline["advances"]
+        assert contractor["difference"] == pytest.approx(-600.0)
+        assert contractor["total_salary"] == baseline["total_salary"]
+
+    def test_nothing_is_written(self, payroll):
+        before = requests.get(f"{BASE_URL}/api/contractors/{payroll['contractor']['id']}").json()
+        self.simulate(payroll, [{"name": "contractor", "contractor_payments": {payroll["contractor"]["id"]: 1.0}}])
+        assert requests.get(f"{BASE_URL}/api/contractors/{payroll['contractor']['id']}").json() == before
+
+    def test_invalid_requests(self, payroll):
+        response = self.simulate(payroll, [{"name": "typo", "trade_multipliers": {"TEST_Sim_missing": 1.1}}])
+        assert response.status_code == 400
+        assert "TEST_Sim_missing" in response.json()["detail"]
+        assert self.simulate(payroll, []).status_code == 422
+        assert self.simulate(payroll, [{"name": "zero", "salary_multiplier": 0}]).status_code == 422
+        response = requests.post(f"{BASE_URL}/api/payroll/simulate", json={
+            "from": "2030-02-04", "to": "2030-01-07", "scenarios": [{"name": "x"}]
+        })
+        assert response.status_code == 400
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,67 @@
+"""
+Test suite for delta sync
+Tests: GET /api/sync?since=<token>, updated_at stamping, tombstones for deletes
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestDeltaSync:
+    """Test suite for the sync endpoint"""
+
+    def current_token(self):
+        response = requests.get(f"{BASE_URL}/api/sync", params={"collections": "projects"})
+        assert response.status_code == 200
+        return response.json()["token"]
+
+    def test_create_update_delete_are_reported(self):
+        """Changes after a token show up once, deletes as tombstones"""
+        token = self.current_token()
+
+        created = requests.post(f"{BASE_URL}/api/employees", json={
+            "name": "TEST_Sync_Employee",
+            "daily_salary": 1000.0
+        })
+        assert created.status_code == 200
+        employee = created.json()
+        assert employee["updated_at"], "New records should carry updated_at"
+
+        response = requests.get(f"{BASE_URL}/api/sync", params={"since": token, "collections": "employees"})
+        data = response.json()
+        assert [e["id"] for e in data["changes"]["employees"]] == [employee["id"]]
+        assert data["deleted"]["employees"] == []
+        token = data["token"]
+
+        updated = requests.put(f"{BASE_URL}/api/employees/{employee['id']}", json={"daily_salary": 1200.0})
+        assert updated.json()["updated_at"] >= employee["updated_at"]
+        data = requests.get(f"{BASE_URL}/api/sync", params={"since": token, "collections": "employees"}).json()
+        assert data["changes"]["employees"][0]["daily_salary"] == 1200.0
+        token = data["token"]
+
+        requests.delete(f"{BASE_URL}/api/employees/{employee['id']}")
+        data = requests.get(f"{BASE_URL}/api/sync", params={"since": token, "collections": "employees"}).json()
+        assert data["changes"]["employees"] == []
+        assert data["deleted"]["employees"] == [employee["id"]]
+
+    def test_no_changes_returns_same_token(self):
+        """Syncing again with the latest token returns nothing new"""
+        token = self.current_token()
+        data = requests.get(f"{BASE_URL}/api/sync", params={"since": token}).json()
+        assert data["token"] == token
+        assert all(docs == [] for docs in data["changes"].values())
+
+    def test_future_token_forces_reset(self):
+        """A token newer than the server's sequence returns a full snapshot"""
+        data = requests.get(f"{BASE_URL}/api/sync", params={"since": 10 ** 12, "collections": "projects"}).json()
+        assert data["reset"] is True
+
+    def test_unknown_collection_rejected(self):
+        response = requests.get(f"{BASE_URL}/api/sync", params={"collections": "users"})
+        assert response.status_code == 400
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
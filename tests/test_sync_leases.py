@@ -0,0 +1,85 @@
+"""
+Test suite for sync tokens around in-flight writes
+Tests: /api/sync never returns a token past a reserved but unwritten sync_seq
+"""
+import asyncio
+import pytest
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from tests.in_process import run, server
+
+
+async def sync_token(since=0):
+    return await server.sync_changes(since=since, collections="projects", limit=5000)
+
+
+class TestSyncLeases:
+    """Test suite for sync_seq reservations"""
+
+    def test_token_waits_for_reserved_write(self):
+        """A sync between reservation and write must not skip the write"""
+        async def scenario():
+            project_id = f"TEST_Lease_{uuid4().hex}"
+            async with server.sync_lease_scope():
+                seq = await server.next_sync_seq()
+                during = await sync_token()
+                assert during["token"] < seq
+                await server.db.projects.insert_one({
+                    "id": project_id, "name": "TEST_Lease_Project", "start_date": "2025-01-06",
+                    "created_at": "2025-01-06T00:00:00+00:00", "sync_seq": seq,
+                })
+
+            after = await sync_token(since=during["token"])
+            assert project_id in [p["id"] for p in after["changes"]["projects"]]
+            assert after["token"] >= seq
+            await server.db.projects.delete_one({"id": project_id})
+        run(scenario)
+
+    def test_range_reservation_holds_token(self):
+        """A multi-value reservation holds the token below its first value"""
+        async def scenario():
+            async with server.sync_lease_scope():
+                last = await server.next_sync_seq(5)
+                assert (await sync_token())["token"] <= last - 5
+            assert (await sync_token())["token"] >= last
+        run(scenario)
+
+    def test_expired_lease_is_ignored(self, monkeypatch):
+        """A writer that never releases only holds the token back until its lease expires"""
+        async def scenario():
+            monkeypatch.setattr(server, "SYNC_LEASE_SECONDS", 0.2)
+            # Outside any request or scope, so nothing releases this lease
+            token = server.request_context.set(None)
+            try:
+                last = await server.next_sync_seq()
+            finally:
+                server.request_context.reset(token)
+            assert (await sync_token())["token"] < last
+            await asyncio.sleep(0.3)
+            assert (await sync_token())["token"] >= last
+        run(scenario)
+
+    def test_old_lease_outlives_many_reservations(self):
+        """An unwritten reservation holds the token however many others come and go"""
+        async def scenario():
+            async with server.sync_lease_scope():
+                held = await server.next_sync_seq()
+                async with server.sync_lease_scope():
+                    for _ in range(1100):
+                        await server.next_sync_seq()
+                assert (await sync_token())["token"] < held
+            assert (await sync_token())["token"] >= held
+        run(scenario)
+
+    def test_scope_releases_leases_together(self):
+        async def scenario():
+            async with server.sync_lease_scope():
+                await server.next_sync_seq()
+                await server.next_sync_seq(3)
+                assert await server.db.sync_leases.count_documents({}) >= 2
+            assert await server.db.sync_leases.count_documents({"expires_at": {"$gt": datetime.now(timezone.utc)}}) == 0
+        run(scenario)
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,49 @@
+"""
+Test suite for canonical week start dates
+Tests: week_start_date normalized to Monday, invalid dates rejected with 422
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestWeekKeys:
+    """Test suite for week start normalization"""
+
+    def test_advance_week_moves_to_monday(self):
+        """A mid-week date is stored as the Monday of that week"""
+        employee = requests.post(f"{BASE_URL}/api/employees", json={
+            "name": "TEST_Week_Employee",
+            "daily_salary": 1000.0
+        }).json()
+        try:
+            response = requests.post(f"{BASE_URL}/api/advances", json={
+                "employee_id": employee["id"],
+                "amount": 100.0,
+                "date": "2025-01-09",
+                "week_start_date": "2025-01-09"
+            })
+            assert response.status_code == 200
+            advance = response.json()
+            assert advance["week_start_date"] == "2025-01-06"
+            requests.delete(f"{BASE_URL}/api/advances/{advance['id']}")
+        finally:
+            requests.delete(f"{BASE_URL}/api/employees/{employee['id']}")
+
+    def test_week_path_is_normalized(self):
+        """Any day of the week addresses the same week"""
+        monday = requests.get(f"{BASE_URL}/api/attendance/week/2025-01-06")
+        sunday = requests.get(f"{BASE_URL}/api/attendance/week/2025-01-12")
+        assert monday.status_code == sunday.status_code == 200
+        assert monday.json() == sunday.json()
+
+    @pytest.mark.parametrize("week", ["2025-13-01", "last-week"])
+    def test_invalid_week_rejected(self, week):
+        response = requests.get(f"{BASE_URL}/api/attendance/week/{week}")
+        assert response.status_code == 422
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])